@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+起動時間ベンチマーク
+- `python -X importtime` で MainWindow 読み込み時の import 内訳（累積時間の上位）を表示
+- main.py を FOLDERDUMP_STARTUP_PROBE=1 で起動し、初回描画までの時間（中央値）を計測
+  （main.py の先頭から初回 Paint までの、プローブが出力する値。インタプリタの起動・終了は含まない）
+- 起動時に読み込まれてはいけない重いモジュールが混入していないか確認
+- しきい値を超えたら終了コード 1（CI での回帰検知用）
+
+例:
+    python benchmarks/bench_startup.py --runs 5 --max-import-ms 300 --max-paint-ms 2000
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 初回描画までに読み込まれてはいけないモジュール（初回実行・テーマ適用時に遅延読み込み）
+LAZY_MODULES = (
+    "folderdump.worker.dump_worker",
+    "folderdump.core.walker",
+    "folderdump.core.renderer",
+    "folderdump.core.aio",
+    "folderdump.core.listing",
+    "qdarktheme",
+    "asyncio",
+)
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_breakdown(
+    module: str = "folderdump.gui.main_window",
+) -> Tuple[float, List[Tuple[float, float, str]]]:
+    """(合計 ms, [(self ms, 累積 ms, モジュール名), ...]) を返す"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_env(), cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cum_us, name = [x.strip() for x in line.replace("import time:", "|").split("|")]
+        rows.append((int(self_us) / 1000, int(cum_us) / 1000, name))
+    total = next((cum for _, cum, name in reversed(rows) if name == module), 0.0)
+    return total, rows
+
+
+_PROBE_RE = re.compile(r"^first_paint_ms=([0-9.]+)$", re.M)
+
+
+def first_paint_ms(runs: int) -> List[float]:
+    """main.py を起動し、プローブが出力する初回描画までの時間を runs 回取得"""
+    env = _env()
+    env["FOLDERDUMP_STARTUP_PROBE"] = "1"
+    results = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, str(ROOT / "main.py")],
+            capture_output=True, text=True, env=env, cwd=ROOT, timeout=60,
+        )
+        m = _PROBE_RE.search(proc.stdout)
+        if m is None:
+            raise RuntimeError(f"probe output not found:\n{proc.stdout}\n{proc.stderr}")
+        results.append(float(m.group(1)))
+    return results
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--max-import-ms", type=float, default=300.0)
+    ap.add_argument("--max-paint-ms", type=float, default=2000.0)
+    args = ap.parse_args()
+
+    failed = False
+
+    total, rows = import_breakdown()
+    print(f"import folderdump.gui.main_window: {total:.1f} ms (-X importtime)")
+    for self_ms, cum_ms, name in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {cum_ms:8.1f} ms  (self {self_ms:6.1f})  {name}")
+    loaded = {name.strip() for _, _, name in rows}
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        print(f"NG: 起動時に読み込まれている遅延対象モジュール: {', '.join(eager)}")
+        failed = True
+    if total > args.max_import_ms:
+        print(f"NG: import 時間 {total:.1f} ms > {args.max_import_ms:.1f} ms")
+        failed = True
+
+    paints = first_paint_ms(args.runs)
+    median = statistics.median(paints)
+    print(f"time to first paint: median {median:.1f} ms ({', '.join(f'{p:.0f}' for p in paints)})")
+    if median > args.max_paint_ms:
+        print(f"NG: 初回描画 {median:.1f} ms > {args.max_paint_ms:.1f} ms")
+        failed = True
+
+    print("NG" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+走査フック（Visitor）の呼び出しコストのベンチマーク
+- 一時フォルダに合成ツリーを作り、iter_paths を次の条件で走査して中央値を比べる
+    none      : visitors なし
+    idle      : 何も上書きしない Visitor を 4 つ（登録時に除外され、none と同じになるはず）
+    on_entry  : on_entry だけを上書きした空の Visitor を 1 つ
+    all x4    : 全フックを上書きした空の Visitor を 4 つ
+    ext-bytes : 拡張子ごとのバイト数を集計する Visitor（DirEntry の stat キャッシュを使用）
+- エントリあたりの増分（ns）を表示し、idle の増分がしきい値を超えたら終了コード 1
+
+例:
+    python benchmarks/bench_visitors.py --dirs 200 --files 100 --runs 5 --max-idle-pct 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from folderdump.core.walker import CtlFlags, SkipLog, Stats, Visitor, iter_paths  # noqa: E402
+
+
+class _OnEntry(Visitor):
+    def on_entry(self, rel, entry, is_dir, depth):
+        pass
+
+
+class _All(Visitor):
+    def on_enter_dir(self, rel, depth):
+        pass
+
+    def on_entry(self, rel, entry, is_dir, depth):
+        pass
+
+    def on_exit_dir(self, rel, depth):
+        pass
+
+    def on_skip(self, path, reason):
+        pass
+
+
+class _ExtBytes(Visitor):
+    def __init__(self):
+        self.bytes = Counter()
+
+    def on_entry(self, rel, entry, is_dir, depth):
+        if not is_dir:
+            self.bytes[os.path.splitext(entry.name)[1]] += entry.stat(follow_symlinks=False).st_size
+
+
+def make_tree(base: Path, dirs: int, files: int) -> int:
+    """dirs 個のフォルダ（2 階層）に files 個ずつファイルを作る。戻り値は総エントリ数"""
+    exts = (".py", ".txt", ".json", ".md", "")
+    for d in range(dirs):
+        sub = base / f"g{d % 10}" / f"d{d}"
+        sub.mkdir(parents=True, exist_ok=True)
+        for f in range(files):
+            (sub / f"f{f}{exts[f % len(exts)]}").write_bytes(b"x" * (f % 7))
+    return min(dirs, 10) + dirs + dirs * files
+
+
+def scan(root: Path, visitors: List[Visitor]) -> int:
+    n = 0
+    for _ in iter_paths(
+        root=root, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+        dirs_first=True, folders_only=False, flags=CtlFlags(), skiplog=SkipLog(), stats=Stats(),
+        visitors=visitors or None,
+    ):
+        n += 1
+    return n
+
+
+def measure(root: Path, make: Callable[[], List[Visitor]], runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        visitors = make()
+        t0 = time.perf_counter()
+        scan(root, visitors)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    ap.add_argument("--dirs", type=int, default=200)
+    ap.add_argument("--files", type=int, default=100)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--max-idle-pct", type=float, default=3.0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        entries = make_tree(root, args.dirs, args.files)
+        # ページキャッシュを温める
+        scan(root, [])
+
+        cases = [
+            ("none", lambda: []),
+            ("idle", lambda: [Visitor() for _ in range(4)]),
+            ("on_entry", lambda: [_OnEntry()]),
+            ("all x4", lambda: [_All() for _ in range(4)]),
+            ("ext-bytes", lambda: [_ExtBytes()]),
+        ]
+        results = {name: measure(root, make, args.runs) for name, make in cases}
+
+    base = results["none"]
+    print(f"{entries:,} entries, median of {args.runs} runs")
+    for name, sec in results.items():
+        extra_ns = (sec - base) / entries * 1e9
+        pct = (sec / base - 1) * 100
+        print(f"  {name:10s} {sec * 1000:8.1f} ms  {extra_ns:+7.0f} ns/entry  ({pct:+5.1f}%)")
+
+    idle_pct = (results["idle"] / base - 1) * 100
+    if idle_pct > args.max_idle_pct:
+        print(f"NG: フック未使用時の増分 {idle_pct:.1f}% > {args.max_idle_pct:.1f}%")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
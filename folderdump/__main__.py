@@ -0,0 +1,12 @@
+"""python -m folderdump でヘッドレス実行（走査デーモンが動いていればそちらに依頼する）"""
+
+import sys
+
+from folderdump.client import forward
+
+rc = forward(sys.argv[1:])
+if rc is None:
+    from folderdump.cli import main
+
+    rc = main()
+sys.exit(rc)
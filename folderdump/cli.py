@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+ヘッドレス実行（GUI なし）
+- 1 回の走査から複数フォーマットを同時に書き出す（-o を繰り返し指定）
+- PySide6 は読み込まない（サーバーや CI の夜間ジョブ向け）
+- 走査デーモン（python -m folderdump.daemon）が動いていれば python -m folderdump はそちらに依頼する
+  （--no-daemon で常にこのプロセスで走査）
+
+例:
+    python -m folderdump src docs -o tree=out/tree.txt -o csv=out/list.csv -o json=out/tree.json
+    python -m folderdump . -o tree            # 出力先省略（または '-'）で標準出力
+    python -m folderdump . --where "size>100MB age<7d" -o plain
+"""
+
+import argparse
+import sys
+from typing import List, Optional, TextIO
+
+from folderdump.core.filters import Predicate
+from folderdump.core.job import FORMATS, DumpJob, JobOutput
+from folderdump.core.listing import LISTING_FORMATS
+from folderdump.core.ordering import DEFAULT_ORDER, ORDERS
+from folderdump.core.scan_cache import ScanCache
+from folderdump.core.walker import CtlFlags, ScanBudget, SkipLog
+
+
+def _output(spec: str) -> JobOutput:
+    """'fmt=path' / 'fmt' を JobOutput に変換"""
+    fmt, _, dest = spec.partition("=")
+    fmt = fmt.strip().lower()
+    if fmt not in FORMATS:
+        choices = ", ".join(FORMATS)
+        raise argparse.ArgumentTypeError(f"unknown format: {fmt} (choose from {choices})")
+    return JobOutput(fmt, None if dest in ("", "-") else dest)
+
+
+def _predicate(text: str) -> Predicate:
+    """--where の条件式を Predicate に変換"""
+    try:
+        return Predicate(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser(parser_class=argparse.ArgumentParser) -> argparse.ArgumentParser:
+    ap = parser_class(
+        prog="folderdump", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    ap.add_argument("roots", nargs="+", help="走査するフォルダ（--listing 指定時はリスティングファイル）")
+    ap.add_argument(
+        "-o", "--output", action="append", type=_output, metavar="FMT[=PATH]",
+        help="出力フォーマットと出力先（繰り返し可。既定: tree を標準出力）",
+    )
+    ap.add_argument("--depth", type=int, default=None, help="最大深さ")
+    ap.add_argument("--absolute", action="store_true", help="絶対パスで出力（plain/ndjson）")
+    ap.add_argument("--digests", action="store_true", help="フォルダの構造ダイジェストを出力（csv/json/ndjson）")
+    ap.add_argument("--digest-stat", action="store_true", help="ダイジェストにファイルのサイズ・更新日時も含める")
+    ap.add_argument("--follow-symlinks", action="store_true", help="シンボリックリンクを辿る")
+    ap.add_argument("--follow-outside", action="store_true", help="ルート外を指すリンクも辿る")
+    ap.add_argument("--archives", action="store_true", help="zip/tar の中身も列挙")
+    ap.add_argument("--folders-only", action="store_true", help="フォルダのみ")
+    ap.add_argument("--gitignore", action="store_true", help=".gitignore を適用")
+    ap.add_argument("--git-index", action="store_true", help="git 作業ツリーは .git/index から列挙（追跡ファイルのみ）")
+    ap.add_argument("--untracked", action="store_true", help="--git-index で未追跡（除外されていないもの）も含める")
+    ap.add_argument(
+        "--include", action="append", default=[], metavar="PATTERN", help="包含パターン（繰り返し可）",
+    )
+    ap.add_argument(
+        "--exclude", action="append", default=[], metavar="PATTERN", help="除外パターン（繰り返し可）",
+    )
+    ap.add_argument(
+        "--where", type=_predicate, default=None, metavar="EXPR",
+        help="メタデータ条件（例: 'size>100MB age<7d' / 'empty type=d' / 'type=l'。先頭 ! で否定）",
+    )
+    ap.add_argument(
+        "--order", choices=ORDERS, default=DEFAULT_ORDER,
+        help="直下の並び順（name=名前 / natural=自然順 / size=サイズの大きい順 / fs=並べ替えない・最速）",
+    )
+    ap.add_argument("--max-fanout", type=int, default=None, metavar="N", help="1 フォルダの表示件数")
+    ap.add_argument("--max-entries", type=int, default=None, metavar="N", help="総件数の上限")
+    ap.add_argument("--max-seconds", type=float, default=None, metavar="SEC", help="時間の上限")
+    ap.add_argument("--max-per-dir", type=int, default=None, metavar="N", help="1 フォルダの列挙件数の上限")
+    ap.add_argument(
+        "--skip-log", default=None, metavar="PATH",
+        help="スキップしたパスと理由を全件書き出す（標準エラーには理由ごとの件数のみ）",
+    )
+    ap.add_argument(
+        "--listing", nargs="?", const="auto", default=None, choices=("auto",) + LISTING_FORMATS,
+        help="roots を記録済みリスティング（find / ls -lR / rsync）として読む",
+    )
+    ap.add_argument("--no-daemon", action="store_true", help="走査デーモンが動いていても使わない")
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return execute(build_parser().parse_args(argv), sys.stdout, sys.stderr)
+
+
+def execute(
+    args: argparse.Namespace, stdout: TextIO, stderr: TextIO,
+    cache: Optional[ScanCache] = None, progress_cb=None,
+) -> int:
+    """
+    解析済みの引数で実行し、終了コードを返す（標準出力・標準エラーは引数の書き込み先へ）
+    cache 指定時は走査結果をキャッシュから使い、なければ走査して保存する（走査デーモン用）
+    """
+    outputs = args.output or [JobOutput("tree")]
+
+    budget = None
+    if args.max_entries is not None or args.max_seconds is not None or args.max_per_dir is not None:
+        budget = ScanBudget(
+            max_entries=args.max_entries, max_seconds=args.max_seconds,
+            max_per_dir=args.max_per_dir,
+        )
+    flags = CtlFlags()
+    job = DumpJob(
+        args.roots,
+        depth=args.depth,
+        absolute=args.absolute,
+        follow_symlinks=args.follow_symlinks,
+        include_patterns=args.include,
+        exclude_patterns=args.exclude,
+        folders_only=args.folders_only,
+        use_gitignore=args.gitignore,
+        flags=flags,
+        budget=budget,
+        follow_outside=args.follow_outside,
+        scan_archives=args.archives,
+        listing_format=args.listing,
+        max_fanout=args.max_fanout,
+        git_index=args.git_index,
+        git_untracked=args.untracked,
+        digests=args.digests or args.digest_stat,
+        digest_stat=args.digest_stat,
+        predicate=args.where,
+        order=args.order,
+    )
+    skiplog = SkipLog(log_path=args.skip_log)
+    try:
+        result = job.run(outputs, skiplog=skiplog, progress_cb=progress_cb, cache=cache)
+    except ValueError as e:
+        print(f"folderdump: {e}", file=stderr)
+        return 1
+    except KeyboardInterrupt:
+        flags.cancel()
+        return 130
+    finally:
+        skiplog.close()
+
+    for out in outputs:
+        if out.dest is None:
+            stdout.write(out.text or "")
+            stdout.write("\n")
+    stats, skiplog = result["stats"], result["skiplog"]
+    print(
+        f"件数: {stats.total:,} | 最大深さ: {stats.max_depth_seen} | "
+        f"スキップ: {skiplog.count():,} | 時間: {stats.elapsed:.2f}s",
+        file=stderr,
+    )
+    for kind, n in skiplog.summary():
+        print(f"  {kind}: {n:,}", file=stderr)
+    for out in outputs:
+        if out.dest is not None:
+            print(f"{out.fmt}: {out.dest}", file=stderr)
+    if args.skip_log:
+        print(f"skip-log: {args.skip_log}", file=stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+走査デーモン（folderdump.daemon）の薄いクライアント
+- 標準ライブラリだけを読み込む（python -m folderdump の起動時に重いモジュールを読む前に使う）
+- デーモンが動いていなければ何もせず None を返し、呼び出し側がこのプロセスで実行する
+- 通信は Unix ドメインソケット。要求は JSON 1 行、応答はフレーム（種別 1 バイト + 長さ 4 バイト + 本体）の列
+    o: 標準出力  e: 標準エラー  p: 進捗（JSON）  i: アイテム（JSON）  s: 統計（JSON）  x: 終了（JSON の終了コード。null はこのプロセスで実行）
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+from typing import BinaryIO, List, Optional, Tuple
+
+# ソケットの場所（環境変数で上書き可）
+SOCKET_ENV = "FOLDERDUMP_SOCKET"
+
+_HEADER = struct.Struct(">cI")
+
+# 接続の待ち時間（秒）。デーモンが応答しなければこのプロセスで実行する
+CONNECT_TIMEOUT = 1.0
+
+
+def socket_path() -> str:
+    """既定のソケットパス（$FOLDERDUMP_SOCKET → $XDG_RUNTIME_DIR/folderdump.sock → 一時フォルダ）"""
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "folderdump.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(tempfile.gettempdir(), f"folderdump-{uid}.sock")
+
+
+def send_frame(out: BinaryIO, kind: bytes, data: bytes):
+    out.write(_HEADER.pack(kind, len(data)))
+    out.write(data)
+
+
+def read_frame(inp: BinaryIO) -> Optional[Tuple[bytes, bytes]]:
+    """(種別, 本体) を返す（接続が閉じられたら None）"""
+    head = inp.read(_HEADER.size)
+    if len(head) < _HEADER.size:
+        return None
+    kind, n = _HEADER.unpack(head)
+    data = inp.read(n)
+    if len(data) < n:
+        return None
+    return kind, data
+
+
+def connect(path: Optional[str] = None) -> Optional[socket.socket]:
+    """デーモンに接続する（動いていなければ None）"""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def request(sock: socket.socket, req: dict) -> BinaryIO:
+    """要求を送り、応答を読むファイルを返す"""
+    sock.sendall(json.dumps(req, ensure_ascii=False).encode("utf-8") + b"\n")
+    return sock.makefile("rb")
+
+
+def forward(argv: List[str], path: Optional[str] = None) -> Optional[int]:
+    """
+    CLI の引数をデーモンに渡して実行し、終了コードを返す
+    デーモンが動いていない・引き受けない（--help や引数の誤り）ときは None（このプロセスで実行する）
+    """
+    if "--no-daemon" in argv or "-h" in argv or "--help" in argv:
+        return None
+    sock = connect(path)
+    if sock is None:
+        return None
+    started = False
+    try:
+        inp = request(sock, {"op": "run", "argv": argv, "cwd": os.getcwd()})
+        while True:
+            frame = read_frame(inp)
+            if frame is None:
+                break
+            kind, data = frame
+            if kind == b"x":
+                return json.loads(data)
+            if kind == b"o":
+                sys.stdout.write(data.decode("utf-8"))
+                started = True
+            elif kind == b"e":
+                sys.stderr.write(data.decode("utf-8"))
+                started = True
+    except OSError:
+        pass
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        sock.close()
+    if not started:
+        return None
+    print("folderdump: 走査デーモンとの接続が切れました", file=sys.stderr)
+    return 1
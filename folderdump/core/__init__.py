@@ -1,19 +1,40 @@
 """
 コアロジック（走査・レンダリング・フィルタ）
+- 起動時間短縮のため、各名前は初回参照時にサブモジュールから読み込む（PEP 562）
 """
 
-from .walker import iter_paths, Stats, SkipLog, CtlFlags
-from .renderer import (
-    render_plain, render_tree, render_markdown,
-    render_json, render_csv, render_dot,
-)
-from .filters import read_gitignore, should_keep
-from .utils import win_long, match_any
+import importlib
 
-__all__ = [
-    "iter_paths", "Stats", "SkipLog", "CtlFlags",
-    "render_plain", "render_tree", "render_markdown",
-    "render_json", "render_csv", "render_dot",
-    "read_gitignore", "should_keep",
-    "win_long", "match_any",
-]
+# 公開名 -> 定義サブモジュール
+_EXPORTS = {
+    "iter_paths": "walker", "Stats": "walker", "SkipLog": "walker", "CtlFlags": "walker",
+    "ScanBudget": "walker", "Marker": "walker", "is_marker": "walker",
+    "Visitor": "walker", "ProgressEstimator": "walker",
+    "render_plain": "renderer", "render_tree": "renderer", "render_markdown": "renderer",
+    "render_json": "renderer", "render_csv": "renderer", "render_dot": "renderer",
+    "write_ndjson": "renderer", "write_json_stream": "renderer",
+    "read_gitignore": "filters", "should_keep": "filters",
+    "AsyncScanner": "aio",
+    "ListingReader": "listing", "filter_stream": "listing",
+    "DumpFile": "dumpfile",
+    "DumpJob": "job", "JobOutput": "job", "render_format": "job",
+    "TreeSummary": "summary", "write_summary": "summary",
+    "DigestTree": "digest", "diff_trees": "digest",
+    "HtmlWriter": "htmlview", "write_html": "htmlview",
+    "win_long": "utils", "match_any": "utils",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
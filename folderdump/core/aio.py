@@ -0,0 +1,193 @@
+# folderdump/core/aio.py
+"""
+asyncio 用の走査 API
+- ディレクトリ列挙と判定は executor 上で実行（イベントループを止めない）
+- 兄弟の子ディレクトリは先読みして並行に列挙し、判定と出力は行きがけ順のまま 1 つずつ行う
+  （並べ替えない列挙 order="fs" は列挙しながら流すため先読みしない）
+- 同時列挙数をイベントループごとの Semaphore で制限（同じ AsyncScanner で複数ルートを並行走査できる）
+- 判定は executor 上で VISIT_CHUNK 件ずつ行い、消費側が取りに来るまで次の判定は行わない（背圧）
+- タスクのキャンセルで実行中の列挙も中断する
+"""
+
+import asyncio
+import functools
+import weakref
+from collections import deque
+from concurrent.futures import Executor
+from pathlib import Path
+from itertools import islice
+from typing import AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .archives import DEFAULT_ARCHIVE_LIMIT
+from .filters import Predicate
+from .ordering import DEFAULT_ORDER
+from .walker import _Walk, CtlFlags, ProgressEstimator, SkipLog, Stats, ScanBudget, Visitor
+
+# executor 上で 1 回に判定するエントリ数（大きなディレクトリでも先行しすぎないように）
+VISIT_CHUNK = 256
+
+
+class AsyncScanner:
+    """
+    非同期走査器。
+    出力は iter_paths と同じ (rel, is_dir, depth) なので、既存のフィルタ・レンダラがそのまま使える。
+
+        scanner = AsyncScanner(concurrency=8)
+        items = await scanner.collect(Path("/data"))
+        text = render_tree(items)
+    """
+
+    def __init__(self, concurrency: int = 4, executor: Optional[Executor] = None):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.concurrency = concurrency
+        # None ならイベントループ既定の ThreadPoolExecutor を使う
+        self.executor = executor
+        # Semaphore は実行中のループに結びつくため、ループごとに初回使用時に作る
+        self._sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(self.concurrency)
+        return sem
+
+    async def iter_paths(
+        self,
+        root: Path,
+        max_depth: Optional[int] = None,
+        follow_symlinks: bool = False,
+        includes: List[str] | None = None,
+        excludes: List[str] | None = None,
+        dirs_first: bool = True,
+        folders_only: bool = False,
+        negates: List[str] | None = None,
+        skiplog: SkipLog | None = None,
+        stats: Stats | None = None,
+        budget: Optional[ScanBudget] = None,
+        progress_cb=None,
+        follow_outside: bool = False,
+        archives: bool = False,
+        archive_limit: Optional[int] = DEFAULT_ARCHIVE_LIMIT,
+        max_fanout: Optional[int] = None,
+        predicate: Optional[Predicate] = None,
+        visitors: Optional[List[Visitor]] = None,
+        order: str = DEFAULT_ORDER,
+        estimator: Optional[ProgressEstimator] = None,
+    ) -> AsyncIterator[Tuple[Path, bool, int]]:
+        """iter_paths の非同期版（progress_cb と Visitor.on_skip は executor のスレッドから呼ばれる）"""
+        loop = asyncio.get_running_loop()
+        # 実行中の列挙を止めるための内部フラグ（一時停止は使わない）
+        flags = CtlFlags()
+        walk = await loop.run_in_executor(
+            self.executor,
+            functools.partial(
+                _Walk, root, max_depth, follow_symlinks, includes or [], excludes or [],
+                dirs_first, folders_only, flags,
+                skiplog if skiplog is not None else SkipLog(),
+                stats if stats is not None else Stats(),
+                progress_cb=progress_cb, negates=negates, budget=budget,
+                follow_outside=follow_outside, archives=archives, archive_limit=archive_limit,
+                max_fanout=max_fanout, predicate=predicate, visitors=visitors, order=order,
+                estimator=estimator,
+            ),
+        )
+        on_entry = walk.on_entry
+        prefetch = order != "fs"
+        # 先読み中の列挙（子ディレクトリの rel -> タスク）。同時に抱えるのは concurrency の 2 倍まで
+        inflight: Dict[Path, asyncio.Future] = {}
+        limit = self.concurrency * 2
+
+        def fill(pending: Deque[Tuple[object, Path, int]]):
+            while pending and len(inflight) < limit:
+                target = pending.popleft()
+                inflight[target[1]] = asyncio.ensure_future(self._list(loop, walk, target[0]))
+
+        async def enter(target: Tuple[object, Path, int]) -> bool:
+            current, rel_dir, depth = target
+            task = inflight.pop(rel_dir, None)
+            listed = await task if task is not None else await self._list(loop, walk, current)
+            if listed is None:
+                return False
+            walk.entered(rel_dir, depth)
+            visit = walk.visit(current, listed, rel_dir, depth)
+            frames.append((visit, deque(), rel_dir, depth, deque()))
+            return True
+
+        async def pull(frame) -> bool:
+            # 次の VISIT_CHUNK 件を判定して取り込む（使い切っていれば False）
+            visit, batch, _, _, pending = frame
+            chunk = await self._visit(loop, visit)
+            if not chunk:
+                return False
+            batch.extend(chunk)
+            if prefetch:
+                pending.extend(
+                    child for _, child, _ in chunk
+                    if child is not None and (max_depth is None or child[2] <= max_depth)
+                )
+                fill(pending)
+            return True
+
+        # 行きがけ順の深さ優先
+        # （ディレクトリごとに (判定ジェネレータ, 判定済み, rel, depth, 未着手の子) を積む）
+        frames: List[Tuple[Iterator, Deque, Path, int, Deque]] = []
+        try:
+            await enter(walk.start())
+            while frames:
+                if not frames[-1][1] and not await pull(frames[-1]):
+                    _, _, rel_dir, depth, _ = frames.pop()
+                    if walk.stopped():
+                        break
+                    walk.exited(rel_dir, depth)
+                    if frames:
+                        fill(frames[-1][4])
+                    continue
+                item, child, entry = frames[-1][1].popleft()
+
+                # フックは判定結果を消費する側（行きがけ順）で呼ぶ
+                if entry is not None and on_entry:
+                    for hook in on_entry:
+                        hook(item[0], entry, item[1], item[2])
+                if item is not None:
+                    if not walk.holds:
+                        yield item
+                    else:
+                        for out in walk.settle(item):
+                            yield out
+                if child is not None:
+                    if max_depth is not None and child[2] > max_depth:
+                        continue
+                    pending = frames[-1][4]
+                    if pending and pending[0][1] == child[1]:
+                        pending.popleft()
+                    await enter(child)
+        finally:
+            # タスクのキャンセル / aclose() で executor 側の列挙も打ち切る
+            flags.cancel()
+            for task in inflight.values():
+                task.cancel()
+            # 途中の判定ジェネレータを閉じる（executor で実行中のものは止まった後に回収される）
+            for visit, *_ in frames:
+                if not visit.gi_running:
+                    visit.close()
+
+    async def _list(self, loop, walk: _Walk, current):
+        async with self._semaphore():
+            return await loop.run_in_executor(self.executor, walk.list_dir, current)
+
+    async def _visit(self, loop, visit: Iterator):
+        async with self._semaphore():
+            return await loop.run_in_executor(self.executor, _visit_chunk, visit)
+
+    async def collect(self, root: Path, **kwargs) -> List[Tuple[Path, bool, int]]:
+        """iter_paths の結果をリストで返す（レンダラへ渡す用）"""
+        return [item async for item in self.iter_paths(root, **kwargs)]
+
+
+def _visit_chunk(visit: Iterator):
+    """executor 上で判定を VISIT_CHUNK 件まで進める（判定は走査ごとに 1 つずつ。状態を共有するため）"""
+    return list(islice(visit, VISIT_CHUNK))
@@ -0,0 +1,160 @@
+# folderdump/core/archives.py
+"""
+アーカイブ（zip / tar 系）を仮想ディレクトリとして列挙する
+- 展開はしない。zip はセントラルディレクトリを、tar はヘッダを先頭から順に読むだけ
+- アーカイブごとの件数上限（limit）で zip bomb 的な巨大目録から保護する
+- 列挙結果は DirEntry と同じ最小インターフェース（name / path / is_dir / is_symlink）を持つ
+"""
+
+import os
+import struct
+import tarfile
+from typing import Iterator, List, Optional, Tuple
+
+from .ordering import DEFAULT_ORDER, sort_pairs
+
+# 1 アーカイブあたりの既定の列挙上限
+DEFAULT_ARCHIVE_LIMIT = 100_000
+
+ZIP_SUFFIXES = (".zip", ".jar", ".whl")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+def is_archive(name: str) -> bool:
+    """拡張子から対応アーカイブか判定"""
+    n = name.lower()
+    return n.endswith(ZIP_SUFFIXES) or n.endswith(TAR_SUFFIXES)
+
+
+class ArchiveEntry:
+    """
+    アーカイブ内の仮想エントリ（walker からは DirEntry と同様に扱える）
+    - archive 本体を表すルートは load_archive で目録を読むまで loaded = False
+    - truncated は上限超過の有無
+    """
+
+    def __init__(self, name: str, path: str, is_dir: bool, loaded: bool = True):
+        self.name = name
+        self.path = path
+        self._is_dir = is_dir
+        self.children: List["ArchiveEntry"] = []
+        self._index: dict = {}
+        self.loaded = loaded
+        self.truncated = False
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._is_dir
+
+    def is_symlink(self) -> bool:
+        return False
+
+    def child(self, name: str, is_dir: bool) -> "ArchiveEntry":
+        node = self._index.get(name)
+        if node is None:
+            node = ArchiveEntry(name, self.path + "/" + name, is_dir)
+            self._index[name] = node
+            self.children.append(node)
+        elif is_dir:
+            # 先にファイルとして現れた名前が後でディレクトリとして出てきた場合
+            node._is_dir = True
+        return node
+
+
+def _iter_zip_names(f) -> Iterator[str]:
+    """zip のセントラルディレクトリを 1 レコードずつ読み、メンバー名を返す"""
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    tail_start = max(0, size - (65536 + 22))
+    f.seek(tail_start)
+    tail = f.read()
+    pos = tail.rfind(b"PK\x05\x06")
+    if pos < 0 or len(tail) - pos < 22:
+        raise OSError("zip: end of central directory not found")
+    _, _, _, _, n_total, cd_size, cd_offset, _ = struct.unpack("<4s4H2LH", tail[pos:pos + 22])
+    eocd_pos = tail_start + pos
+
+    if n_total == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+        # ZIP64: ロケータから ZIP64 EOCD を読む
+        loc = tail[pos - 20:pos] if pos >= 20 else b""
+        if loc[:4] != b"PK\x06\x07":
+            raise OSError("zip: zip64 locator not found")
+        _, _, eocd64_offset, _ = struct.unpack("<4sLQL", loc)
+        f.seek(eocd64_offset)
+        rec = f.read(56)
+        if rec[:4] != b"PK\x06\x06":
+            raise OSError("zip: zip64 end of central directory not found")
+        _, _, _, _, _, _, _, n_total, cd_size, cd_offset = struct.unpack("<4sQ2H2L4Q", rec)
+        eocd_pos = eocd64_offset
+
+    # 先頭に別データが連結された zip（自己解凍形式など）のずれを補正
+    concat = eocd_pos - cd_size - cd_offset
+    f.seek(cd_offset + max(0, concat))
+    for _ in range(n_total):
+        hdr = f.read(46)
+        if len(hdr) < 46 or hdr[:4] != b"PK\x01\x02":
+            raise OSError("zip: broken central directory")
+        flag_bits = struct.unpack("<H", hdr[8:10])[0]
+        name_len, extra_len, comment_len = struct.unpack("<3H", hdr[28:34])
+        raw = f.read(name_len)
+        f.seek(extra_len + comment_len, os.SEEK_CUR)
+        yield raw.decode("utf-8" if flag_bits & 0x800 else "cp437", errors="replace")
+
+
+def _iter_tar_names(path: str) -> Iterator[str]:
+    """tar をストリームモードで開き、ヘッダ順にメンバー名を返す"""
+    with tarfile.open(path, mode="r|*") as tf:
+        for ti in tf:
+            yield ti.name + ("/" if ti.isdir() else "")
+
+
+def archive_root(path: str, name: str) -> ArchiveEntry:
+    """目録未読のアーカイブルートを作る（実際の読み込みは load_archive）"""
+    return ArchiveEntry(name, path, True, loaded=False)
+
+
+def load_archive(root: ArchiveEntry, limit: Optional[int] = DEFAULT_ARCHIVE_LIMIT) -> ArchiveEntry:
+    """
+    アーカイブの目録を読み、root 配下に仮想ツリーを組み立てる
+    - limit 件を超えたら読むのをやめ、root.truncated = True
+    - 絶対パスや '..' を含むメンバーは無視
+    - 壊れたアーカイブは OSError
+    """
+    if root.loaded:
+        return root
+    root.loaded = True
+    path, name = root.path, root.name
+    try:
+        if name.lower().endswith(ZIP_SUFFIXES):
+            f = open(path, "rb")
+            names = _iter_zip_names(f)
+        else:
+            f = None
+            names = _iter_tar_names(path)
+        try:
+            count = 0
+            for member in names:
+                if limit is not None and count >= limit:
+                    root.truncated = True
+                    break
+                is_dir = member.endswith("/")
+                parts = [p for p in member.replace("\\", "/").split("/") if p and p != "."]
+                if not parts or ".." in parts:
+                    continue
+                node = root
+                for i, part in enumerate(parts):
+                    node = node.child(part, is_dir or i < len(parts) - 1)
+                count += 1
+        finally:
+            names.close()
+            if f is not None:
+                f.close()
+    except (tarfile.TarError, EOFError, struct.error) as e:
+        raise OSError(f"bad archive: {e}") from e
+    return root
+
+
+def sorted_children(
+    node: ArchiveEntry, dirs_first: bool, order: str = DEFAULT_ORDER,
+) -> List[Tuple[ArchiveEntry, bool]]:
+    """walk_sorted と同じ並び順で子エントリを返す（目録にサイズはないため size は名前順）"""
+    return sort_pairs([(e, e.is_dir()) for e in node.children], order, dirs_first)
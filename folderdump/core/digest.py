@@ -0,0 +1,117 @@
+# folderdump/core/digest.py
+"""
+フォルダごとの構造ダイジェスト（Merkle 木）
+- フォルダのダイジェスト = 子を名前順に並べた（種別・名前・子フォルダのダイジェスト）のハッシュ
+  with_stat=True ならファイルのサイズと更新日時（ns）も含める
+- 2 つの走査結果の比較はルートから始め、ダイジェストが異なるフォルダにだけ降りる
+- アイテム列の順序は問わない（行きがけ順でなくてもよい）
+キーはルート相対の parts タプル（ルートは ()）、値は 16 進文字列。
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .utils import win_long
+from .walker import is_marker
+
+Parts = Tuple[str, ...]
+
+# 子の種別（打ち切り・要約マーカーも構造の一部として数える）
+_DIR, _FILE, _MARKER = "d", "f", "m"
+
+
+def _file_meta(path: Path) -> str:
+    """サイズと更新日時（読めなければ '?'）"""
+    try:
+        st = os.lstat(win_long(path))
+    except (OSError, ValueError):
+        return "?"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class DigestTree:
+    """
+    アイテム列から作るフォルダごとのダイジェスト
+    - root: with_stat=True のときにファイルを lstat する基準フォルダ
+    - children: 親 parts -> [(名前, 種別, 子 parts), ...]
+    - digests: フォルダ parts -> ダイジェスト
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Tuple[Path, bool, int]],
+        root: Optional[Path] = None,
+        with_stat: bool = False,
+    ):
+        self.with_stat = with_stat
+        self.children: Dict[Parts, List[Tuple[str, str, Parts]]] = {(): []}
+        self.meta: Dict[Parts, str] = {}
+        for item in items:
+            rel, is_dir, _ = item
+            parts = rel.parts
+            if not parts:
+                continue
+            if is_marker(item):
+                kind = _MARKER
+            elif is_dir:
+                kind = _DIR
+                self.children.setdefault(parts, [])
+            else:
+                kind = _FILE
+                if with_stat and root is not None:
+                    self.meta[parts] = _file_meta(root / rel)
+            self.children.setdefault(parts[:-1], []).append((parts[-1], kind, parts))
+        self.digests: Dict[Parts, str] = {}
+        self._compute()
+
+    def _compute(self):
+        # 深い順に計算すれば子フォルダのダイジェストは常に先に求まっている
+        for parts in sorted(self.children, key=len, reverse=True):
+            h = hashlib.blake2b(digest_size=16)
+            for name, kind, cp in sorted(self.children[parts]):
+                h.update(kind.encode())
+                h.update(b"\0")
+                h.update(name.encode("utf-8", "surrogateescape"))
+                h.update(b"\0")
+                if kind == _DIR:
+                    h.update(self.digests[cp].encode())
+                elif kind == _FILE:
+                    h.update(self.meta.get(cp, "").encode())
+                h.update(b"\n")
+            self.digests[parts] = h.hexdigest()
+
+    def digest(self, rel: Path = Path("")) -> Optional[str]:
+        return self.digests.get(rel.parts)
+
+
+def diff_trees(old: DigestTree, new: DigestTree) -> Iterator[Tuple[str, Path]]:
+    """
+    2 つの走査結果の差分を ("added" | "removed" | "changed", rel) で返す
+    ダイジェストが一致するフォルダの配下は見ない。追加・削除されたフォルダはそのフォルダだけを返す。
+    """
+    stack: List[Parts] = [()]
+    while stack:
+        parts = stack.pop()
+        if old.digests.get(parts) == new.digests.get(parts):
+            continue
+        before = {name: (kind, cp) for name, kind, cp in old.children.get(parts, [])}
+        after = {name: (kind, cp) for name, kind, cp in new.children.get(parts, [])}
+        subdirs: List[Parts] = []
+        for name in sorted(before.keys() | after.keys()):
+            if name not in after:
+                yield "removed", Path(*before[name][1])
+                continue
+            if name not in before:
+                yield "added", Path(*after[name][1])
+                continue
+            (ok, cp), (nk, _) = before[name], after[name]
+            if ok != nk:
+                yield "changed", Path(*cp)
+            elif ok == _DIR:
+                subdirs.append(cp)
+            elif ok == _FILE and old.meta.get(cp) != new.meta.get(cp):
+                yield "changed", Path(*cp)
+        # 名前順に降りる
+        stack.extend(reversed(subdirs))
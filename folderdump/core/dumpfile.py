@@ -0,0 +1,165 @@
+# folderdump/core/dumpfile.py
+"""
+保存済みダンプ（plain / tree / csv / ndjson スナップショット等）を mmap で遅延読み込みする
+- ファイル全体を Python 文字列にはしない。行は要求時に mmap から切り出す
+- 行オフセットは STRIDE 行ごとの疎な索引（数 GB でも索引は数 MB）
+- 索引の構築は別スレッドから build_index で行い、構築済みの行から順に参照できる
+- 検索は mmap 上で直接行う（大文字小文字の区別なしは ASCII のみ）
+"""
+
+import bisect
+import mmap
+import os
+import re
+from array import array
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Optional
+
+# 索引の間隔（この行数ごとに先頭オフセットを保持）
+STRIDE = 256
+# 索引構築 1 回あたりの読み取りサイズ
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class DumpFile:
+    """mmap したダンプファイルと、その疎な行索引"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._f = open(self.path, "rb")
+        self.size = os.fstat(self._f.fileno()).st_size
+        # 空ファイルは mmap できないため None
+        self.mm: Optional[mmap.mmap] = (
+            mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        )
+        self._sparse = array("Q", [0])
+        self.line_count = 0
+        self.indexed_bytes = 0  # 索引済みの範囲（行境界）
+        self.complete = self.size == 0
+        self._last = (-1, 0)  # (直近に読んだ行, その次の行の先頭オフセット)
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- 索引 ----
+    def build_index(
+        self,
+        progress_cb: Optional[Callable[[int, float], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> int:
+        """
+        行索引を構築する（別スレッドから呼んでよい）。
+        progress_cb(索引済み行数, 進捗率) をチャンクごとに呼ぶ。戻り値は総行数。
+        """
+        mm, size = self.mm, self.size
+        pos = 0
+        line_no = 0
+        while pos < size:
+            if should_stop is not None and should_stop():
+                return line_no
+            # チャンク末尾を行境界まで延ばす
+            end = mm.find(b"\n", min(pos + CHUNK_SIZE, size) - 1)
+            end = size if end < 0 else end + 1
+            chunk = mm[pos:end]
+            lens = [len(p) for p in chunk.split(b"\n")]
+            if chunk.endswith(b"\n"):
+                lens.pop()  # 末尾改行の後ろの空要素
+            n = len(lens)
+            prefix = list(accumulate(lens))
+            # 次の STRIDE 境界の行から疎索引に追加
+            k = (-line_no) % STRIDE
+            while k < n:
+                start = pos + (prefix[k - 1] + k if k > 0 else 0)
+                if line_no + k > 0:
+                    self._sparse.append(start)
+                k += STRIDE
+            line_no += n
+            pos = end
+            self.indexed_bytes = pos
+            self.line_count = line_no
+            if progress_cb is not None:
+                progress_cb(line_no, pos / size)
+        self.complete = True
+        return line_no
+
+    def offset_of(self, line: int) -> int:
+        """行番号 -> 先頭バイトオフセット（索引済みの行のみ）"""
+        mm = self.mm
+        last_line, last_next = self._last
+        if line == last_line + 1:
+            return last_next
+        off = self._sparse[line // STRIDE]
+        for _ in range(line % STRIDE):
+            off = mm.find(b"\n", off) + 1
+        return off
+
+    def line(self, line: int) -> str:
+        """1 行を文字列で返す（改行は含まない）"""
+        if self.mm is None or not (0 <= line < self.line_count):
+            return ""
+        off = self.offset_of(line)
+        end = self.mm.find(b"\n", off)
+        if end < 0:
+            end = self.size
+        self._last = (line, end + 1)
+        return self.mm[off:end].decode("utf-8", errors="replace").rstrip("\r")
+
+    def line_of_offset(self, offset: int) -> int:
+        """バイトオフセット -> それを含む行番号"""
+        block = bisect.bisect_right(self._sparse, offset) - 1
+        start = self._sparse[block]
+        # ブロック内は高々 STRIDE 行なので切り出して数える
+        return block * STRIDE + self.mm[start:offset].count(b"\n")
+
+    # ---- 検索 ----
+    def find(
+        self,
+        query: str,
+        from_line: int = -1,
+        forward: bool = True,
+        case_sensitive: bool = False,
+    ) -> Optional[int]:
+        """
+        from_line の次（backward なら前）から query を含む行を探す。見つからなければ折り返す。
+        索引済みの範囲だけが対象。
+        """
+        if self.mm is None or not query or self.line_count == 0:
+            return None
+        pat = re.compile(re.escape(query.encode("utf-8")), 0 if case_sensitive else re.IGNORECASE)
+        limit = self.indexed_bytes
+        if forward:
+            start = self.offset_of(from_line + 1) if 0 <= from_line + 1 < self.line_count else 0
+            m = pat.search(self.mm, start, limit) or pat.search(self.mm, 0, limit)
+            return self.line_of_offset(m.start()) if m else None
+
+        start = self.offset_of(from_line) if 0 <= from_line < self.line_count else limit
+        hit = self._rsearch(pat, 0, start)
+        if hit is None:
+            hit = self._rsearch(pat, start, limit)
+        return self.line_of_offset(hit) if hit is not None else None
+
+    def _rsearch(self, pat: "re.Pattern", lo: int, hi: int) -> Optional[int]:
+        """[lo, hi) 内で最後に一致する位置（末尾側からチャンク単位で探す）"""
+        end = hi
+        overlap = len(pat.pattern)
+        while end > lo:
+            begin = max(lo, end - CHUNK_SIZE)
+            last = None
+            for m in pat.finditer(self.mm, begin, end):
+                last = m.start()
+            if last is not None:
+                return last
+            if begin == lo:
+                break
+            end = begin + overlap
+        return None
@@ -1,7 +1,10 @@
 # folderdump/core/filters.py
 import fnmatch
+import os
+import re
+import time
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 def match_any(name: str, patterns: List[str]) -> bool:
     return any(fnmatch.fnmatch(name, pat) for pat in patterns)
@@ -49,6 +52,49 @@ def read_gitignore(root: Path) -> Tuple[List[str], List[str]]:
         pass
     return (excludes, negates)
 
+def is_excluded(rel_path: Path, excludes: List[str], negates: List[str] | None = None) -> bool:
+    """除外パターンに一致し、否定パターンで打ち消されていないか"""
+    if negates and match_any_path(rel_path, negates):
+        return False
+    return bool(excludes) and match_any_path(rel_path, excludes)
+
+
+def _norm(s: str) -> str:
+    """fnmatch と同じ大文字小文字の扱いにそろえ、区切りは '/' に統一"""
+    return os.path.normcase(s).replace(os.sep, "/")
+
+
+class IncludeScope:
+    """
+    包含（と否定）パターンから「配下に一致しうるディレクトリ」を判定する
+    - '/' を含まないパターンは名前で一致するため、どのディレクトリにも一致しうる
+    - '/' を含むパターンはパス全体で一致する。最初のワイルドカードより前の
+      リテラル部分と前方一致しないディレクトリの配下には一致しない
+      （fnmatch の * は '/' にも一致するので、ワイルドカード以降は何でもありとみなす）
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.anywhere = False
+        self.prefixes: List[Tuple[str, bool]] = []  # (リテラル部分, ワイルドカードあり)
+        for pat in patterns:
+            p = _norm(pat)
+            if "/" not in p:
+                self.anywhere = True
+                continue
+            cut = min((i for i in (p.find("*"), p.find("?"), p.find("[")) if i >= 0), default=-1)
+            self.prefixes.append((p[:cut], True) if cut >= 0 else (p, False))
+
+    def may_contain(self, rel_dir: Path) -> bool:
+        """rel_dir の配下に一致するパスがありうるか"""
+        if self.anywhere or not rel_dir.parts:
+            return True
+        prefix = _norm(rel_dir.as_posix()) + "/"
+        for lit, wild in self.prefixes:
+            if lit.startswith(prefix) or (wild and prefix.startswith(lit)):
+                return True
+        return False
+
+
 def should_keep(
     rel_path: Path,
     is_dir: bool,
@@ -72,3 +118,117 @@ def should_keep(
         return match_any_path(rel_path, includes)
 
     return True
+
+
+# ---- メタデータ条件 ----
+_SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "kb": 1024, "kib": 1024, "m": 1024 ** 2, "mb": 1024 ** 2,
+               "mib": 1024 ** 2, "g": 1024 ** 3, "gb": 1024 ** 3, "gib": 1024 ** 3,
+               "t": 1024 ** 4, "tb": 1024 ** 4, "tib": 1024 ** 4}
+_AGE_UNITS = {"s": 1, "m": 60, "min": 60, "h": 3600, "d": 86400, "w": 7 * 86400, "y": 365 * 86400}
+_OPS = {
+    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b, ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b, "=": lambda a, b: a == b, "!=": lambda a, b: a != b,
+}
+_CMP_TERM = re.compile(r"^(!?)(size|age)(<=|>=|!=|<|>|=)(\d+(?:\.\d+)?)([a-z]*)$", re.I)
+_TYPE_TERM = re.compile(r"^(!?)type=([fdl])$", re.I)
+_EMPTY_TERM = re.compile(r"^(!?)empty$", re.I)
+
+# 評価コスト（安い順に評価し、不一致で打ち切る）
+_COST_TYPE, _COST_STAT, _COST_LIST = 0, 1, 2
+
+
+class Predicate:
+    """
+    メタデータ条件（空白またはカンマ区切りの項をすべて満たすもの。項の先頭 '!' で否定）
+      size>100MB  size<=4k  size=0   ファイルサイズ（B/K/M/G/T、1024 進。フォルダには一致しない）
+      age<7d  age>1y                 更新からの経過時間（s/m/h/d/w/y。age<7d = 7 日以内に更新）
+      type=f / type=d / type=l       ファイル / フォルダ / シンボリックリンク
+      empty                          空のフォルダ・サイズ 0 のファイル
+    DirEntry（と同じインターフェースのもの）で評価する。種別 → stat → 列挙 の順に安い項から調べ、
+    stat は DirEntry のキャッシュを使う。書式が不正なら ValueError。
+    """
+
+    def __init__(self, text: str, now: Optional[float] = None):
+        self.text = text.strip()
+        self.now = time.time() if now is None else now
+        terms = []
+        for tok in re.split(r"[\s,]+", self.text):
+            if not tok:
+                continue
+            m = _CMP_TERM.match(tok)
+            if m:
+                neg, key, op, num, unit = m.groups()
+                units = _SIZE_UNITS if key.lower() == "size" else _AGE_UNITS
+                if unit.lower() not in units:
+                    raise ValueError(f"単位が不正です: {tok}")
+                if key.lower() == "age" and not unit:
+                    raise ValueError(f"経過時間には単位が必要です（s/m/h/d/w/y）: {tok}")
+                value = float(num) * units[unit.lower()]
+                terms.append((_COST_STAT, key.lower(), _OPS[op], value, bool(neg)))
+                continue
+            m = _TYPE_TERM.match(tok)
+            if m:
+                terms.append((_COST_TYPE, "type", None, m.group(2).lower(), bool(m.group(1))))
+                continue
+            m = _EMPTY_TERM.match(tok)
+            if m:
+                terms.append((_COST_LIST, "empty", None, None, bool(m.group(1))))
+                continue
+            raise ValueError(f"条件を解釈できません: {tok}")
+        terms.sort(key=lambda t: t[0])
+        self.terms = terms
+
+    def __bool__(self) -> bool:
+        return bool(self.terms)
+
+    @staticmethod
+    def _stat(entry):
+        stat = getattr(entry, "stat", None)
+        if stat is None:
+            return None
+        try:
+            return stat()
+        except OSError:
+            try:
+                # 壊れたリンクはリンク自体の情報で判定
+                return stat(follow_symlinks=False)
+            except OSError:
+                return None
+
+    @staticmethod
+    def _is_empty_dir(entry) -> bool:
+        children = getattr(entry, "children", None)
+        if children is not None:
+            return not children
+        try:
+            with os.scandir(entry.path) as it:
+                return next(it, None) is None
+        except OSError:
+            return False
+
+    def matches(self, entry, is_dir: bool) -> bool:
+        st = None
+        for _, key, op, value, neg in self.terms:
+            if key == "type":
+                if value == "l":
+                    ok = entry.is_symlink()
+                else:
+                    ok = is_dir == (value == "d")
+            elif key == "empty" and is_dir:
+                ok = self._is_empty_dir(entry)
+            elif key == "size" and is_dir:
+                ok = False
+            else:
+                if st is None:
+                    st = self._stat(entry)
+                if st is None:
+                    ok = False
+                elif key == "size":
+                    ok = op(st.st_size, value)
+                elif key == "age":
+                    ok = op(self.now - st.st_mtime, value)
+                else:  # empty（ファイル）
+                    ok = st.st_size == 0
+            if ok == neg:
+                return False
+        return True
@@ -0,0 +1,247 @@
+# folderdump/core/gitindex.py
+"""
+Git インデックス（.git/index）からの列挙（git コマンド不要）
+- 追跡ファイルの一覧をインデックスから直接読み、ディレクトリは親パスから補う
+- untracked=True なら、追跡ファイルのあるディレクトリだけを scandir して
+  未追跡・非除外のファイル（と未追跡ディレクトリの中身）を加える
+  （除外パターンに一致するディレクトリには入らないため、巨大なビルド成果物を読まない）
+- 並び順は walk_sorted と同じ（dirs_first / name・natural。fs はインデックス順、size は未対応で名前順）
+- 深さ・フィルタ・表示件数上限は listing.filter_stream で iter_paths と同じ規則で適用する
+対応形式: index version 2 / 3 / 4（sparse index のディレクトリ項目も可。分割インデックスは未対応）
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .filters import is_excluded
+from .listing import filter_stream
+from .ordering import DEFAULT_ORDER, name_key
+from .utils import win_long
+from .walker import CtlFlags, ScanBudget, SkipLog, Stats
+
+# エントリのモード（上位ビットで種別を判定）
+_S_IFMT = 0o170000
+_S_IFDIR = 0o040000      # sparse index のディレクトリ項目
+_S_IFGITLINK = 0o160000  # サブモジュール（ディレクトリとして出すが中へは入らない）
+
+_FLAG_EXTENDED = 0x4000
+_NAME_MASK = 0x0FFF
+
+
+def find_git_dir(root: Path) -> Optional[Path]:
+    """root 直下の .git（ディレクトリ、または worktree/サブモジュールの 'gitdir: ...' ファイル）"""
+    dot_git = root / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        try:
+            line = dot_git.read_text(encoding="utf-8", errors="replace").strip()
+        except OSError:
+            return None
+        if line.startswith("gitdir:"):
+            gd = Path(line[len("gitdir:"):].strip())
+            gd = gd if gd.is_absolute() else root / gd
+            return gd if gd.is_dir() else None
+    return None
+
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """index v4 のパス圧縮で使う可変長整数（git の offset varint）"""
+    c = data[pos]
+    pos += 1
+    val = c & 0x7F
+    while c & 0x80:
+        c = data[pos]
+        pos += 1
+        val = ((val + 1) << 7) | (c & 0x7F)
+    return val, pos
+
+
+def read_index(path: Path) -> Iterator[Tuple[str, int]]:
+    """
+    インデックスの (パス, モード) をインデックス順に返す
+    - 競合中（stage 1〜3）の同一パスは 1 件にまとめる
+    - 形式が不正なら ValueError
+    """
+    data = Path(path).read_bytes()
+    if len(data) < 12 or data[:4] != b"DIRC":
+        raise ValueError("not a git index")
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        raise ValueError(f"unsupported git index version: {version}")
+
+    pos = 12
+    prev = b""
+    last = None
+    unpack_mode = struct.Struct(">I").unpack_from
+    unpack_flags = struct.Struct(">H").unpack_from
+    for _ in range(count):
+        mode = unpack_mode(data, pos + 24)[0]
+        flags = unpack_flags(data, pos + 60)[0]
+        p = pos + 62
+        if version >= 3 and flags & _FLAG_EXTENDED:
+            p += 2
+        if version == 4:
+            strip, p = _varint(data, p)
+            end = data.index(b"\0", p)
+            name = prev[:len(prev) - strip] + data[p:end]
+            pos = end + 1
+        else:
+            namelen = flags & _NAME_MASK
+            end = data.index(b"\0", p) if namelen == _NAME_MASK else p + namelen
+            name = data[p:end]
+            # 62 バイト + 名前を 1〜8 個の NUL で 8 の倍数に詰める
+            pos += (end - pos + 8) & ~7
+        if pos > len(data):
+            raise ValueError("truncated git index")
+        prev = name
+        if name == last:
+            continue
+        last = name
+        yield name.decode("utf-8", "surrogateescape"), mode
+
+
+class GitIndexSource:
+    """
+    Git 作業ツリーを .git/index から列挙するソース（ListingReader と同じ使い方）
+    - root: 作業ツリーのルート（.git のあるフォルダ）
+    - untracked: 未追跡・非除外のファイルも加える
+    """
+
+    def __init__(
+        self, root: Path, untracked: bool = False, dirs_first: bool = True,
+        order: str = DEFAULT_ORDER,
+    ):
+        self.root = Path(root)
+        self.untracked = untracked
+        self.dirs_first = dirs_first
+        self.order = order
+        self.git_dir = find_git_dir(self.root)
+        if self.git_dir is None:
+            raise ValueError(f"git リポジトリではありません: {self.root}")
+
+    def _tree(self) -> Dict[str, Dict[str, bool]]:
+        """親パス（'/' 区切り、ルートは ''）-> {名前: is_dir}"""
+        tree: Dict[str, Dict[str, bool]] = {"": {}}
+        for path, mode in read_index(self.git_dir / "index"):
+            kind = mode & _S_IFMT
+            is_dir = kind == _S_IFDIR or kind == _S_IFGITLINK
+            path = path.rstrip("/")
+            parent, _, name = path.rpartition("/")
+            if parent not in tree:
+                # 祖先ディレクトリを補う
+                parts = parent.split("/")
+                for i in range(len(parts)):
+                    up, d = "/".join(parts[:i]), "/".join(parts[:i + 1])
+                    tree.setdefault(up, {})[parts[i]] = True
+                    tree.setdefault(d, {})
+            tree[parent][name] = is_dir
+            if kind == _S_IFDIR:
+                tree.setdefault(path, {})
+        return tree
+
+    def _add_untracked(
+        self, tree: Dict[str, Dict[str, bool]], excludes: List[str], negates: List[str],
+        skiplog: Optional[SkipLog], flags: Optional[CtlFlags],
+    ):
+        """追跡ファイルのあるディレクトリを scandir し、未追跡・非除外のエントリを加える"""
+        queue = list(tree)
+        known: Set[str] = set(queue)
+        while queue:
+            if flags is not None and not flags.checkpoint():
+                return
+            d = queue.pop()
+            children = tree.setdefault(d, {})
+            try:
+                with os.scandir(win_long(self.root / d if d else self.root)) as it:
+                    entries = list(it)
+            except FileNotFoundError:
+                # インデックスにあるが作業ツリーから消えたディレクトリ
+                continue
+            except OSError as e:
+                if skiplog is not None:
+                    skiplog.add(str(self.root / d), f"OSError: {e}")
+                continue
+            for e in entries:
+                if e.name in children or (not d and e.name == ".git"):
+                    continue
+                rel = f"{d}/{e.name}" if d else e.name
+                if is_excluded(Path(rel), excludes, negates):
+                    continue
+                try:
+                    is_dir = e.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                children[e.name] = is_dir
+                if is_dir and rel not in known:
+                    known.add(rel)
+                    tree[rel] = {}
+                    queue.append(rel)
+
+    def records(
+        self,
+        excludes: Optional[List[str]] = None,
+        negates: Optional[List[str]] = None,
+        skiplog: Optional[SkipLog] = None,
+        flags: Optional[CtlFlags] = None,
+    ) -> Iterator[Tuple[Path, bool]]:
+        """ルート相対の (rel, is_dir) を行きがけ順で返す（excludes/negates は未追跡の判定に使う）"""
+        tree = self._tree()
+        if self.untracked:
+            self._add_untracked(tree, excludes or [], negates or [], skiplog, flags)
+
+        nk = name_key(self.order)
+        if self.order == "fs":
+            # インデックス（パスのバイト順）に現れた順のまま
+            def ordered(children):
+                return iter(children.items())
+        else:
+            if self.dirs_first:
+                def key(kv):
+                    return (not kv[1], nk(kv[0]))
+            else:
+                def key(kv):
+                    return nk(kv[0])
+
+            def ordered(children):
+                return iter(sorted(children.items(), key=key))
+
+        stack = [ordered(tree[""])]
+        prefix: List[str] = []
+        while stack:
+            kv = next(stack[-1], None)
+            if kv is None:
+                stack.pop()
+                if prefix:
+                    prefix.pop()
+                continue
+            name, is_dir = kv
+            rel = prefix + [name]
+            yield Path(*rel), is_dir
+            sub = tree.get("/".join(rel)) if is_dir else None
+            if sub:
+                stack.append(ordered(sub))
+                prefix.append(name)
+
+    def iter_paths(
+        self,
+        max_depth: Optional[int],
+        includes: List[str],
+        excludes: List[str],
+        folders_only: bool,
+        flags: CtlFlags,
+        skiplog: SkipLog,
+        stats: Stats,
+        progress_cb=None,
+        negates: List[str] | None = None,
+        budget: Optional[ScanBudget] = None,
+        max_fanout: Optional[int] = None,
+    ) -> Iterator[Tuple[Path, bool, int]]:
+        """iter_paths と同じ出力をインデックスから生成する"""
+        return filter_stream(
+            self.records(excludes, negates, skiplog, flags), max_depth, includes, excludes,
+            folders_only, flags, stats, progress_cb=progress_cb, negates=negates, budget=budget,
+            max_fanout=max_fanout,
+        )
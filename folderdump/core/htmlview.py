@@ -0,0 +1,265 @@
+# folderdump/core/htmlview.py
+"""
+HTML エクスプローラ出力（html フォーマット）
+- 1 ファイルで完結するオフライン用ページ（折りたたみツリー + ページ内検索）
+- ノードのデータは圧縮チャンク（zlib + base64 の <script type="application/x-folderdump-chunk">）に分け、
+  フォルダを開いたときに初めてブラウザ側で展開する（巨大な DOM を最初に作らない）
+- アイテム列を 1 回なめるだけで書き出す。保持するのは未出力のチャンク 1 つと、
+  開いているフォルダのスタック、フォルダ ID -> チャンク ID の索引（フォルダ数ぶん）だけ
+- 同じフォルダの直下が連続して現れればよい（行きがけ順のほか ls -lR の順でも可）
+チャンクの中身: {"フォルダ ID": [[名前, 種別(0=ファイル/1=フォルダ/2=マーカー), 子フォルダ ID], ...], ...}
+"""
+
+import base64
+import html
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from .walker import is_marker
+
+# 1 チャンクあたりのエントリ数（複数フォルダの直下をまとめて 1 チャンクにする）
+DEFAULT_CHUNK_SIZE = 2000
+
+_FILE, _DIR, _MARKER = 0, 1, 2
+
+_STYLE = """
+body { font: 13px/1.5 system-ui, sans-serif; margin: 0; }
+header {
+  position: sticky; top: 0; background: #f6f8fa; border-bottom: 1px solid #ddd; padding: 6px 10px;
+}
+header input { width: 24em; }
+#info { color: #666; margin-left: 1em; }
+main { padding: 6px 10px; }
+ul { list-style: none; margin: 0; padding-left: 1.2em; }
+#tree > ul { padding-left: 0; }
+li > span { cursor: default; white-space: pre; }
+li.d > span { cursor: pointer; font-weight: 600; }
+li.d > span::before { content: "\\25B8 "; color: #888; }
+li.d.open > span::before { content: "\\25BE "; }
+li.m > span { color: #888; font-style: italic; }
+button.more { margin: 2px 0 2px 1.2em; }
+#results li { white-space: pre; }
+"""
+
+_SCRIPT = r"""
+const PAGE = 1000, MAX_HITS = 1000;
+const decoded = new Map();
+async function chunk(cid) {
+  if (decoded.has(cid)) return decoded.get(cid);
+  const b64 = document.getElementById("c" + cid).textContent;
+  const bin = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+  const stream = new Blob([bin]).stream().pipeThrough(new DecompressionStream("deflate"));
+  const data = JSON.parse(await new Response(stream).text());
+  decoded.set(cid, data);
+  return data;
+}
+async function children(id) {
+  let out = [];
+  for (const cid of DIRS[id]) {
+    const part = (await chunk(cid))[id];
+    if (part) out = out.concat(part);
+  }
+  return out;
+}
+function node(name, kind, id) {
+  const li = document.createElement("li");
+  const label = document.createElement("span");
+  label.textContent = kind === 1 ? name + "/" : name;
+  li.appendChild(label);
+  if (kind === 1) {
+    li.className = "d";
+    label.onclick = () => toggle(li, id);
+  } else if (kind === 2) {
+    li.className = "m";
+  }
+  return li;
+}
+function fill(ul, entries, start) {
+  const end = Math.min(entries.length, start + PAGE);
+  for (let i = start; i < end; i++) ul.appendChild(node(...entries[i]));
+  if (end < entries.length) {
+    const more = document.createElement("button");
+    more.className = "more";
+    more.textContent = `… さらに表示（残り ${(entries.length - end).toLocaleString()} 件）`;
+    more.onclick = () => { more.remove(); fill(ul, entries, end); };
+    ul.appendChild(more);
+  }
+}
+async function toggle(li, id) {
+  let ul = li.querySelector(":scope > ul");
+  if (!ul) {
+    ul = document.createElement("ul");
+    li.appendChild(ul);
+    fill(ul, await children(id), 0);
+  } else {
+    ul.hidden = !ul.hidden;
+  }
+  li.classList.toggle("open", !ul.hidden);
+}
+async function search(q) {
+  const results = document.getElementById("results");
+  const tree = document.getElementById("tree");
+  results.textContent = "";
+  if (!q) { results.hidden = true; tree.hidden = false; return; }
+  tree.hidden = true; results.hidden = false;
+  const needle = q.toLowerCase(), list = document.createElement("ul");
+  results.appendChild(list);
+  let hits = 0;
+  const queue = ROOTS.map(([name, id]) => [name, id]);
+  while (queue.length && hits < MAX_HITS) {
+    const [prefix, id] = queue.shift();
+    for (const [name, kind, child] of await children(id)) {
+      const path = prefix + "/" + name;
+      if (kind !== 2 && name.toLowerCase().includes(needle)) {
+        const li = document.createElement("li");
+        li.textContent = kind === 1 ? path + "/" : path;
+        list.appendChild(li);
+        if (++hits >= MAX_HITS) break;
+      }
+      if (kind === 1) queue.push([path, child]);
+    }
+    document.getElementById("info").textContent = `${hits.toLocaleString()} 件一致`;
+  }
+  if (hits >= MAX_HITS) {
+    document.getElementById("info").textContent = `先頭 ${MAX_HITS.toLocaleString()} 件を表示`;
+  }
+}
+const rootList = document.createElement("ul");
+for (const [name, id] of ROOTS) rootList.appendChild(node(name, 1, id));
+document.getElementById("tree").appendChild(rootList);
+if (ROOTS.length === 1) toggle(rootList.firstChild, ROOTS[0][1]);
+document.getElementById("info").textContent = `${TOTAL.toLocaleString()} 件`;
+document.getElementById("q").addEventListener("keydown", e => {
+  if (e.key === "Enter") search(e.target.value.trim());
+});
+"""
+
+
+def _js(value) -> str:
+    """<script> 内に埋め込む JSON（</script> で閉じられないようにする）"""
+    return json.dumps(value, separators=(",", ":")).replace("</", "<\\/")
+
+
+class HtmlWriter:
+    """
+    HTML エクスプローラを out へ逐次書き出す
+    - add_root をルートごとに呼び、最後に close() で索引とスクリプトを書いて閉じる
+    """
+
+    def __init__(
+        self, out: TextIO, title: str = "folderdump", chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.out = out
+        self.title = title
+        self.chunk_size = max(1, chunk_size)
+        self.total = 0
+        # フォルダ ID -> そのフォルダの直下を含むチャンク ID（出現順）
+        self.dirs: List[List[int]] = []
+        self.roots: List[Tuple[str, int]] = []
+        self._buf: Dict[int, List[list]] = {}
+        self._buf_n = 0
+        self._chunks = 0
+        self._started = False
+
+    def _start(self):
+        if self._started:
+            return
+        self._started = True
+        title = html.escape(self.title)
+        self.out.write(
+            "<!DOCTYPE html>\n<html lang=\"ja\">\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{title}</title>\n<style>{_STYLE}</style>\n</head>\n<body>\n"
+            "<header><input id=\"q\" type=\"search\" placeholder=\"名前で検索（Enter）\">"
+            "<span id=\"info\"></span></header>\n"
+            "<main><div id=\"tree\"></div><div id=\"results\" hidden></div></main>\n"
+        )
+
+    def _new_dir(self) -> int:
+        self.dirs.append([])
+        return len(self.dirs) - 1
+
+    def _add(self, dir_id: int, entry: list):
+        self._buf.setdefault(dir_id, []).append(entry)
+        self._buf_n += 1
+        if self._buf_n >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buf:
+            return
+        cid = self._chunks
+        self._chunks += 1
+        # \uXXXX エスケープにして ASCII で圧縮する（デコードできない名前でも壊れない）
+        payload = json.dumps(self._buf, separators=(",", ":")).encode("ascii")
+        data = base64.b64encode(zlib.compress(payload, 6)).decode("ascii")
+        self.out.write(
+            f"<script type=\"application/x-folderdump-chunk\" id=\"c{cid}\">{data}</script>\n"
+        )
+        for dir_id in self._buf:
+            self.dirs[dir_id].append(cid)
+        self._buf = {}
+        self._buf_n = 0
+
+    def add_root(self, root: Path, items: Iterable[Tuple[Path, bool, int]]) -> int:
+        """1 ルート分を書き出す。戻り値は書き出したエントリ数（マーカーを除く）"""
+        self._start()
+        root_id = self._new_dir()
+        self.roots.append((str(root), root_id))
+        # 開いているフォルダ [(parts, ID), ...] と、見つけたがまだ直下が現れていないフォルダ
+        stack: List[Tuple[Tuple[str, ...], int]] = [((), root_id)]
+        unopened: Dict[Tuple[str, ...], int] = {}
+        count = 0
+        for item in items:
+            rel, is_dir, _ = item
+            parts = rel.parts
+            if not parts:
+                continue
+            parent = parts[:-1]
+            while len(stack) > 1 and stack[-1][0] != parent[:len(stack[-1][0])]:
+                stack.pop()
+            if stack[-1][0] != parent:
+                pid = unopened.pop(parent, None)
+                if pid is None:
+                    # 親が出力されていない（通常は起きない）ときはルート直下に補う
+                    pid = self._new_dir()
+                    self._add(root_id, ["/".join(parent), _DIR, pid])
+                stack.append((parent, pid))
+                parent_id = pid
+            else:
+                parent_id = stack[-1][1]
+            if is_marker(item):
+                self._add(parent_id, [parts[-1], _MARKER, -1])
+                continue
+            if is_dir:
+                child = self._new_dir()
+                unopened[parts] = child
+                self._add(parent_id, [parts[-1], _DIR, child])
+            else:
+                self._add(parent_id, [parts[-1], _FILE, -1])
+            count += 1
+        self.total += count
+        return count
+
+    def close(self):
+        self._start()
+        self._flush()
+        self.out.write(
+            f"<script>\nconst DIRS = {_js(self.dirs)};\nconst ROOTS = {_js(self.roots)};\n"
+            f"const TOTAL = {self.total};\n{_SCRIPT}</script>\n</body>\n</html>\n"
+        )
+
+
+def write_html(
+    out: TextIO,
+    root: Path,
+    items: Iterable[Tuple[Path, bool, int]],
+    title: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """1 ルート分の HTML エクスプローラを書き出す。戻り値は書き出したエントリ数"""
+    writer = HtmlWriter(out, title=title or f"folderdump: {root}", chunk_size=chunk_size)
+    count = writer.add_root(root, items)
+    writer.close()
+    return count
@@ -0,0 +1,696 @@
+# folderdump/core/job.py
+"""
+走査ジョブ（GUI のワーカーとヘッドレス CLI の共通部分。Qt には依存しない）
+- 走査条件（深さ・フィルタ・リンク・予算など）を 1 か所にまとめる
+- フォーマット名からの描画（render_format）
+- 1 回の走査から複数フォーマットへ出力（ルートごとに 1 回だけ走査し、
+  結果のアイテム列を各レンダラへ配る。描画と書き込みはスレッドプールで並行実行）
+"""
+
+import itertools
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from .digest import DigestTree
+from .filters import Predicate, read_gitignore
+from .htmlview import HtmlWriter, write_html
+from .gitindex import GitIndexSource, find_git_dir
+from .listing import ListingReader, filter_stream
+from .ordering import DEFAULT_ORDER, check_order
+from .scan_cache import CachedScan, ScanCache
+from .shard import ShardSpec, write_manifest, write_shards
+from .renderer import (
+    render_plain, render_tree, render_markdown,
+    render_json, render_csv, render_dot,
+    write_ndjson, write_json_stream,
+)
+from .summary import write_summary
+from .walker import (
+    iter_paths, is_marker, CtlFlags, Marker, ProgressEstimator, ScanBudget, SkipLog, Stats, Visitor,
+)
+
+FORMATS = (
+    "plain", "tree", "markdown", "json", "json-stream", "csv", "dot", "ndjson",
+    "summary", "summary-json", "html",
+)
+
+# アイテム列を 1 件ずつ集計するだけで、リスト化せずに書き出せる概要フォーマット
+SUMMARY_FORMATS = ("summary", "summary-json")
+
+# 走査結果をリスト化せずに書き出せるフォーマット（JobOutput.streams）
+STREAM_FORMATS = ("ndjson", "json-stream", "html") + SUMMARY_FORMATS
+
+# フォルダのダイジェストを出力できるフォーマット
+DIGEST_FORMATS = ("csv", "json", "json-stream", "ndjson")
+
+# DOT 出力の既定上限（Graphviz がレイアウトできる数千ノード規模に収める）
+DOT_LIMITS = dict(max_fanout=100, collapse_over=2000, max_nodes=3000, cluster_depth=1)
+
+Item = Tuple[Path, bool, int]
+
+
+class ScanKey(NamedTuple):
+    """DumpJob.scan_key の戻り値（走査結果を左右する条件。キャッシュのキーとして比較・ハッシュする）"""
+
+    root: str
+    listing: Optional[str]
+    depth: Optional[int]
+    follow_symlinks: bool
+    follow_outside: bool
+    dirs_first: bool
+    includes: Tuple[str, ...]
+    excludes: Tuple[str, ...]
+    folders_only: bool
+    use_gitignore: bool
+    archives: bool
+    max_fanout: Optional[int]
+    git_index: bool
+    git_untracked: bool
+    predicate: Optional[str]
+    order: str
+    budget: Optional[Tuple]
+
+
+def render_format(
+    fmt: str, root: Path, items: List[Item], absolute: bool = False,
+    digests: Optional[Dict[Tuple[str, ...], str]] = None,
+) -> str:
+    """収集済みアイテムを出力フォーマットに変換（未知指定は plain 扱い。digests は DIGEST_FORMATS のみ）"""
+    if fmt == "tree":
+        return render_tree(items)
+    if fmt == "markdown":
+        # tree をコードブロック化
+        return render_markdown(render_tree(items))
+    if fmt in ("json", "json-stream"):
+        return render_json(items, digests=digests)
+    if fmt == "csv":
+        return render_csv(root, items, digests=digests)
+    if fmt == "dot":
+        return render_dot(items, **DOT_LIMITS)
+    if fmt == "ndjson":
+        buf = StringIO()
+        write_ndjson(buf, root, items, absolute=absolute, digests=digests)
+        return buf.getvalue()
+    if fmt in SUMMARY_FORMATS:
+        buf = StringIO()
+        write_summary(buf, root, items, as_json=(fmt == "summary-json"))
+        return buf.getvalue()
+    if fmt == "html":
+        buf = StringIO()
+        write_html(buf, root, items)
+        return buf.getvalue()
+    return render_plain(root, items, absolute=absolute)
+
+
+def root_separator(fmt: str) -> str:
+    """複数ルートの出力の区切り（NDJSON は空行を挟むと不正になるためなし。HTML は 1 ページにまとめる）"""
+    return "" if fmt in ("ndjson", "html") else "\n\n"
+
+
+def subtree(items: List[Item], prefix: Tuple[str, ...]) -> List[Item]:
+    """
+    ルート相対 prefix 配下のアイテムを、prefix をルートとした相対パス・深さに付け替えて返す
+    （prefix が空ならそのまま返す。マーカーは付け替えたマーカーにする）
+    """
+    k = len(prefix)
+    if not k:
+        return items
+    out: List[Item] = []
+    for item in items:
+        parts = item[0].parts
+        if len(parts) <= k or parts[:k] != prefix:
+            continue
+        if is_marker(item):
+            out.append(Marker(Path(*parts[k:-1]), item[2] - k, item.label))
+        else:
+            out.append((Path(*parts[k:]), item[1], item[2] - k))
+    return out
+
+
+def last_uses(plan: List[Tuple[int, Tuple[str, ...]]]) -> Dict[int, int]:
+    """走査するルートの位置 -> その結果を最後に使うルートの位置（共有結果を手放す目安）"""
+    last: Dict[int, int] = {}
+    for i, (src, _) in enumerate(plan):
+        last[src] = i
+    return last
+
+
+class JobOutput:
+    """
+    出力先 1 件
+    - dest が None ならメモリ上に書き、text で受け取る
+    - count（出力件数）は書き込み後に設定
+    """
+
+    def __init__(self, fmt: str, dest: Optional[str | Path] = None):
+        self.fmt = (fmt or "plain").lower()
+        self.dest = Path(dest) if dest else None
+        self.count = 0
+        self._out: Optional[TextIO] = None
+        self._roots = 0
+        self._html: Optional[HtmlWriter] = None
+        self.text: Optional[str] = None
+
+    def open(self):
+        if self.dest is not None:
+            self.dest.parent.mkdir(parents=True, exist_ok=True)
+            self._out = open(self.dest, "w", encoding="utf-8", newline="")
+        else:
+            self._out = StringIO()
+        self._roots = 0
+
+    def close(self):
+        if self._out is None:
+            return
+        if self._html is not None:
+            self._html.close()
+            self._html = None
+        if self.dest is None:
+            self.text = self._out.getvalue()
+        self._out.close()
+        self._out = None
+
+    def streams(self, preordered: bool) -> bool:
+        """
+        走査中のエントリ列をリスト化せずにそのまま書き出せるか（ダイジェストなしの場合）
+        json-stream は行きがけ順の列でだけ逐次書き出せる
+        """
+        if self.fmt == "json-stream":
+            return preordered
+        return self.fmt in STREAM_FORMATS
+
+    def write_root(
+        self, root: Path, items: List[Item], absolute: bool, preordered: bool,
+        digests: Optional[Dict[Tuple[str, ...], str]] = None,
+    ) -> int:
+        """
+        1 ルート分を書き込み、書き込んだ件数を返す
+        （ストリーミング系はアイテム列から直接書き出す。streams() なら items はイテレータでもよい）
+        """
+        out = self._out
+        if self._roots:
+            out.write(root_separator(self.fmt))
+        self._roots += 1
+        if self.fmt == "ndjson":
+            n = write_ndjson(out, root, items, absolute=absolute, digests=digests)
+        elif self.fmt == "json-stream" and preordered and digests is None:
+            n = write_json_stream(out, items)
+        elif self.fmt in SUMMARY_FORMATS:
+            n = write_summary(out, root, items, as_json=(self.fmt == "summary-json"))
+        elif self.fmt == "html":
+            # 全ルートを 1 ページにまとめる（close() で索引とスクリプトを書く）
+            if self._html is None:
+                self._html = HtmlWriter(out)
+            n = self._html.add_root(root, items)
+        else:
+            out.write(render_format(self.fmt, root, items, absolute=absolute, digests=digests))
+            n = sum(1 for it in items if not is_marker(it))
+        self.count += n
+        return n
+
+
+class ShardOutput(JobOutput):
+    """
+    シャード分割の出力先（dest を基準名としてルートごとにシャードを書き出す）
+    - tagged=True ならルートの位置をシャード名に入れる（複数ルート用）
+    - close() でマニフェストを書き、text にその内容を設定（書き出したルートがなければ何もしない）
+    """
+
+    def __init__(self, fmt: str, dest: str | Path, spec: ShardSpec, tagged: bool = False):
+        super().__init__(fmt, dest)
+        self.spec = spec
+        self.tagged = tagged
+        self._shard_roots: List[Dict] = []
+
+    def streams(self, preordered: bool) -> bool:
+        return False
+
+    def open(self):
+        self._shard_roots = []
+        self._roots = 0
+
+    def close(self):
+        if not self._shard_roots:
+            return
+        path = write_manifest(self.dest, self.fmt, self.spec, self._shard_roots)
+        self.text = path.read_text(encoding="utf-8")
+
+    def write_root(
+        self, root: Path, items: List[Item], absolute: bool, preordered: bool,
+        digests: Optional[Dict[Tuple[str, ...], str]] = None,
+    ) -> int:
+        tag = f"r{self._roots}" if self.tagged else ""
+        self._roots += 1
+        shards = write_shards(
+            items, root, self.dest, self.fmt,
+            lambda r, chunk: render_format(self.fmt, r, chunk, absolute=absolute, digests=digests),
+            self.spec, tag=tag, absolute=absolute,
+        )
+        self._shard_roots.append({"root": str(root), "shards": shards})
+        n = sum(1 for it in items if not is_marker(it))
+        self.count += n
+        return n
+
+
+class DumpJob:
+    """
+    走査条件を保持し、ルートごとのエントリ列を開く／複数フォーマットへ書き出す
+    - listing_format 指定時は roots をリスティングファイルとして読む
+    - flags は省略時に新規作成（キャンセルは flags.cancel()）
+    - git_index=True なら git 作業ツリーは .git/index から列挙（git_untracked で未追跡も加える）
+    - digests=True なら csv/json/ndjson にフォルダのダイジェストを出力（digest_stat でサイズ・更新日時も含める）
+    - predicate はメタデータ条件（文字列または Predicate。書式が不正なら ValueError）
+      フォルダ走査でのみ評価する（stat を持たないリスティングでは無視し、git_index 指定時も走査に切り替える）
+    - visitors は走査フック（walker.Visitor）。フォルダ走査でのみ呼ばれる（リスティング・git インデックスでは呼ばない）
+    - order は直下の並び順（ordering.ORDERS）。リスティングは記録順のまま。size はインデックスにサイズがないため
+      git_index 指定時も走査に切り替える
+    - estimate=True ならフォルダ走査中に総件数を推定し、progress() で全ルートを通した進捗率と残り時間を返す
+    - 同じディレクトリ・入れ子のルートは 1 回だけ走査する（root_plan / subtree）
+    - cached_scan / run(cache=...) は走査結果を ScanCache に保存し、同じ条件の次回は再走査しない
+    """
+
+    def __init__(
+        self,
+        roots: List[str | Path],
+        depth: Optional[int] = None,
+        absolute: bool = False,
+        follow_symlinks: bool = False,
+        dirs_first: bool = True,
+        include_patterns: Optional[List[str]] = None,
+        exclude_patterns: Optional[List[str]] = None,
+        folders_only: bool = False,
+        use_gitignore: bool = False,
+        flags: Optional[CtlFlags] = None,
+        budget: Optional[ScanBudget] = None,
+        follow_outside: bool = False,
+        scan_archives: bool = False,
+        listing_format: Optional[str] = None,
+        max_fanout: Optional[int] = None,
+        git_index: bool = False,
+        git_untracked: bool = False,
+        digests: bool = False,
+        digest_stat: bool = False,
+        predicate: Optional[str | Predicate] = None,
+        visitors: Optional[List[Visitor]] = None,
+        order: str = DEFAULT_ORDER,
+        estimate: bool = False,
+    ):
+        self.roots = [Path(r) for r in roots]
+        self.depth = depth
+        self.absolute = absolute
+        self.follow_symlinks = follow_symlinks
+        self.dirs_first = dirs_first
+        self.includes = include_patterns or []
+        self.excludes = exclude_patterns or []
+        self.folders_only = folders_only
+        self.use_gitignore = use_gitignore
+        self.flags = flags if flags is not None else CtlFlags()
+        # 予算は全ルートで共有（None なら無制限）
+        self.budget = budget
+        self.follow_outside = follow_outside
+        self.scan_archives = scan_archives
+        self.listing_format = listing_format
+        self.max_fanout = max_fanout
+        self.git_index = git_index
+        self.git_untracked = git_untracked
+        self.digests = digests
+        self.digest_stat = digest_stat
+        if isinstance(predicate, str):
+            predicate = Predicate(predicate)
+        self.predicate = predicate or None
+        self.visitors = visitors
+        self.order = check_order(order)
+        self.estimate = estimate
+        # 走査中のルートの推定器（リスティング・git インデックスでは None）
+        self.estimator: Optional[ProgressEstimator] = None
+        self._root_pos = 0
+        self._started: Optional[float] = None
+
+    def scan_key(self, root: Path) -> ScanKey:
+        """走査結果を左右する条件のキー（フォーマット・絶対パス等の描画条件は含まない）"""
+        b = self.budget
+        return ScanKey(
+            str(Path(root).resolve()), self.listing_format, self.depth,
+            self.follow_symlinks, self.follow_outside, self.dirs_first,
+            tuple(self.includes), tuple(self.excludes), self.folders_only, self.use_gitignore,
+            self.scan_archives, self.max_fanout, self.git_index, self.git_untracked,
+            None if self.predicate is None else self.predicate.text, self.order,
+            None if b is None else (b.max_entries, b.max_seconds, b.max_per_dir),
+        )
+
+    def scan_options(self) -> Dict:
+        """
+        scan_key に含まれる走査条件を DumpJob のキーワード引数として返す（JSON にできる値のみ。
+        predicate は条件式、budget は ScanBudget の引数の辞書）
+        """
+        b = self.budget
+        return dict(
+            depth=self.depth, follow_symlinks=self.follow_symlinks,
+            follow_outside=self.follow_outside, dirs_first=self.dirs_first,
+            include_patterns=list(self.includes), exclude_patterns=list(self.excludes),
+            folders_only=self.folders_only, use_gitignore=self.use_gitignore,
+            scan_archives=self.scan_archives,
+            listing_format=self.listing_format, max_fanout=self.max_fanout,
+            git_index=self.git_index, git_untracked=self.git_untracked,
+            predicate=None if self.predicate is None else self.predicate.text, order=self.order,
+            budget=None if b is None else dict(
+                max_entries=b.max_entries, max_seconds=b.max_seconds, max_per_dir=b.max_per_dir,
+            ),
+        )
+
+    def cached_scan(
+        self, root: Path, cache: ScanCache, progress_cb=None, from_cache: bool = True,
+    ) -> CachedScan:
+        """
+        キャッシュ済みならその走査結果を、なければ走査してキャッシュに保存した結果を返す
+        （from_cache=False なら常に走査し直す。キャンセル/予算切れで途中までの結果は保存しない）
+        """
+        key = self.scan_key(root)
+        if from_cache:
+            scan = cache.get(key)
+            if scan is not None:
+                return scan
+        stats = Stats()
+        skiplog = SkipLog()
+        shown_root, entries = self.open_entries(root, skiplog, stats, progress_cb)
+        scan = CachedScan(shown_root, list(entries), stats, skiplog)
+        stats.stop()
+        if not self.stopped():
+            cache.put(key, scan)
+        return scan
+
+    # ---- ルートの重複 ----
+    def nested_reuse_ok(self) -> bool:
+        """
+        入れ子のルートを祖先のルートの走査結果から切り出してよいか
+        （ルートからの相対パス・深さで結果が変わる条件、リンク追跡の訪問記録、共有予算がないとき）
+        """
+        return (
+            self.depth is None and not self.includes and not self.excludes
+            and not self.use_gitignore and self.max_fanout is None and not self.follow_symlinks
+            and not self.git_index
+            and self.budget is None
+        )
+
+    def root_plan(self) -> List[Tuple[int, Tuple[str, ...]]]:
+        """
+        ルートごとに (走査するルートの位置, そのルートから見た相対 parts) を返す
+        - (st_dev, st_ino) が同じディレクトリ（リンク・バインドマウント経由を含む）は先に現れたルートの結果を使う
+        - 入れ子のルートは、実パスの祖先に (st_dev, st_ino) が一致するルートがあればその結果から切り出す
+          （nested_reuse_ok() のときだけ）
+        自分自身を走査するルートは (自分の位置, ())。リスティングは対象外
+        """
+        n = len(self.roots)
+        plan: List[Tuple[int, Tuple[str, ...]]] = [(i, ()) for i in range(n)]
+        if self.listing_format or n < 2:
+            return plan
+        ids: List[Optional[Tuple[int, int]]] = []
+        first: Dict[Tuple[int, int], int] = {}
+        for i, r in enumerate(self.roots):
+            try:
+                st = os.stat(r)
+            except OSError:
+                ids.append(None)
+                continue
+            key = (st.st_dev, st.st_ino)
+            ids.append(key)
+            if key in first:
+                plan[i] = (first[key], ())
+            else:
+                first[key] = i
+
+        if self.nested_reuse_ok():
+            for i, r in enumerate(self.roots):
+                if ids[i] is None or plan[i][0] != i:
+                    continue
+                real = Path(os.path.realpath(r))
+                for k, anc in enumerate(real.parents, 1):
+                    try:
+                        st = os.stat(anc)
+                    except OSError:
+                        break
+                    j = first.get((st.st_dev, st.st_ino))
+                    if j is not None:
+                        plan[i] = (j, real.parts[-k:])
+                        break
+            # 祖先のルート自体が切り出しの場合はさらに上へたどる
+            for i in range(n):
+                src, prefix = plan[i]
+                while plan[src][0] != src:
+                    src, prefix = plan[src][0], plan[src][1] + prefix
+                plan[i] = (src, prefix)
+        return plan
+
+    # ---- エントリ列 ----
+    def check_root(self, root: Path) -> Optional[str]:
+        """ルートが使えなければエラーメッセージを返す"""
+        if self.listing_format:
+            if not root.is_file():
+                return f"リストファイルが見つかりません: {root}"
+        elif (not root.exists()) or (not root.is_dir()):
+            return f"フォルダが見つかりません: {root}"
+        return None
+
+    def open_entries(
+        self, root: Path, skiplog: SkipLog, stats: Stats, progress_cb=None,
+    ) -> Tuple[Path, Iterator[Item]]:
+        """(出力上のルート, エントリ列) を返す"""
+        self.estimator = None
+        self._root_pos = next((i for i, r in enumerate(self.roots) if r == root), self._root_pos)
+        if self._started is None:
+            self._started = time.monotonic()
+        if self.listing_format:
+            return self.open_listing(root, skiplog, stats, progress_cb)
+        return root, self.open_walk(root, skiplog, stats, progress_cb)
+
+    def open_walk(self, root: Path, skiplog: SkipLog, stats: Stats, progress_cb=None):
+        """フォルダ走査のエントリ列を返す"""
+        # 除外パターンの合成（.gitignore 簡易対応）
+        excludes = list(self.excludes)
+        if self.use_gitignore:
+            ex2, neg = read_gitignore(root)
+            excludes.extend(ex2)
+        else:
+            neg = []
+
+        # メタデータ条件は DirEntry の stat で評価するため、インデックス列挙では使えない
+        if (
+            self.git_index and self.predicate is None and self.order != "size"
+            and find_git_dir(root) is not None
+        ):
+            entries = self.open_git(root, excludes, neg, skiplog, stats, progress_cb)
+            if entries is not None:
+                return entries
+
+        self.estimator = ProgressEstimator() if self.estimate else None
+        return iter_paths(
+            root=root,
+            max_depth=self.depth,
+            follow_symlinks=self.follow_symlinks,
+            includes=self.includes,
+            excludes=excludes,
+            dirs_first=self.dirs_first,
+            folders_only=self.folders_only,
+            flags=self.flags,
+            skiplog=skiplog,
+            stats=stats,
+            progress_cb=progress_cb,
+            negates=neg,
+            budget=self.budget,
+            follow_outside=self.follow_outside,
+            archives=self.scan_archives,
+            max_fanout=self.max_fanout,
+            predicate=self.predicate,
+            visitors=self.visitors,
+            order=self.order,
+            estimator=self.estimator,
+        )
+
+    def open_git(
+        self, root: Path, excludes: List[str], negates: List[str], skiplog: SkipLog, stats: Stats,
+        progress_cb=None,
+    ):
+        """
+        .git/index からのエントリ列を返す（インデックスを読めなければ SkipLog に残して None）
+        アーカイブ展開・リンク追跡は行わない（インデックスにある追跡対象のみ）
+        """
+        source = GitIndexSource(
+            root, untracked=self.git_untracked, dirs_first=self.dirs_first, order=self.order,
+        )
+        try:
+            records = source.records(excludes, negates, skiplog, self.flags)
+            first = next(records, None)
+        except (OSError, ValueError, struct.error) as e:
+            skiplog.add(str(source.git_dir / "index"), f"git index: {e}")
+            return None
+        if first is None:
+            records = iter(())
+        else:
+            records = itertools.chain([first], records)
+        return filter_stream(
+            records, self.depth, self.includes, excludes, self.folders_only, self.flags, stats,
+            progress_cb=progress_cb, negates=negates, budget=self.budget,
+            max_fanout=self.max_fanout,
+        )
+
+    def open_listing(self, path: Path, skiplog: SkipLog, stats: Stats, progress_cb=None):
+        """
+        リスティングのエントリ列を返す。
+        記録上のルートは先頭レコードで確定するため、1 件先読みしてから (ルート, エントリ列) を返す。
+        """
+        reader = ListingReader(path, fmt=self.listing_format)
+        entries = reader.iter_paths(
+            max_depth=self.depth,
+            includes=self.includes,
+            excludes=self.excludes,
+            folders_only=self.folders_only,
+            flags=self.flags,
+            skiplog=skiplog,
+            stats=stats,
+            progress_cb=progress_cb,
+            budget=self.budget,
+            max_fanout=self.max_fanout,
+        )
+        first = next(entries, None)
+        if first is None:
+            return reader.root, iter(())
+        return reader.root, itertools.chain([first], entries)
+
+    def progress(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        (全ルートを通した進捗率, 残り秒) を返す（推定できなければそれぞれ None）
+        ルートごとの推定値を、ルートの並び順の位置に当てはめる（各ルートを同じ重みとみなす）
+        """
+        est = self.estimator
+        f = est.fraction() if est is not None else None
+        if f is None:
+            return None, None
+        n = max(1, len(self.roots))
+        if n == 1:
+            return f, est.eta()
+        f = (self._root_pos + f) / n
+        elapsed = time.monotonic() - (self._started or time.monotonic())
+        if f < 0.01 or elapsed < 1.0:
+            return f, None
+        return f, elapsed * (1.0 - f) / f
+
+    @property
+    def digest_with_stat(self) -> bool:
+        """ダイジェストにサイズ・更新日時を含めるか（リスティングはファイルを stat できないため構造のみ）"""
+        return self.digest_stat and not self.listing_format
+
+    def digest_tree(self, root: Path, items: List[Item]) -> DigestTree:
+        """フォルダごとのダイジェスト"""
+        return DigestTree(items, root=root, with_stat=self.digest_with_stat)
+
+    def stopped(self) -> bool:
+        """ルート間でもキャンセル/予算切れを尊重"""
+        if self.flags.is_canceled():
+            return True
+        return self.budget is not None and self.budget.exceeded()
+
+    # ---- 複数フォーマット出力 ----
+    def run(
+        self,
+        outputs: List[JobOutput],
+        skiplog: Optional[SkipLog] = None,
+        stats: Optional[Stats] = None,
+        progress_cb: Optional[Callable[[int], None]] = None,
+        workers: int = 4,
+        cache: Optional[ScanCache] = None,
+        scan_fn: Optional[Callable[[Path], CachedScan]] = None,
+    ) -> Dict:
+        """
+        各ルートを 1 回だけ走査し、全 outputs に書き出す
+        - 走査結果（アイテム列）はルートごとに 1 つだけ保持し、出力ごとの描画を並行実行
+        - 出力が 1 件でリスト化せずに書き出せる（JobOutput.streams。ndjson / json-stream / html / 概要）場合、
+          キャッシュ・使い回し・ダイジェストがなければエントリ列をそのまま流し、アイテム列を保持しない
+        - cache 指定時はキャッシュ済みのルートを再走査しない（統計・スキップログはキャッシュ分を合算）
+          scan_fn 指定時は cached_scan の代わりにルートの走査結果を返す関数として使う（デーモン経由など）
+        - ルートが見つからなければ ValueError（書きかけの出力は閉じる）
+        戻り値: {"count": 走査件数, "stats": Stats, "skiplog": SkipLog, "outputs": outputs}
+        """
+        skiplog = skiplog if skiplog is not None else SkipLog()
+        stats = stats if stats is not None else Stats()
+        total = 0
+        plan = self.root_plan()
+        last = last_uses(plan)
+        # 重複・入れ子のルートで使い回す走査結果（位置 -> (出力上のルート, アイテム列)）
+        shared: Dict[int, Tuple[Path, List[Item], Optional[CachedScan]]] = {}
+        for out in outputs:
+            out.open()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(outputs)))) as ex:
+                for idx, root in enumerate(self.roots):
+                    if self.flags.is_canceled():
+                        break
+                    error = self.check_root(root)
+                    if error:
+                        raise ValueError(error)
+                    src, prefix = plan[idx]
+                    # ls -lR 等は行きがけ順でないため json-stream はリスト経由で描画する
+                    preordered = not self.listing_format
+                    if (
+                        cache is None and scan_fn is None and src == idx and last[src] <= idx
+                        and len(outputs) == 1 and outputs[0].streams(preordered)
+                        and not (self.digests and outputs[0].fmt in DIGEST_FORMATS)
+                    ):
+                        shown_root, entries = self.open_entries(root, skiplog, stats, progress_cb)
+                        total += outputs[0].write_root(
+                            shown_root, entries, self.absolute, preordered,
+                        )
+                        if self.stopped():
+                            break
+                        continue
+                    scan = None
+                    if src in shared:
+                        src_root, src_items, scan = shared[src]
+                    else:
+                        if scan_fn is not None:
+                            scan = scan_fn(self.roots[src])
+                        elif cache is not None:
+                            scan = self.cached_scan(self.roots[src], cache, progress_cb)
+                        if scan is not None:
+                            stats.merge(scan.stats)
+                            skiplog.merge(scan.skiplog)
+                            src_root, src_items = scan.root, scan.items
+                        else:
+                            src_root, entries = self.open_entries(
+                                self.roots[src], skiplog, stats, progress_cb,
+                            )
+                            src_items = list(entries)
+                        if last[src] > idx:
+                            shared[src] = (src_root, src_items, scan)
+                    if last[src] <= idx:
+                        shared.pop(src, None)
+                    if src == idx:
+                        shown_root, items = src_root, src_items
+                    else:
+                        shown_root, items, scan = root, subtree(src_items, prefix), None
+                    total += sum(1 for it in items if not is_marker(it))
+                    if not self.digests or not any(out.fmt in DIGEST_FORMATS for out in outputs):
+                        digests = None
+                    elif scan is not None:
+                        digests = scan.digest_tree(self.digest_with_stat).digests
+                    else:
+                        digests = self.digest_tree(shown_root, items).digests
+                    futures = [
+                        ex.submit(
+                            out.write_root, shown_root, items, self.absolute, preordered, digests,
+                        )
+                        for out in outputs
+                    ]
+                    for f in futures:
+                        f.result()
+                    if self.stopped():
+                        break
+        finally:
+            for out in outputs:
+                out.close()
+            stats.stop()
+        return {"count": total, "stats": stats, "skiplog": skiplog, "outputs": outputs}
@@ -0,0 +1,351 @@
+# folderdump/core/listing.py
+"""
+記録済みリスティングの取り込み（ファイルシステムへはアクセスしない）
+- find 出力（`find . -printf '%y %p\\n'` 推奨。パスのみの `find .` も可）
+- ls -lR 出力
+- rsync --list-only 出力
+いずれも 1 行ずつ読み、iter_paths と同じ (rel, is_dir, depth) を返す。
+フィルタ・深さ制限・フォルダのみは filter_stream で iter_paths と同じ規則で適用する。
+"""
+
+import re
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .filters import IncludeScope, is_excluded, should_keep
+from .walker import CtlFlags, Marker, ScanBudget, SkipLog, Stats, fanout_marker
+
+LISTING_FORMATS = ("find", "ls-lR", "rsync")
+
+# ls -l の 1 行: 権限 リンク数 所有者 グループ サイズ 日時 名前
+_LS_LINE = re.compile(
+    r"^([bcdlpsD-][rwxsStTl-]{9}[.+@]?)\s+\d+\s+\S+\s+\S+\s+"
+    r"(?:\d+,\s*)?[\d,]+\s+"
+    r"(?:\w{3}\s+\d{1,2}\s+(?:\d{1,2}:\d\d|\d{4})"
+    r"|\d{4}-\d\d-\d\d\s+\d\d:\d\d(?::\d\d(?:\.\d+)?)?(?:\s+[+-]\d{4})?"
+    r"|\d{1,2}\s+\w{3}\s+(?:\d{1,2}:\d\d|\d{4}))\s(.*)$"
+)
+# rsync --list-only の 1 行: 権限 サイズ 日付 時刻 パス
+_RSYNC_LINE = re.compile(
+    r"^([bcdlps-][rwxsStT-]{9})\s+[\d,.]+\s+\d{4}/\d\d/\d\d\s+\d\d:\d\d:\d\d\s(.*)$"
+)
+# find -printf '%y %p\n' の 1 行
+_FIND_TYPED = re.compile(r"^([fdlbcpsDN?]) (.*)$")
+
+
+def detect_format(first_line: str) -> str:
+    """先頭行から形式を推定（判別できなければ find 扱い）"""
+    if _RSYNC_LINE.match(first_line):
+        return "rsync"
+    if first_line.endswith(":") or first_line.startswith("total ") or _LS_LINE.match(first_line):
+        return "ls-lR"
+    return "find"
+
+
+def _link_name(name: str, kind: str) -> str:
+    """シンボリックリンクの 'name -> target' から name を取り出す"""
+    if kind == "l" and " -> " in name:
+        return name.split(" -> ", 1)[0]
+    return name
+
+
+def _parse_find(
+    lines: Iterable[str], on_error: Callable[[str], None],
+) -> Iterator[Tuple[str, bool]]:
+    """
+    find 出力。種別付き（%y %p）なら種別を使い、パスのみなら
+    直後の行がそのパス配下かどうかでディレクトリを判定する（空ディレクトリはファイル扱い）。
+    """
+    typed: Optional[bool] = None
+    pending: Optional[str] = None
+    for line in lines:
+        if not line:
+            continue
+        if typed is None:
+            typed = _FIND_TYPED.match(line) is not None
+        if typed:
+            m = _FIND_TYPED.match(line)
+            if not m:
+                on_error(line)
+                continue
+            yield (m.group(2), m.group(1) == "d")
+            continue
+        if pending is not None:
+            yield (pending, pending.endswith("/") or line.startswith(pending.rstrip("/") + "/"))
+        pending = line
+    if pending is not None:
+        yield (pending, pending.endswith("/"))
+
+
+def _parse_ls_lr(
+    lines: Iterable[str], on_error: Callable[[str], None],
+) -> Iterator[Tuple[str, bool]]:
+    """ls -lR 出力。'dir:' 見出しで現在ディレクトリを切り替える（最初の見出しがルート）"""
+    current = ""
+    first = True
+    for line in lines:
+        if not line.strip() or line.startswith("total "):
+            continue
+        m = _LS_LINE.match(line)
+        if m is None:
+            if line.endswith(":"):
+                current = line[:-1]
+                if first:
+                    yield (current, True)
+                first = False
+            else:
+                on_error(line)
+            continue
+        first = False
+        kind = m.group(1)[0]
+        name = _link_name(m.group(2), kind)
+        if name in (".", ".."):
+            continue
+        yield ((current + "/" + name) if current else name, kind == "d")
+
+
+def _parse_rsync(
+    lines: Iterable[str], on_error: Callable[[str], None],
+) -> Iterator[Tuple[str, bool]]:
+    """rsync --list-only 出力"""
+    for line in lines:
+        if not line:
+            continue
+        m = _RSYNC_LINE.match(line)
+        if m is None:
+            on_error(line)
+            continue
+        kind = m.group(1)[0]
+        yield (_link_name(m.group(2), kind), kind == "d")
+
+
+_PARSERS = {"find": _parse_find, "ls-lR": _parse_ls_lr, "rsync": _parse_rsync}
+
+
+def filter_stream(
+    records: Iterable[Tuple[Path, bool]],
+    max_depth: Optional[int],
+    includes: List[str],
+    excludes: List[str],
+    folders_only: bool,
+    flags: CtlFlags,
+    stats: Stats,
+    progress_cb=None,
+    negates: List[str] | None = None,
+    budget: Optional[ScanBudget] = None,
+    max_fanout: Optional[int] = None,
+) -> Iterator[Tuple[Path, bool, int]]:
+    """
+    ルート相対の (rel, is_dir) 列に iter_paths と同じ規則を適用する
+    - 親は子より先に現れること（find / ls -lR / rsync / git index はいずれも満たす）
+    - フィルタで落ちた・深さ上限のディレクトリの配下は出力しない
+    - budget は総件数/時間のみ対応（ディレクトリあたり件数は対象外）
+    - max_fanout 超過分は数えるだけにし、そのディレクトリを抜けた時点で要約マーカーを出す
+      （同じディレクトリの直下が連続して現れること。ls -lR のように子の見出しが後に来る形式も可）
+    - includes 指定時は、一致しえないディレクトリの配下を読み飛ばし、一致したエントリの
+      祖先ディレクトリを（包含パターンに合わなくても）そのエントリの直前に出力する
+    """
+    # 読み飛ばす子を持つ、まだ抜けていないディレクトリ（祖先順のスタック）: (親 parts, 読み飛ばす子の名前)
+    # ls -lR では子の見出しが兄弟の後に来るため、子ではなく親を抜けた時点で捨てる
+    pruned: List[Tuple[Tuple[str, ...], Set[str]]] = []
+    scope = IncludeScope(list(includes) + list(negates or [])) if includes else None
+    # 包含に一致しないが配下に一致がありうる子を持つ、まだ抜けていないディレクトリ
+    # （祖先順のスタック）: (親 parts, 子の名前 -> 深さ)。pruned と同じく親を抜けた時点で捨てる
+    held: List[Tuple[Tuple[str, ...], Dict[str, int]]] = []
+    # 直下を数えている、まだ抜けていないディレクトリ（祖先順のスタック）
+    # (親 parts, [表示数, 非表示ディレクトリ数, 非表示ファイル数])
+    fanout: List[Tuple[Tuple[str, ...], List[int]]] = []
+
+    def leave(stack: list, parent: Tuple[str, ...]):
+        # parent の祖先でなくなったディレクトリのフレームを捨てる
+        while stack and parent[:len(stack[-1][0])] != stack[-1][0]:
+            stack.pop()
+
+    def hold(parts: Tuple[str, ...]):
+        parent = parts[:-1]
+        leave(held, parent)
+        if not held or held[-1][0] != parent:
+            held.append((parent, {}))
+        held[-1][1][parts[-1]] = len(parts)
+
+    def prune(parts: Tuple[str, ...]):
+        # 呼び出し時点で pruned の末尾は parts の親かその祖先（skipped で取り除いた後）
+        parent = parts[:-1]
+        if not pruned or pruned[-1][0] != parent:
+            pruned.append((parent, set()))
+        pruned[-1][1].add(parts[-1])
+
+    def skipped(parts: Tuple[str, ...]) -> bool:
+        # 抜けたディレクトリの分を捨て、祖先が読み飛ばし対象か判定する
+        # （読み飛ばした配下からは pruned に積まないため、末尾だけ見ればよい）
+        leave(pruned, parts[:-1])
+        if not pruned:
+            return False
+        k = len(pruned[-1][0])
+        return k + 1 < len(parts) and parts[k] in pruned[-1][1]
+
+    def close(parts: Optional[Tuple[str, ...]]) -> Iterator[Marker]:
+        # parts（None なら末尾）の祖先でなくなったディレクトリを捨て、非表示の子があれば要約を出す
+        while fanout and (parts is None or fanout[-1][0] != parts[:len(fanout[-1][0])]):
+            done, (_, dirs, files) = fanout.pop()
+            if dirs or files:
+                yield fanout_marker(Path(*done), len(done) + 1, dirs, files)
+
+    if budget is not None:
+        budget.start()
+    for rel, is_dir in records:
+        if not flags.checkpoint():
+            return
+        parts = rel.parts
+        depth = len(parts)
+        if depth == 0:
+            continue
+        if fanout:
+            yield from close(parts[:-1])
+        if max_depth is not None and depth > max_depth:
+            continue
+        if skipped(parts):
+            continue
+        if not should_keep(rel, is_dir, includes, excludes, negates=negates):
+            if is_dir:
+                if (
+                    scope is not None and scope.may_contain(rel)
+                    and not is_excluded(rel, excludes, negates)
+                ):
+                    hold(parts)
+                else:
+                    prune(parts)
+            continue
+        if is_dir and scope is not None and not scope.may_contain(rel):
+            prune(parts)
+        if budget is not None and budget.exceeded():
+            yield Marker(rel.parent, depth, f"… truncated ({budget.reason})")
+            return
+        if (not folders_only) or is_dir:
+            if max_fanout is not None:
+                # close() の後なので、末尾は親かその祖先
+                if not fanout or fanout[-1][0] != parts[:-1]:
+                    fanout.append((parts[:-1], [0, 0, 0]))
+                counts = fanout[-1][1]
+                if counts[0] >= max_fanout:
+                    # 非表示：配下も出さない
+                    if is_dir:
+                        counts[1] += 1
+                        prune(parts)
+                    else:
+                        counts[2] += 1
+                    continue
+                counts[0] += 1
+            if held:
+                # 保留中の祖先を浅い順に先に出す
+                leave(held, parts[:-1])
+                for parent, names in held:
+                    k = len(parent)
+                    d = names.pop(parts[k], None) if k + 1 < depth else None
+                    if d is not None:
+                        yield (Path(*parts[:k + 1]), True, d)
+                        stats.tick(d)
+                        if budget is not None:
+                            budget.tick()
+            yield (rel, is_dir, depth)
+            stats.tick(depth)
+            if budget is not None:
+                budget.tick()
+            if progress_cb and stats.total % 50 == 0:
+                progress_cb(stats.total)
+    yield from close(None)
+
+
+class ListingReader:
+    """
+    リスティングファイル（または行の iterable）を読むソース
+    - fmt: "auto" / "find" / "ls-lR" / "rsync"
+    - root: 記録上のルートパス。省略時は先頭レコードがディレクトリならそれをルートとみなす
+    """
+
+    def __init__(
+        self,
+        source: Path | Iterable[str],
+        fmt: str = "auto",
+        root: Optional[str] = None,
+        encoding: str = "utf-8",
+    ):
+        self.source = source
+        self.fmt = fmt
+        self.encoding = encoding
+        self._root = root
+        if fmt != "auto" and fmt not in _PARSERS:
+            raise ValueError(f"unknown listing format: {fmt}")
+
+    def _lines(self) -> Iterator[str]:
+        if isinstance(self.source, (str, Path)):
+            with open(self.source, encoding=self.encoding, errors="surrogateescape") as f:
+                for line in f:
+                    yield line.rstrip("\r\n")
+        else:
+            for line in self.source:
+                yield line.rstrip("\r\n")
+
+    def records(self, skiplog: Optional[SkipLog] = None) -> Iterator[Tuple[Path, bool]]:
+        """ルート相対の (rel, is_dir) を返す（root 属性は最初のレコードで確定する）"""
+
+        def on_error(line: str):
+            if skiplog is not None:
+                skiplog.add(line, "unparsed listing line")
+
+        lines = self._lines()
+        first = next(lines, None)
+        if first is None:
+            return
+        fmt = detect_format(first) if self.fmt == "auto" else self.fmt
+        self.fmt = fmt
+
+        def chained():
+            yield first
+            yield from lines
+
+        root: Optional[PurePosixPath] = None
+        if self._root is not None:
+            root = PurePosixPath(self._root)
+        for path, is_dir in _PARSERS[fmt](chained(), on_error):
+            p = PurePosixPath(path)
+            if root is None:
+                # 先頭レコードがディレクトリならルートとみなす
+                if is_dir:
+                    root = p
+                    self._root = path
+                    continue
+                root = PurePosixPath("")
+                self._root = ""
+            try:
+                rel = p.relative_to(root)
+            except ValueError:
+                on_error(path)
+                continue
+            yield (Path(*rel.parts) if rel.parts else Path(""), is_dir)
+
+    @property
+    def root(self) -> Path:
+        """記録上のルート（records を読み始める前は指定値、未指定なら '.'）"""
+        return Path(self._root or ".")
+
+    def iter_paths(
+        self,
+        max_depth: Optional[int],
+        includes: List[str],
+        excludes: List[str],
+        folders_only: bool,
+        flags: CtlFlags,
+        skiplog: SkipLog,
+        stats: Stats,
+        progress_cb=None,
+        negates: List[str] | None = None,
+        budget: Optional[ScanBudget] = None,
+        max_fanout: Optional[int] = None,
+    ) -> Iterator[Tuple[Path, bool, int]]:
+        """iter_paths と同じ出力をリスティングから生成する"""
+        return filter_stream(
+            self.records(skiplog), max_depth, includes, excludes, folders_only,
+            flags, stats, progress_cb=progress_cb, negates=negates, budget=budget,
+            max_fanout=max_fanout,
+        )
@@ -0,0 +1,64 @@
+# folderdump/core/ordering.py
+"""
+ディレクトリ直下の並び順
+- name:    名前順（大文字小文字を無視。既定）
+- natural: 自然順（数字部分を数値として比較。file2 < file10）
+- size:    ファイルサイズの大きい順（サイズが取れない場合は 0 として名前順）
+- fs:      ファイルシステムの列挙順のまま（並べ替えず、ディレクトリ単位で溜めずに流す）
+dirs_first はフォルダを先にまとめる（fs では並べ替えないため無視）。
+ソートキーはエントリごとに 1 回だけ計算する（list.sort の key）。
+"""
+
+import re
+from typing import Callable, List, Optional, Tuple
+
+ORDERS = ("name", "natural", "size", "fs")
+DEFAULT_ORDER = "name"
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def check_order(order: str) -> str:
+    """並び順の名前を検証（不正なら ValueError）"""
+    if order not in ORDERS:
+        raise ValueError(f"unknown order: {order} (choose from {', '.join(ORDERS)})")
+    return order
+
+
+def natural_key(name: str) -> Tuple:
+    """自然順のキー（文字列部分と数値部分が交互に並ぶため、位置ごとに型がそろう）"""
+    parts = _DIGITS.split(name.lower())
+    parts[1::2] = [int(p) for p in parts[1::2]]
+    return tuple(parts)
+
+
+def name_key(order: str) -> Callable[[str], object]:
+    """名前部分のキー"""
+    return natural_key if order == "natural" else str.lower
+
+
+def sort_pairs(
+    pairs: List[Tuple[object, bool]],
+    order: str,
+    dirs_first: bool,
+    size: Optional[Callable[[object], int]] = None,
+) -> List[Tuple[object, bool]]:
+    """
+    (エントリ, is_dir) のリストをその場で並べ替えて返す（エントリは .name を持つもの）
+    size はファイルのサイズを返す関数（size 順のみ使用。None なら名前順）
+    """
+    if order == "fs":
+        return pairs
+    nk = name_key(order)
+    if order == "size" and size is not None:
+        def key(p):
+            e, d = p
+            return (dirs_first and not d, 0 if d else -size(e), nk(e.name))
+    elif dirs_first:
+        def key(p):
+            return (not p[1], nk(p[0].name))
+    else:
+        def key(p):
+            return nk(p[0].name)
+    pairs.sort(key=key)
+    return pairs
@@ -2,12 +2,24 @@
 """
 出力レンダリング
 - plain, tree, markdown, json, csv, dot
+- ndjson, json-stream（出力先へ直接書き出すストリーミング版）
+- csv / json / ndjson は digests（フォルダ parts -> ダイジェスト）指定時にフォルダのダイジェストも出力
 """
 
 import json
 import csv
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import Iterable, List, Optional, Tuple, Dict, TextIO
+
+from .walker import is_marker
+
+
+def _parts_key(item) -> Tuple[str, ...]:
+    """ツリー系ソートキー。打ち切りマーカーは同じ親の末尾に並べる"""
+    parts = item[0].parts
+    if is_marker(item):
+        return parts[:-1] + ("\U0010ffff",)
+    return parts
 
 
 def render_plain(root: Path, items: List[Tuple[Path, bool, int]], absolute: bool) -> str:
@@ -24,7 +36,7 @@ def render_plain(root: Path, items: List[Tuple[Path, bool, int]], absolute: bool
 
 def render_tree(items: List[Tuple[Path, bool, int]]) -> str:
     """tree: 疑似 tree コマンド形式"""
-    items_sorted = sorted(items, key=lambda x: tuple(x[0].parts))
+    items_sorted = sorted(items, key=_parts_key)
     from collections import defaultdict
     children = defaultdict(list)
 
@@ -53,47 +65,210 @@ def render_markdown(text: str) -> str:
     return "```\n" + text + "\n```"
 
 
-def render_json(items: List[Tuple[Path, bool, int]]) -> str:
-    """JSON: ツリーをネストしたオブジェクトに変換"""
-    from collections import defaultdict
-    nodes: Dict[str, Dict] = {"": {"name": ".", "children": {}}}
-    for rel, is_dir, _ in sorted(items, key=lambda x: tuple(x[0].parts)):
+def render_json(
+    items: List[Tuple[Path, bool, int]], digests: Optional[Dict[Tuple[str, ...], str]] = None,
+) -> str:
+    """JSON: ツリーをネストしたオブジェクトに変換（digests 指定時はフォルダに "digest"）"""
+    nodes: Dict[str, Dict] = {"": {"name": ".", "children": {}, "digest": (digests or {}).get(())}}
+    for rel, is_dir, _ in sorted(items, key=_parts_key):
         parent = str(Path(*rel.parts[:-1])) if len(rel.parts) > 1 else ""
         name = rel.name + ("/" if is_dir else "")
-        parent_node = nodes.setdefault(parent, {"name": parent or ".", "children": {}})
+        parent_node = nodes.setdefault(
+            parent, {"name": parent or ".", "children": {}, "digest": None},
+        )
         key = str(rel)
-        nodes[key] = {"name": name, "children": {}}
+        digest = digests.get(rel.parts) if (digests and is_dir) else None
+        nodes[key] = {"name": name, "children": {}, "digest": digest}
         parent_node["children"][key] = nodes[key]
 
     def prune(node: Dict) -> Dict:
-        if not node["children"]:
-            return {"name": node["name"]}
-        return {"name": node["name"], "children": [prune(c) for c in node["children"].values()]}
+        out = {"name": node["name"]}
+        if node["digest"] is not None:
+            out["digest"] = node["digest"]
+        if node["children"]:
+            out["children"] = [prune(c) for c in node["children"].values()]
+        return out
 
     return json.dumps(prune(nodes[""]), ensure_ascii=False, indent=2)
 
 
-def render_csv(root: Path, items: List[Tuple[Path, bool, int]]) -> str:
-    """CSV: path, is_dir, depth"""
+def write_ndjson(
+    out: TextIO,
+    root: Path,
+    items: Iterable[Tuple[Path, bool, int]],
+    absolute: bool = False,
+    digests: Optional[Dict[Tuple[str, ...], str]] = None,
+) -> int:
+    """
+    NDJSON: 1 行 1 エントリで out へ直接書き出す（戻り値は書き出したエントリ数）
+    {"path": ..., "type": "dir" | "file" | "marker", "depth": n}
+    digests 指定時はフォルダの行に "digest" を加える
+    """
+    base = root.resolve() if absolute else None
+    count = 0
+    for item in items:
+        rel, is_dir, depth = item
+        if is_marker(item):
+            kind = "marker"
+        else:
+            kind = "dir" if is_dir else "file"
+            count += 1
+        p = (base / rel) if base is not None else rel
+        rec = {"path": p.as_posix(), "type": kind, "depth": depth}
+        if digests and kind == "dir":
+            rec["digest"] = digests.get(rel.parts)
+        out.write(json.dumps(rec, ensure_ascii=False))
+        out.write("\n")
+    return count
+
+
+def write_json_stream(out: TextIO, items: Iterable[Tuple[Path, bool, int]]) -> int:
+    """
+    JSON（ストリーミング版）: render_json と同じ入れ子構造を、辞書ツリーを作らずに out へ書き出す。
+    items は iter_paths と同じ行きがけ順（親が子より先）であること。
+    ディレクトリに入る/出るタイミングで括弧を開閉するため、保持するのは開いている祖先のみ。
+    戻り値は書き出したエントリ数。
+    """
+    # 開いているノード: [depth, children 配列を開いたか]
+    stack: List[List] = [[0, False]]
+    count = 0
+
+    def close_top():
+        depth, has_children = stack.pop()
+        level = len(stack)
+        if has_children:
+            out.write("\n" + " " * (4 * level + 2) + "]")
+        out.write("\n" + " " * (4 * level) + "}")
+
+    out.write('{\n  "name": "."')
+    for item in items:
+        rel, is_dir, depth = item
+        while len(stack) > 1 and stack[-1][0] >= depth:
+            close_top()
+        parent = stack[-1]
+        level = len(stack)
+        if parent[1]:
+            out.write(",\n")
+        else:
+            out.write(",\n" + " " * (4 * (level - 1) + 2) + '"children": [\n')
+            parent[1] = True
+        name = rel.name + ("/" if is_dir else "")
+        out.write(" " * (4 * level) + "{\n" + " " * (4 * level + 2) + '"name": ')
+        out.write(json.dumps(name, ensure_ascii=False))
+        stack.append([depth, False])
+        if not is_marker(item):
+            count += 1
+    while stack:
+        close_top()
+    return count
+
+
+def render_csv(
+    root: Path,
+    items: List[Tuple[Path, bool, int]],
+    digests: Optional[Dict[Tuple[str, ...], str]] = None,
+) -> str:
+    """CSV: path, is_dir, depth（digests 指定時は digest 列を追加。ファイルは空欄）"""
     from io import StringIO
     buf = StringIO()
     w = csv.writer(buf)
-    w.writerow(["path", "is_dir", "depth"])
     base = root.resolve()
-    for rel, is_dir, depth in items:
-        w.writerow([str(base / rel), 1 if is_dir else 0, depth])
+    if digests is None:
+        w.writerow(["path", "is_dir", "depth"])
+        for rel, is_dir, depth in items:
+            w.writerow([str(base / rel), 1 if is_dir else 0, depth])
+    else:
+        w.writerow(["path", "is_dir", "depth", "digest"])
+        for rel, is_dir, depth in items:
+            digest = digests.get(rel.parts, "") if is_dir else ""
+            w.writerow([str(base / rel), 1 if is_dir else 0, depth, digest])
     return buf.getvalue()
 
 
-def render_dot(items: List[Tuple[Path, bool, int]]) -> str:
-    """Graphviz DOT: 親子エッジを生成"""
+def _dot_quote(s: str) -> str:
+    """DOT の二重引用符文字列としてエスケープ"""
+    s = s.replace("\\", "\\\\").replace('"', '\\"')
+    s = s.replace("\r", "").replace("\n", "\\n")
+    return f'"{s}"'
+
+
+def render_dot(
+    items: List[Tuple[Path, bool, int]],
+    max_depth: int | None = None,
+    max_fanout: int | None = None,
+    collapse_over: int | None = None,
+    max_nodes: int | None = None,
+    cluster_depth: int = 0,
+) -> str:
+    """
+    Graphviz DOT: 親子エッジを生成
+    - ノード ID は連番（n0, n1, ...）、名前はエスケープしてラベルに入れる
+    - max_depth: これより深い階層は親ノードに "name (N entries)" として畳む
+    - max_fanout: 1 ディレクトリあたりの表示子数。超過分は "… and N more" ノードにまとめる
+    - collapse_over: 配下の件数がこれを超えるディレクトリは展開せず要約ノードにする
+    - max_nodes: ノード数がこれに達した後のディレクトリは展開しない
+    - cluster_depth: この深さまでのディレクトリを subgraph cluster として囲む（0 で無効）
+    """
+    from collections import defaultdict
+
+    # 配下件数と親子関係（parts タプルで集計）
+    counts: Dict[Tuple[str, ...], int] = defaultdict(int)
+    children: Dict[Tuple[str, ...], List] = defaultdict(list)
+    for item in items:
+        parts = item[0].parts
+        for i in range(1, len(parts)):
+            counts[parts[:i]] += 1
+        children[parts[:-1]].append(item)
+
     lines = ["digraph G {", "  node [shape=box];"]
-    for rel, is_dir, _ in items:
-        if len(rel.parts) == 1:
-            parent = "."
-        else:
-            parent = str(Path(*rel.parts[:-1]))
-        child = str(rel)
-        lines.append(f'  "{parent}" -> "{child}";')
+    node_ids = [0]
+
+    def new_node(indent: str, label: str, attrs: str = "") -> str:
+        nid = f"n{node_ids[0]}"
+        node_ids[0] += 1
+        lines.append(f"{indent}{nid} [label={_dot_quote(label)}{attrs}];")
+        return nid
+
+    def summary(name: str, parts: Tuple[str, ...]) -> str:
+        return f"{name} ({counts[parts]:,} entries)"
+
+    def draw_dir(parts: Tuple[str, ...], nid: str, indent: str):
+        kids = children.get(parts, [])
+        shown = kids if max_fanout is None else kids[:max_fanout]
+        for item in shown:
+            rel, is_dir, _ = item
+            cparts = rel.parts
+            name = rel.name + ("/" if is_dir else "")
+            if is_marker(item):
+                cid = new_node(indent, rel.name, ", style=dashed")
+            elif not is_dir or cparts not in children:
+                cid = new_node(indent, name)
+            elif (
+                (max_depth is not None and len(cparts) >= max_depth)
+                or (collapse_over is not None and counts[cparts] > collapse_over)
+                or (max_nodes is not None and node_ids[0] >= max_nodes)
+            ):
+                # 要約ノードとして畳む（配下は出力しない）
+                cid = new_node(indent, summary(name, cparts), ", shape=folder, style=dashed")
+            elif len(cparts) <= cluster_depth:
+                lines.append(f"{indent}subgraph {_dot_quote('cluster_' + '/'.join(cparts))} {{")
+                lines.append(f"{indent}  label={_dot_quote(name)};")
+                cid = new_node(indent + "  ", name)
+                draw_dir(cparts, cid, indent + "  ")
+                lines.append(f"{indent}}}")
+            else:
+                cid = new_node(indent, name)
+                draw_dir(cparts, cid, indent)
+            lines.append(f"{indent}{nid} -> {cid};")
+
+        hidden = kids[len(shown):]
+        if hidden:
+            n_dirs = sum(1 for it in hidden if it[1])
+            label = f"… and {len(hidden):,} more ({n_dirs:,} dirs, {len(hidden) - n_dirs:,} files)"
+            cid = new_node(indent, label, ", style=dashed")
+            lines.append(f"{indent}{nid} -> {cid};")
+
+    root_id = new_node("  ", ".")
+    draw_dir((), root_id, "  ")
     lines.append("}")
     return "\n".join(lines)
@@ -0,0 +1,123 @@
+# folderdump/core/scan_cache.py
+"""
+走査結果のキャッシュ
+- キーはルートと走査条件（DumpJob.scan_key）。フォーマット・絶対パス等の描画条件は含まない
+- 描画条件だけが変わったときは、再走査せずにキャッシュ済みのアイテム列から描画し直す
+- 件数（アイテム総数）と保持数で上限を設け、古いものから追い出す（LRU）
+- ワーカースレッドと GUI スレッドの両方から使うためロックで保護
+- フォルダのダイジェスト（DigestTree）も初回計算時に走査結果と一緒に保持する
+- 追い出し・置き換え・破棄したキーは _dropped() に渡す（サブクラスで監視の解除などに使う）
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .digest import DigestTree
+from .walker import SkipLog, Stats
+
+# 既定の上限（アイテム総数 / 保持する走査結果の数）
+DEFAULT_MAX_ITEMS = 2_000_000
+DEFAULT_MAX_SCANS = 8
+
+
+class CachedScan:
+    """1 ルート分の走査結果（出力上のルート、アイテム列、統計、スキップログ）"""
+
+    def __init__(
+        self, root: Path, items: List[Tuple[Path, bool, int]], stats: Stats, skiplog: SkipLog,
+    ):
+        self.root = root
+        self.items = items
+        self.stats = stats
+        self.skiplog = skiplog
+        self._digests: Dict[bool, DigestTree] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.items)
+
+    def digest_tree(self, with_stat: bool = False) -> DigestTree:
+        """フォルダごとのダイジェスト（初回だけ計算して保持）"""
+        tree = self._digests.get(with_stat)
+        if tree is None:
+            tree = DigestTree(self.items, root=self.root, with_stat=with_stat)
+            self._digests[with_stat] = tree
+        return tree
+
+    def reset_digests(self):
+        """保持しているダイジェストを捨てる（ファイルの内容だけが変わったとき）"""
+        self._digests = {}
+
+
+class ScanCache:
+    """走査結果の LRU キャッシュ"""
+
+    def __init__(self, max_items: int = DEFAULT_MAX_ITEMS, max_scans: int = DEFAULT_MAX_SCANS):
+        self.max_items = max_items
+        self.max_scans = max_scans
+        self._scans: "OrderedDict[Hashable, CachedScan]" = OrderedDict()
+        self._items = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedScan]:
+        with self._lock:
+            scan = self._scans.get(key)
+            if scan is not None:
+                self._scans.move_to_end(key)
+            return scan
+
+    def put(self, key: Hashable, scan: CachedScan) -> bool:
+        """保存する（上限を超える単独の結果は保存せず False）"""
+        if scan.size > self.max_items:
+            return False
+        dropped = []
+        with self._lock:
+            old = self._scans.pop(key, None)
+            if old is not None:
+                self._items -= old.size
+                dropped.append(key)
+            self._scans[key] = scan
+            self._items += scan.size
+            while self._scans and (
+                len(self._scans) > self.max_scans or self._items > self.max_items
+            ):
+                evicted_key, evicted = self._scans.popitem(last=False)
+                self._items -= evicted.size
+                dropped.append(evicted_key)
+        for k in dropped:
+            self._dropped(k)
+        return True
+
+    def discard(self, key: Hashable) -> bool:
+        """破棄する（なければ False）"""
+        with self._lock:
+            scan = self._scans.pop(key, None)
+            if scan is None:
+                return False
+            self._items -= scan.size
+        self._dropped(key)
+        return True
+
+    def _dropped(self, key: Hashable):
+        """キャッシュから外れたキー（既定では何もしない）"""
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._scans
+
+    def __len__(self) -> int:
+        return len(self._scans)
+
+    @property
+    def items_total(self) -> int:
+        return self._items
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._scans)
+            self._scans.clear()
+            self._items = 0
+        for k in keys:
+            self._dropped(k)
@@ -0,0 +1,193 @@
+# folderdump/core/shard.py
+"""
+巨大な出力をシャード（分割ファイル）に書き出す
+- 分割単位：最大バイト数 / 最大件数 / 最上位ディレクトリ（組み合わせ可）
+- 各シャードは単体で有効な文書として描画（CSV はシャードごとにヘッダ、JSON はシャードごとにルート）
+- tree / json 等の階層形式では、シャード先頭エントリの祖先ディレクトリを補って構造を保つ
+- シャードの描画と書き込みはスレッドプールで並行実行
+- 最大バイト数は見積もりで分割を計画し、描画結果が超えたシャードは実測に合わせて切り詰め直す
+- マニフェスト（*.manifest.json）にシャード名とエントリ範囲を記録
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+Item = Tuple[Path, bool, int]
+
+# 祖先の補完が必要な階層形式
+HIERARCHICAL_FORMATS = ("tree", "markdown", "json", "json-stream", "dot")
+
+
+class ShardSpec:
+    """
+    シャード分割の指定
+    - max_bytes は描画後のバイト数で守る（1 エントリだけで超える場合はそのエントリ単独のシャードにする）
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        by_top: bool = False,
+        workers: int = 4,
+    ):
+        if max_bytes is None and max_entries is None and not by_top:
+            raise ValueError("ShardSpec: max_bytes, max_entries, by_top のいずれかを指定してください")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.by_top = by_top
+        self.workers = max(1, workers)
+
+
+def _estimate_bytes(fmt: str, item: Item, base_len: int) -> int:
+    """1 エントリが出力に占めるおおよそのバイト数"""
+    rel, _, depth = item
+    name = len(rel.name.encode("utf-8"))
+    if fmt in ("tree", "markdown"):
+        # 罫線文字（├ │ └ ─）は UTF-8 で 3 バイト
+        return 8 * depth + name + 3
+    if fmt in ("json", "json-stream"):
+        return 8 * depth + name + 30
+    if fmt == "dot":
+        return name + 40
+    path = len(rel.as_posix().encode("utf-8"))
+    if fmt == "csv":
+        return base_len + path + 8
+    if fmt == "ndjson":
+        return path + 45
+    return base_len + path + 2
+
+
+def plan_shards(
+    items: List[Item],
+    spec: ShardSpec,
+    fmt: str,
+    base_len: int = 0,
+) -> List[Tuple[int, int, Optional[str]]]:
+    """items を [(start, end, 最上位名 or None), ...]（end は含まない）に分割する"""
+    plans: List[Tuple[int, int, Optional[str]]] = []
+    start = 0
+    size = 0
+    top: Optional[str] = None
+    for i, item in enumerate(items):
+        parts = item[0].parts
+        key = parts[0] if len(parts) > 1 or item[1] else ""
+        cost = _estimate_bytes(fmt, item, base_len) if spec.max_bytes is not None else 0
+        if i > start:
+            split = (
+                (spec.by_top and key != top)
+                or (spec.max_entries is not None and i - start >= spec.max_entries)
+                or (spec.max_bytes is not None and size + cost > spec.max_bytes)
+            )
+            if split:
+                plans.append((start, i, top if spec.by_top else None))
+                start, size = i, 0
+        if i == start:
+            top = key
+        size += cost
+    if start < len(items):
+        plans.append((start, len(items), top if spec.by_top else None))
+    return plans
+
+
+def _with_ancestors(items: List[Item], start: int, end: int) -> List[Item]:
+    """シャード先頭エントリの祖先ディレクトリを補ったアイテム列"""
+    chunk = items[start:end]
+    if not chunk:
+        return chunk
+    first = chunk[0][0]
+    ancestors = [p for p in reversed(first.parents) if p.parts]
+    context = [(p, True, len(p.parts)) for p in ancestors]
+    return context + chunk
+
+
+def shard_path(dest: Path, index: int, tag: str = "") -> Path:
+    """structure.csv -> structure[.tag].00000.csv"""
+    stem = dest.name[: -len(dest.suffix)] if dest.suffix else dest.name
+    mid = f".{tag}" if tag else ""
+    return dest.with_name(f"{stem}{mid}.{index:05d}{dest.suffix}")
+
+
+def manifest_path(dest: Path) -> Path:
+    stem = dest.name[: -len(dest.suffix)] if dest.suffix else dest.name
+    return dest.with_name(f"{stem}.manifest.json")
+
+
+def write_shards(
+    items: List[Item],
+    root: Path,
+    dest: Path,
+    fmt: str,
+    render: Callable[[Path, List[Item]], str],
+    spec: ShardSpec,
+    tag: str = "",
+    absolute: bool = False,
+) -> List[Dict]:
+    """
+    items をシャードに分割して dest と同じフォルダへ並行に書き出し、マニフェスト用の情報を返す
+    - render(root, items) は 1 シャード分の完全な文書を返す関数（フォーマットごとのレンダラ）
+    - エントリ範囲（first / last）は元の items 上の位置（祖先の補完分は含まない）
+    """
+    base_len = len(str(root.resolve()).encode("utf-8")) + 1 if (absolute or fmt == "csv") else 0
+    plans = plan_shards(items, spec, fmt, base_len=base_len)
+    hierarchical = fmt in HIERARCHICAL_FORMATS
+
+    def fit(start: int, end: int) -> List[Tuple[int, int, bytes]]:
+        """[start, end) を描画し、max_bytes を超えたら先頭から収まる長さに切り詰めて分け直す"""
+        pieces: List[Tuple[int, int, bytes]] = []
+        while start < end:
+            n = end - start
+            while True:
+                if hierarchical:
+                    chunk = _with_ancestors(items, start, start + n)
+                else:
+                    chunk = items[start:start + n]
+                data = render(root, chunk).encode("utf-8")
+                if spec.max_bytes is None or len(data) <= spec.max_bytes or n == 1:
+                    break
+                # 実測の超過率で縮める（必ず 1 件以上減らす）
+                n = max(1, min(n - 1, n * spec.max_bytes // len(data)))
+            pieces.append((start, start + n, data))
+            start += n
+        return pieces
+
+    def write_one(index: int, start: int, end: int, top: Optional[str], data: bytes) -> Dict:
+        path = shard_path(dest, index, tag)
+        path.write_bytes(data)
+        info = {
+            "file": path.name, "first": start, "last": end - 1, "entries": end - start,
+            "bytes": len(data),
+        }
+        if top is not None:
+            info["top"] = top or "."
+        return info
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=spec.workers) as ex:
+        rendered = list(ex.map(lambda plan: fit(plan[0], plan[1]), plans))
+        shards = [
+            (s, e, t, data) for (_, _, t), pieces in zip(plans, rendered) for s, e, data in pieces
+        ]
+        futures = [
+            ex.submit(write_one, i, s, e, t, data) for i, (s, e, t, data) in enumerate(shards)
+        ]
+        return [f.result() for f in futures]
+
+
+def write_manifest(dest: Path, fmt: str, spec: ShardSpec, roots: List[Dict]) -> Path:
+    """
+    マニフェストを書き出す
+    roots: [{"root": str, "shards": [write_shards の戻り値...]}, ...]
+    """
+    manifest = {
+        "format": fmt,
+        "split": {
+            "max_bytes": spec.max_bytes, "max_entries": spec.max_entries, "by_top": spec.by_top,
+        },
+        "roots": roots,
+    }
+    path = manifest_path(dest)
+    path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
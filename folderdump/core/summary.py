@@ -0,0 +1,143 @@
+# folderdump/core/summary.py
+"""
+ツリーの概要（summary / summary-json フォーマット）
+- 走査結果のアイテム列を 1 件ずつ集計し、リスト化しない（メモリは深さ・上位件数・拡張子の種類数ぶんだけ）
+- 拡張子ごと・深さごとの件数、フォルダ/ファイル数、最も深いパス、子の多いフォルダ
+- 子の数は親パスのスタックで数える（行きがけ順でも ls -lR の順でも、同じフォルダの子が連続していればよい）
+"""
+
+import heapq
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from .walker import is_marker
+
+# 既定で表示する上位件数（最も深いパス・子の多いフォルダ・拡張子）
+DEFAULT_TOP = 10
+DEFAULT_TOP_EXTENSIONS = 20
+
+# 拡張子なしのファイルの集計キー
+NO_EXT = "(none)"
+
+
+class TreeSummary:
+    """アイテム列の概要を逐次集計する"""
+
+    def __init__(self, top: int = DEFAULT_TOP):
+        self.top = top
+        self.dirs = 0
+        self.files = 0
+        self.by_depth: Dict[int, int] = {}
+        self.by_ext: Dict[str, int] = {}
+        # 上位 top 件だけを保持する最小ヒープ（(深さ, パス) / (子の数, パス)）
+        self._deepest: List[Tuple[int, str]] = []
+        self._widest: List[Tuple[int, str]] = []
+        # 子を数えている途中のフォルダ [(parts, 子の数), ...]（ルートから順）
+        self._open: List[Tuple[Tuple[str, ...], int]] = []
+
+    @property
+    def total(self) -> int:
+        return self.dirs + self.files
+
+    def add(self, item: Tuple[Path, bool, int]):
+        if is_marker(item):
+            return
+        rel, is_dir, depth = item
+        if is_dir:
+            self.dirs += 1
+        else:
+            self.files += 1
+            ext = rel.suffix.lower() or NO_EXT
+            self.by_ext[ext] = self.by_ext.get(ext, 0) + 1
+        self.by_depth[depth] = self.by_depth.get(depth, 0) + 1
+        self._push(self._deepest, (depth, rel.as_posix()))
+        self._count_child(rel.parts[:-1])
+
+    def feed(self, items: Iterable[Tuple[Path, bool, int]]) -> "TreeSummary":
+        for it in items:
+            self.add(it)
+        return self
+
+    def _push(self, heap: List[Tuple[int, str]], entry: Tuple[int, str]):
+        if len(heap) < self.top:
+            heapq.heappush(heap, entry)
+        elif entry[0] > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def _count_child(self, parent: Tuple[str, ...]):
+        """parent の子を 1 件数える（祖先でなくなったフォルダは確定させる）"""
+        stack = self._open
+        while stack and stack[-1][0] != parent[:len(stack[-1][0])]:
+            self._close(stack.pop())
+        if stack and stack[-1][0] == parent:
+            stack[-1] = (parent, stack[-1][1] + 1)
+        else:
+            stack.append((parent, 1))
+
+    def _close(self, frame: Tuple[Tuple[str, ...], int]):
+        parts, n = frame
+        self._push(self._widest, (n, "/".join(parts) or "."))
+
+    def finish(self) -> "TreeSummary":
+        while self._open:
+            self._close(self._open.pop())
+        return self
+
+    @property
+    def deepest(self) -> List[Tuple[int, str]]:
+        return sorted(self._deepest, key=lambda e: (-e[0], e[1]))
+
+    @property
+    def widest(self) -> List[Tuple[int, str]]:
+        return sorted(self._widest, key=lambda e: (-e[0], e[1]))
+
+    def extensions(self, top: Optional[int] = DEFAULT_TOP_EXTENSIONS) -> List[Tuple[str, int]]:
+        exts = sorted(self.by_ext.items(), key=lambda kv: (-kv[1], kv[0]))
+        return exts if top is None else exts[:top]
+
+    # ---- 出力 ----
+    def to_dict(self, root: Path) -> dict:
+        return {
+            "root": str(root),
+            "entries": self.total,
+            "dirs": self.dirs,
+            "files": self.files,
+            "by_depth": {str(d): n for d, n in sorted(self.by_depth.items())},
+            "by_extension": dict(self.extensions(None)),
+            "deepest": [{"path": p, "depth": d} for d, p in self.deepest],
+            "widest": [{"path": p, "children": n} for n, p in self.widest],
+        }
+
+    def to_text(self, root: Path) -> str:
+        lines = [
+            f"root: {root}",
+            f"entries: {self.total:,} (dirs {self.dirs:,}, files {self.files:,})",
+            "",
+            "by depth:",
+        ]
+        lines += [f"  {d:>4}  {n:>12,}" for d, n in sorted(self.by_depth.items())]
+        lines += ["", "by extension:"]
+        shown = self.extensions()
+        lines += [f"  {ext:<16} {n:>12,}" for ext, n in shown]
+        rest = len(self.by_ext) - len(shown)
+        if rest > 0:
+            others = self.files - sum(n for _, n in shown)
+            lines.append(f"  … and {rest:,} more extensions ({others:,} files)")
+        lines += ["", "deepest:"]
+        lines += [f"  {d:>4}  {p}" for d, p in self.deepest]
+        lines += ["", "widest directories:"]
+        lines += [f"  {n:>8,}  {p}" for n, p in self.widest]
+        return "\n".join(lines)
+
+
+def write_summary(
+    out: TextIO, root: Path, items: Iterable[Tuple[Path, bool, int]], as_json: bool = False,
+) -> int:
+    """アイテム列を集計して概要を書き出す。戻り値は集計した件数"""
+    summary = TreeSummary().feed(items).finish()
+    if as_json:
+        json.dump(summary.to_dict(root), out, ensure_ascii=False, indent=2)
+    else:
+        out.write(summary.to_text(root))
+    return summary.total
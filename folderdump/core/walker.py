@@ -2,56 +2,201 @@
 """
 フォルダ走査ロジック
 - ディレクトリ走査
-- スキップログ
+- スキップログ（理由ごとの件数と先頭の例だけを保持。全件は任意でファイルへ）
 - 統計管理
 - 一時停止/キャンセル制御
+- 走査予算（件数・時間・ディレクトリあたり件数）と打ち切りマーカー
+- ディレクトリごとの表示件数上限（超過分は件数だけを数えて要約マーカーにする）
+- 包含パターン指定時は一致しうるディレクトリだけを走査し、一致の祖先を補って出力
+- 走査フック（Visitor。1 回の走査に複数登録でき、未登録なら実質コストなし）
+- 総件数の推定（ProgressEstimator。進捗率と残り時間）
 """
 
 import os
+import re
+import threading
 import time
 from pathlib import Path
-from typing import List, Tuple, Optional, Iterable
-
-from PySide6 import QtCore
+from typing import Dict, List, Tuple, Optional, Iterable, Iterator, TextIO
 
 from .utils import win_long
-from .filters import should_keep
-from .utils import win_long, strip_long_prefix
+from .filters import IncludeScope, Predicate, is_excluded, should_keep
+from .ordering import DEFAULT_ORDER, check_order, sort_pairs
+from .archives import (
+    ArchiveEntry, DEFAULT_ARCHIVE_LIMIT, archive_root, is_archive, load_archive, sorted_children,
+)
+from .utils import win_long, strip_long_prefix, IS_WIN
 
 
 
-def walk_sorted(dirpath: Path, dirs_first: bool) -> List[Tuple[os.DirEntry, bool]]:
+def walk_sorted(
+    dirpath: Path,
+    dirs_first: bool,
+    flags: Optional["CtlFlags"] = None,
+    budget: Optional["ScanBudget"] = None,
+    follow_symlinks: bool = False,
+    order: str = DEFAULT_ORDER,
+) -> List[Tuple[os.DirEntry, bool]]:
     """
     scandir を使ってフォルダ内を列挙し、ソートして返す
+    - flags: 列挙中もエントリごとにキャンセル/一時停止を確認（途中までの結果を返す）
+    - budget: max_per_dir 指定時は max_per_dir + 1 件で列挙を打ち切る
+      （呼び出し側は件数超過で打ち切りを判定できる）
+    - follow_symlinks: True ならディレクトリへのリンクもディレクトリとして扱う
+    - order: 並び順（ordering.ORDERS。"fs" なら列挙順のまま）
     """
     entries: List[os.DirEntry] = []
+    limit = None
+    if budget is not None and budget.max_per_dir is not None:
+        limit = budget.max_per_dir + 1
     scandir_path = win_long(dirpath)
     with os.scandir(scandir_path) as it:
         for e in it:
+            if flags is not None and not flags.checkpoint():
+                break
+            if budget is not None and budget.exceeded():
+                break
             entries.append(e)
+            if limit is not None and len(entries) >= limit:
+                break
+
+    # 種別はエントリごとに 1 回だけ判定し、ソートキーにも使う
+    pairs = [(e, _entry_is_dir(e, follow_symlinks)) for e in entries]
+    if order == "size":
+        return sort_pairs(pairs, order, dirs_first, size=lambda e: _entry_size(e, follow_symlinks))
+    return sort_pairs(pairs, order, dirs_first)
+
+
+def _entry_is_dir(e: os.DirEntry, follow_symlinks: bool) -> bool:
+    try:
+        return e.is_dir(follow_symlinks=follow_symlinks)
+    except OSError:
+        # 壊れたリンク等
+        return False
+
+
+def _entry_size(e: os.DirEntry, follow_symlinks: bool) -> int:
+    try:
+        return e.stat(follow_symlinks=follow_symlinks).st_size
+    except OSError:
+        return 0
+
+
+class ScanStream:
+    """
+    並べ替えない列挙（order="fs"）。scandir の結果をそのまま (DirEntry, is_dir) で流す
+    - ディレクトリ単位でリストを作らないため、最初のエントリをすぐに返せる
+    - scandir は生成時に開く（開けなければ OSError）。最後まで読むか破棄されたときに閉じる
+    - budget.max_per_dir 件を超えた時点で止め、truncated を立てる
+    """
+
+    def __init__(
+        self, dirpath: Path, budget: Optional["ScanBudget"] = None, follow_symlinks: bool = False,
+    ):
+        self._it = os.scandir(win_long(dirpath))
+        self.limit = budget.max_per_dir if budget is not None else None
+        self.follow_symlinks = follow_symlinks
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[Tuple[os.DirEntry, bool]]:
+        limit, follow = self.limit, self.follow_symlinks
+        n = 0
+        with self._it as it:
+            for e in it:
+                if limit is not None and n >= limit:
+                    self.truncated = True
+                    return
+                n += 1
+                yield e, _entry_is_dir(e, follow)
+
+    def close(self):
+        self._it.close()
 
-    if dirs_first:
-        entries.sort(key=lambda e: (not e.is_dir(follow_symlinks=False), e.name.lower()))
-    else:
-        entries.sort(key=lambda e: e.name.lower())
 
-    return [(e, e.is_dir(follow_symlinks=False)) for e in entries]
+# スキップログが理由の分類ごとにメモリへ残す例の件数
+DEFAULT_SKIP_EXAMPLES = 100
+
+_ERRNO_RE = re.compile(r"\s*\[(?:Errno|WinError) (-?\d+)\]\s*([^:]*)")
+
+
+def skip_kind(reason: str) -> str:
+    """
+    スキップ理由の分類（集計キー）
+    'OSError: [Errno 13] Permission denied: ...' → 'OSError [13] Permission denied'
+    'symlink loop: -> a' → 'symlink loop'（':' がなければ理由そのもの）
+    """
+    head, sep, rest = reason.partition(":")
+    if not sep:
+        return reason
+    m = _ERRNO_RE.match(rest)
+    if m:
+        return f"{head} [{m.group(1)}] {m.group(2).strip()}"
+    return head
 
 
 class SkipLog:
-    """スキップされたパスと理由を記録"""
+    """
+    スキップされたパスと理由を記録（件数によらずメモリ使用量は一定）
+    - 理由の分類（skip_kind）ごとに件数と先頭 max_examples 件の例だけを保持
+    - log_path 指定時は全件を「パス<TAB>理由」の行でファイルへ逐次書き出す（close() で閉じる）
+    """
 
-    def __init__(self):
-        self.rows: List[Tuple[str, str]] = []
+    def __init__(
+        self, max_examples: int = DEFAULT_SKIP_EXAMPLES, log_path: Optional[str | Path] = None,
+    ):
+        self.max_examples = max_examples
+        self.counts: Dict[str, int] = {}
+        self.examples: Dict[str, List[Tuple[str, str]]] = {}
+        self.log_path = Path(log_path) if log_path else None
+        self._log: Optional[TextIO] = None
+        if self.log_path is not None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = open(self.log_path, "w", encoding="utf-8", newline="")
 
     def add(self, path: str, reason: str):
-        self.rows.append((path, reason))
+        kind = skip_kind(reason)
+        n = self.counts.get(kind, 0)
+        self.counts[kind] = n + 1
+        if n < self.max_examples:
+            self.examples.setdefault(kind, []).append((path, reason))
+        if self._log is not None:
+            self._log.write(f"{path}\t{reason}\n")
+
+    @property
+    def rows(self) -> List[Tuple[str, str]]:
+        """保持している例（全件ではない）"""
+        return [row for rows in self.examples.values() for row in rows]
+
+    def summary(self) -> List[Tuple[str, int]]:
+        """(分類, 件数) を件数の多い順に"""
+        return sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))
 
     def to_text(self) -> str:
-        return "\n".join(f"{p}\t{r}" for p, r in self.rows)
+        """分類ごとの件数と例（省略分は件数だけ）"""
+        lines: List[str] = []
+        for kind, n in self.summary():
+            lines.append(f"# {kind}: {n:,}")
+            shown = self.examples.get(kind, [])
+            lines.extend(f"{p}\t{r}" for p, r in shown)
+            if n > len(shown):
+                lines.append(f"… and {n - len(shown):,} more")
+        return "\n".join(lines)
 
     def count(self) -> int:
-        return len(self.rows)
+        return sum(self.counts.values())
+
+    def merge(self, other: "SkipLog"):
+        """別のスキップログの件数と例を取り込む（other のファイル出力は取り込まない）"""
+        for kind, n in other.counts.items():
+            self.counts[kind] = self.counts.get(kind, 0) + n
+            room = self.max_examples - len(self.examples.get(kind, []))
+            if room > 0 and other.examples.get(kind):
+                self.examples.setdefault(kind, []).extend(other.examples[kind][:room])
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
 
 
 class Stats:
@@ -70,33 +215,605 @@ class Stats:
     def stop(self):
         self.end = time.time()
 
+    def merge(self, other: "Stats"):
+        """別の走査の件数・最大深さを合算（時間は合算しない）"""
+        self.total += other.total
+        self.max_depth_seen = max(self.max_depth_seen, other.max_depth_seen)
+
     @property
     def elapsed(self) -> float:
         return self.end - self.start
 
 
+class ProgressEstimator:
+    """
+    走査しながら総エントリ数を推定し、進捗率と残り時間を返す
+    - 深さごとに「1 ディレクトリあたりの件数」「潜る子ディレクトリ数」を集計し、
+      まだ列挙していないディレクトリ（列挙済みの親の中で未到達のもの）の配下の件数を外挿する
+    - ルートがマウントポイントで絞り込みがなければ、os.statvfs の使用 inode 数を総数とみなす
+    - 件数は列挙した（scandir で読んだ）エントリ数。フィルタで出力しないものも含む
+    - 推定は走査が進むほど精度が上がる。完了までは fraction() を 0.99 で頭打ちにする
+    - 並べ替えない列挙（order="fs"）は先読みできないため、inode 数が使えなければ推定しない（None）
+    iter_paths(estimator=...) に渡し、progress_cb の呼び出し時などに fraction() / eta() を読む。
+    """
+
+    def __init__(self):
+        self.done = 0
+        self.listings: Dict[int, int] = {}   # 深さ -> 列挙したディレクトリ数
+        self.entries: Dict[int, int] = {}    # 深さ -> その直下のエントリ数の合計
+        self.subdirs: Dict[int, int] = {}    # 深さ -> 直下の（深さ制限内の）ディレクトリ数の合計
+        self.pending: Dict[int, int] = {}    # 深さ -> 列挙済みの親の中でまだ到達していないディレクトリ数
+        self.reached = 0
+        self.streaming = False
+        self.max_depth: Optional[int] = None
+        self.inode_total: Optional[int] = None
+        self.start_time = time.monotonic()
+
+    def bind(self, root: Path, max_depth: Optional[int], unfiltered: bool):
+        """走査開始時に呼ぶ（絞り込みなしでマウントポイント全体を走査するなら inode 数を使う）"""
+        self.max_depth = max_depth
+        self.start_time = time.monotonic()
+        if unfiltered and max_depth is None and hasattr(os, "statvfs"):
+            try:
+                if os.path.ismount(root):
+                    st = os.statvfs(root)
+                    used = st.f_files - st.f_ffree
+                    # f_files を報告しないファイルシステム（btrfs 等）は 0
+                    if used > 0:
+                        self.inode_total = used
+            except OSError:
+                pass
+
+    def listed(self, depth: int, count: int, dirs: int):
+        """depth のディレクトリを列挙した（count 件、うち潜りうるディレクトリ dirs 件）"""
+        self.done += count
+        self.listings[depth] = self.listings.get(depth, 0) + 1
+        self.entries[depth] = self.entries.get(depth, 0) + count
+        self.subdirs[depth] = self.subdirs.get(depth, 0) + dirs
+        self.pending[depth + 1] = self.pending.get(depth + 1, 0) + dirs
+
+    def streamed(self):
+        """並べ替えない列挙で 1 件読んだ（先読みできないため件数だけ数える）"""
+        self.done += 1
+        self.streaming = True
+
+    def reach(self, depth: int):
+        """列挙済みの親の中で、depth のディレクトリに到達した（潜るかどうかはこの後決まる）"""
+        n = self.pending.get(depth, 0)
+        if n > 0:
+            self.pending[depth] = n - 1
+            self.reached += 1
+
+    def total(self) -> Optional[int]:
+        """推定総件数（列挙済み + 未到達ディレクトリ配下の外挿）。推定できなければ None"""
+        if self.inode_total is not None:
+            return max(self.inode_total, self.done)
+        if self.streaming or not self.listings:
+            return None
+        # 到達したディレクトリのうち実際に潜った割合（除外・リンク等で潜らないものを差し引く）
+        entered = sum(self.listings.values()) - self.listings.get(0, 0)
+        ratio = min(1.0, entered / self.reached) if self.reached else 1.0
+        deepest = max(self.listings)
+        # sub[d] = 深さ d のディレクトリ 1 つの配下の推定件数（深い方から求める。未観測の深さは
+        # 最も深い観測値で 1 段だけ外挿する）
+        sub: Dict[int, float] = {}
+        below = 0.0
+        for d in range(deepest + 1, 0, -1):
+            src = min(d, deepest)
+            n = self.listings.get(src) or 1
+            per_dir = self.entries.get(src, 0) / n
+            fan = self.subdirs.get(d, 0) / n * ratio if d <= deepest else 0.0
+            below = per_dir + fan * below
+            sub[d] = below
+        remaining = sum(n * ratio * sub.get(d, 0.0) for d, n in self.pending.items() if n > 0)
+        return self.done + int(remaining)
+
+    def fraction(self) -> Optional[float]:
+        """進捗率（0〜0.99）。推定できなければ None"""
+        total = self.total()
+        if total is None:
+            return None
+        if total <= 0:
+            return 0.0
+        return min(0.99, self.done / total)
+
+    def eta(self) -> Optional[float]:
+        """残り時間の推定（秒）。推定できない・進捗が小さすぎるうちは None"""
+        f = self.fraction()
+        elapsed = time.monotonic() - self.start_time
+        if f is None or f < 0.01 or elapsed < 1.0:
+            return None
+        return elapsed * (1.0 - f) / f
+
+
+class Visitor:
+    """
+    走査フック。必要なメソッドだけ上書きして iter_paths(visitors=[...]) に渡す
+    （上書きされていないメソッドは呼ばれないため、使わないフックの呼び出しコストはかからない）
+    - on_enter_dir(rel, depth): ディレクトリの列挙に成功し、中へ入るとき（ルートは rel=Path(""), depth=0）
+    - on_entry(rel, entry, is_dir, depth): 出力するエントリごと（entry は os.DirEntry か ArchiveEntry）
+      包含パターン・メタデータ条件で補われる祖先ディレクトリは含まない
+    - on_exit_dir(rel, depth): ディレクトリの配下を出し終えたとき（キャンセル/予算切れの途中では呼ばない）
+    - on_skip(path, reason): SkipLog に記録するとき
+    呼び出し順は行きがけ順（on_entry(dir) → on_enter_dir(dir) → 配下 → on_exit_dir(dir)）。
+    非同期版では on_skip だけ executor のスレッドから呼ばれる。
+    """
+
+    def on_enter_dir(self, rel: Path, depth: int):
+        pass
+
+    def on_entry(self, rel: Path, entry, is_dir: bool, depth: int):
+        pass
+
+    def on_exit_dir(self, rel: Path, depth: int):
+        pass
+
+    def on_skip(self, path: str, reason: str):
+        pass
+
+
+def _hooks(visitors: Iterable, name: str) -> list:
+    """visitors のうち name を上書きしているもののバウンドメソッド"""
+    base = getattr(Visitor, name)
+    return [getattr(v, name) for v in visitors if getattr(type(v), name, base) is not base]
+
+
 class CtlFlags:
-    """走査キャンセル／一時停止フラグ（Python実装版）"""
+    """
+    走査キャンセル／一時停止フラグ（threading.Event 実装）
+    - 一時停止中はポーリングせず Event で待機し、再開/キャンセルで即座に起床する
+    - checkpoint() はエントリごとに呼べる程度に軽量
+    """
 
     def __init__(self):
-        self._canceled = False
-        self._paused = False
+        self._canceled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
 
     def cancel(self):
-        self._canceled = True
+        self._canceled.set()
+        # 一時停止中の待機も解除する
+        self._running.set()
 
     def is_canceled(self) -> bool:
-        return self._canceled
+        return self._canceled.is_set()
 
     def pause(self):
-        self._paused = True
+        if not self._canceled.is_set():
+            self._running.clear()
 
     def resume(self):
-        self._paused = False
+        self._running.set()
 
     def is_paused(self) -> bool:
-        return self._paused
+        return not self._running.is_set()
+
+    def wait_if_paused(self, timeout: Optional[float] = None) -> bool:
+        """一時停止中なら再開/キャンセルまでブロック。続行してよければ True"""
+        if not self._running.is_set():
+            self._running.wait(timeout)
+        return not self._canceled.is_set()
+
+    def checkpoint(self) -> bool:
+        """走査ループ内の確認点。一時停止なら待機し、キャンセル済みなら False"""
+        if not self._running.is_set():
+            self._running.wait()
+        return not self._canceled.is_set()
+
+
+class ScanBudget:
+    """
+    走査予算
+    - max_entries: 出力件数の上限（複数ルートで共有可能）
+    - max_seconds: 最初の確認からの経過時間の上限
+    - max_per_dir: 1 ディレクトリあたりの列挙件数の上限
+    上限に達した箇所には Marker が差し込まれる
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_per_dir: Optional[int] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_seconds = max_seconds
+        self.max_per_dir = max_per_dir
+        self.used: int = 0
+        self.reason: Optional[str] = None
+        self._deadline: Optional[float] = None
+
+    def start(self):
+        """時間予算の計測を開始（既に開始済みなら何もしない）"""
+        if self.max_seconds is not None and self._deadline is None:
+            self._deadline = time.monotonic() + self.max_seconds
+
+    def tick(self):
+        self.used += 1
+
+    def exceeded(self) -> bool:
+        """総件数/時間の予算を使い切ったか（理由は reason に記録）"""
+        if self.reason is not None:
+            return True
+        if self.max_entries is not None and self.used >= self.max_entries:
+            self.reason = f"entry budget {self.max_entries:,} reached"
+        elif self._deadline is not None and time.monotonic() >= self._deadline:
+            self.reason = f"time budget {self.max_seconds:g}s reached"
+        return self.reason is not None
+
+    def dir_truncated(self, listed: int) -> bool:
+        return self.max_per_dir is not None and listed > self.max_per_dir
+
+
+class Marker(tuple):
+    """
+    出力に差し込む打ち切りマーカー
+    (rel, is_dir, depth) の 3 要素タプルとして振る舞い、rel の末尾がラベルになるため
+    マーカーを知らないレンダラでも名前として表示される。
+    """
 
+    def __new__(cls, parent: Path, depth: int, label: str):
+        obj = super().__new__(cls, (parent / label, False, depth))
+        obj.label = label
+        return obj
+
+
+def is_marker(item) -> bool:
+    return isinstance(item, Marker)
+
+
+class _Held(tuple):
+    """包含パターンで保留中のディレクトリ（配下に一致が出た時点で出力する）"""
+
+    def __new__(cls, rel: Path, depth: int):
+        return super().__new__(cls, (rel, True, depth))
+
+
+def fanout_marker(parent: Path, depth: int, dirs: int, files: int) -> Marker:
+    """表示件数上限を超えた子の要約マーカー（… and N more (d dirs, f files)）"""
+    return Marker(parent, depth, f"… and {dirs + files:,} more ({dirs:,} dirs, {files:,} files)")
+
+
+class _Walk:
+    """
+    iter_paths / aiter_paths 共通の走査状態と 1 ディレクトリ分の処理
+    - list_dir: 列挙（ブロッキング I/O。非同期版では executor 上で実行）
+    - visit: 列挙結果にフィルタ・深さ・予算を適用し (出力, 子ディレクトリ, DirEntry) を返す
+    - on_entry / on_enter_dir / on_exit_dir / on_skip: 登録された走査フック（なければ空リスト）
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_depth: Optional[int],
+        follow_symlinks: bool,
+        includes: List[str],
+        excludes: List[str],
+        dirs_first: bool,
+        folders_only: bool,
+        flags: CtlFlags,
+        skiplog: SkipLog,
+        stats: Stats,
+        progress_cb=None,
+        negates: List[str] | None = None,
+        budget: Optional[ScanBudget] = None,
+        follow_outside: bool = False,
+        archives: bool = False,
+        archive_limit: Optional[int] = DEFAULT_ARCHIVE_LIMIT,
+        max_fanout: Optional[int] = None,
+        predicate: Optional[Predicate] = None,
+        visitors: Optional[List[Visitor]] = None,
+        order: str = DEFAULT_ORDER,
+        estimator: Optional[ProgressEstimator] = None,
+    ):
+        # root を通常形式の絶対パスに統一
+        self.root = Path(strip_long_prefix(str(root.resolve())))
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+        self.follow_outside = follow_outside
+        self.archives = archives
+        self.archive_limit = archive_limit
+        self.max_fanout = max_fanout
+        # リンク追跡時のみ、辿ったディレクトリを (st_dev, st_ino) -> 相対パス で記録
+        self.visited: Dict[Tuple[int, int], Path] = {}
+        if follow_symlinks:
+            try:
+                st = os.stat(win_long(self.root))
+                self.visited[(st.st_dev, st.st_ino)] = Path("")
+            except OSError:
+                # 使えないルートは list_dir が SkipLog に残して空の走査になる
+                pass
+        self.includes = includes
+        self.excludes = excludes
+        self.negates = negates
+        # 包含パターン指定時：配下に一致しうるディレクトリだけ潜り、
+        # 包含に一致しないディレクトリは配下の一致が出るまで保留（held）する
+        self.scope = IncludeScope(list(includes) + list(negates or [])) if includes else None
+        self.held: List[Tuple[Path, bool, int]] = []
+        # メタデータ条件：名前のフィルタを通ったものだけを評価し、合わないディレクトリは保留して潜る
+        self.predicate = predicate or None
+        self.holds = self.scope is not None or self.predicate is not None
+        self.dirs_first = dirs_first
+        self.order = check_order(order)
+        self.folders_only = folders_only
+        self.flags = flags
+        self.skiplog = skiplog
+        self.stats = stats
+        self.progress_cb = progress_cb
+        self.budget = budget
+        if budget is not None:
+            budget.start()
+        visitors = list(visitors or [])
+        self.on_entry = _hooks(visitors, "on_entry")
+        self.on_enter_dir = _hooks(visitors, "on_enter_dir")
+        self.on_exit_dir = _hooks(visitors, "on_exit_dir")
+        self.on_skip = _hooks(visitors, "on_skip")
+        self._skip_lock = threading.Lock()
+        self.estimator = estimator
+        if estimator is not None:
+            filtered = includes or excludes or negates or predicate or follow_symlinks or archives
+            estimator.bind(self.root, max_depth, unfiltered=not filtered)
+
+    def skip(self, path: str, reason: str):
+        """SkipLog への記録（on_skip フックにも通知。非同期版では複数の列挙スレッドから呼ばれる）"""
+        with self._skip_lock:
+            self.skiplog.add(path, reason)
+            for hook in self.on_skip:
+                hook(path, reason)
+
+    def entered(self, rel: Path, depth: int):
+        for hook in self.on_enter_dir:
+            hook(rel, depth)
+
+    def exited(self, rel: Path, depth: int):
+        for hook in self.on_exit_dir:
+            hook(rel, depth)
+
+    def start(self) -> Tuple[Path, Path, int]:
+        return (self.root, Path(""), 0)
+
+    def stopped(self) -> bool:
+        """キャンセル済み、または総件数/時間の予算切れ"""
+        if self.flags.is_canceled():
+            return True
+        return self.budget is not None and self.budget.reason is not None
+
+    def list_dir(self, current) -> Optional[List[Tuple[os.DirEntry, bool]] | ScanStream]:
+        """current 直下を列挙（walk_sorted 内で win_long を使用。order="fs" なら ScanStream）。失敗時は None"""
+        if isinstance(current, ArchiveEntry):
+            # アーカイブ内の仮想ディレクトリ（ルートならここで目録を読む）
+            try:
+                load_archive(current, self.archive_limit)
+            except OSError as e:
+                self.skip(current.path, f"OSError: {e}")
+                return None
+            return sorted_children(current, self.dirs_first, self.order)
+        try:
+            if self.order == "fs":
+                return ScanStream(current, budget=self.budget, follow_symlinks=self.follow_symlinks)
+            return walk_sorted(
+                current, self.dirs_first, flags=self.flags, budget=self.budget,
+                follow_symlinks=self.follow_symlinks, order=self.order,
+            )
+        except PermissionError:
+            self.skip(str(current), "PermissionError on scandir")
+        except OSError as e:
+            self.skip(str(current), f"OSError: {e}")
+        return None
+
+    def visit(
+        self,
+        current: Path,
+        listed: List[Tuple[os.DirEntry, bool]] | ScanStream,
+        rel_dir: Path,
+        depth: int,
+    ) -> Iterator[Tuple[
+        Optional[Tuple[Path, bool, int]], Optional[Tuple[Path, Path, int]], Optional[os.DirEntry],
+    ]]:
+        """
+        列挙結果を先頭から 1 件ずつ判定し
+        (出力アイテム or None, 潜る子ディレクトリ or None, 出力したエントリの DirEntry or None) を返す。
+        呼び出し側は子ディレクトリを受け取った時点で潜る（行きがけ順の深さ優先）。
+        キャンセル/予算切れでは途中で終了する（stopped() で判別）。
+        """
+        flags, budget, stats = self.flags, self.budget, self.stats
+        max_depth, max_fanout, scope = self.max_depth, self.max_fanout, self.scope
+        predicate = self.predicate
+        if not flags.checkpoint():
+            if isinstance(listed, ScanStream):
+                listed.close()
+            return
+        # ScanStream は列挙しながら件数上限を判定する（truncated は読み終えてから確定）
+        truncated = (
+            isinstance(listed, list) and budget is not None and budget.dir_truncated(len(listed))
+        )
+        if truncated:
+            listed = listed[:budget.max_per_dir]
+        est = self.estimator
+        if est is not None and isinstance(listed, list):
+            if max_depth is None or depth + 1 < max_depth:
+                sub = sum(1 for _, d in listed if d)
+            else:
+                sub = 0
+            est.listed(depth, len(listed), sub)
+        # 表示件数上限：超過分は出力も潜りもせず種別ごとに数えるだけ
+        shown = hidden_dirs = hidden_files = 0
+
+        try:
+            for entry, is_dir in listed:
+                if not flags.checkpoint():
+                    return
+                if budget is not None and budget.exceeded():
+                    yield (Marker(rel_dir, depth + 1, f"… truncated ({budget.reason})"), None, None)
+                    return
+
+                if est is not None:
+                    if isinstance(listed, list):
+                        if is_dir:
+                            est.reach(depth + 1)
+                    else:
+                        est.streamed()
+
+                # 相対パスはリンクを解決せず、辿ってきたパス上の名前で組み立てる
+                rel = rel_dir / entry.name
+
+                # アーカイブはディレクトリとして扱う（アーカイブ内のアーカイブは対象外）
+                archive = None
+                if (
+                    self.archives and not is_dir and not isinstance(entry, ArchiveEntry)
+                    and is_archive(entry.name)
+                ):
+                    archive = archive_root(entry.path, entry.name)
+                    is_dir = True
+
+                # フィルタ判定（否定 > 除外 > 包含）
+                held = False
+                if not should_keep(rel, is_dir, self.includes, self.excludes, negates=self.negates):
+                    # 包含だけで落ちたディレクトリは、配下に一致がありうれば保留して潜る
+                    if not (
+                        is_dir and scope is not None and scope.may_contain(rel)
+                        and not is_excluded(rel, self.excludes, self.negates)
+                    ):
+                        continue
+                    held = True
+
+                # メタデータ条件（名前で落ちなかったものだけ。stat は DirEntry のキャッシュを使う）
+                if (
+                    predicate is not None and not held and ((not self.folders_only) or is_dir)
+                    and not predicate.matches(entry, is_dir)
+                ):
+                    if not is_dir:
+                        continue
+                    held = True
+
+                # 出力（フォルダのみ or すべて）
+                item = None
+                if held:
+                    item = _Held(rel, depth + 1)
+                elif (not self.folders_only) or is_dir:
+                    if max_fanout is not None and shown >= max_fanout:
+                        if is_dir:
+                            hidden_dirs += 1
+                        else:
+                            hidden_files += 1
+                        continue
+                    shown += 1
+                    item = (rel, is_dir, depth + 1)
+                    stats.tick(depth + 1)
+                    if budget is not None:
+                        budget.tick()
+                    if self.progress_cb and stats.total % 50 == 0:
+                        self.progress_cb(stats.total)
+
+                # ディレクトリならスタックへ（深さ制限・包含パターンで一致しえない配下は列挙しない）
+                child = None
+                descend = is_dir and (max_depth is None or depth + 1 < max_depth) and (
+                    scope is None or scope.may_contain(rel)
+                )
+                if archive is not None:
+                    if descend:
+                        child = (archive, rel, depth + 1)
+                elif is_dir and isinstance(entry, ArchiveEntry):
+                    if descend:
+                        child = (entry, rel, depth + 1)
+                elif descend:
+                    try:
+                        # シンボリックリンク制御
+                        is_link = entry.is_symlink()
+                        if self.follow_symlinks or not is_link:
+                            if not self.follow_symlinks or self._claim_dir(entry, rel, is_link):
+                                # push 時も通常形式に統一
+                                child = (Path(strip_long_prefix(entry.path)), rel, depth + 1)
+                    except PermissionError:
+                        self.skip(entry.path, "PermissionError on child append")
+
+                if item is not None or child is not None:
+                    yield (item, child, None if held else entry)
+
+            if hidden_dirs or hidden_files:
+                yield (fanout_marker(rel_dir, depth + 1, hidden_dirs, hidden_files), None, None)
+            if truncated or getattr(listed, "truncated", False):
+                yield (Marker(
+                    rel_dir, depth + 1,
+                    f"… truncated (max {budget.max_per_dir:,} entries per directory)",
+                ), None, None)
+            if getattr(current, "truncated", False):
+                yield (Marker(
+                    rel_dir, depth + 1,
+                    f"… truncated (archive entry cap {self.archive_limit:,})",
+                ), None, None)
+
+        except PermissionError:
+            self.skip(str(current), "PermissionError on scandir")
+        except OSError as e:
+            self.skip(str(current), f"OSError: {e}")
+        finally:
+            # 途中で打ち切られても scandir を閉じる
+            if isinstance(listed, ScanStream):
+                listed.close()
+
+    def settle(self, item: Tuple[Path, bool, int]) -> List[Tuple[Path, bool, int]]:
+        """
+        包含パターン・メタデータ条件の指定時に、visit の出力を実際に出すアイテム列へ変換する
+        - 保留ディレクトリは積むだけ。一致したアイテムが来たら保留中の祖先を先に出す
+        - 行きがけ順なので、同じか深い位置の保留は祖先ではなく（配下に一致がなかった）捨ててよい
+        """
+        held = self.held
+        depth = item[2]
+        while held and held[-1][2] >= depth:
+            held.pop()
+        if isinstance(item, _Held):
+            held.append(item)
+            return []
+        if not held:
+            return [item]
+        out = []
+        for rel, _, d in held:
+            out.append((rel, True, d))
+            self.stats.tick(d)
+            if self.budget is not None:
+                self.budget.tick()
+        held.clear()
+        out.append(item)
+        return out
+
+    def _claim_dir(self, entry: os.DirEntry, rel: Path, is_link: bool) -> bool:
+        """
+        リンク追跡時、ディレクトリを辿ってよいか判定し visited に記録する。
+        同じ (st_dev, st_ino) は二度辿らず、ループ/重複は SkipLog に残す。
+        ルート内を指すリンクは実体のパスで走査されるため辿らない（リンクが実体より先に並んでも
+        実体を奪わない）。
+        """
+        try:
+            # Windows の DirEntry.stat() は st_ino/st_dev が 0 のため os.stat を使う
+            st = os.stat(entry.path) if IS_WIN else entry.stat()
+        except OSError as e:
+            self.skip(entry.path, f"OSError: {e}")
+            return False
+
+        if is_link:
+            target = Path(os.path.realpath(strip_long_prefix(entry.path)))
+            if target.is_relative_to(self.root):
+                inside = target.relative_to(self.root)
+                if inside == Path("") or inside in rel.parents:
+                    self.skip(entry.path, f"symlink loop: -> {inside.as_posix()}")
+                else:
+                    self.skip(entry.path, f"symlink inside root: -> {inside.as_posix()}")
+                return False
+            if not self.follow_outside:
+                self.skip(entry.path, f"symlink outside root: {target}")
+                return False
+
+        key = (st.st_dev, st.st_ino)
+        seen = self.visited.get(key)
+        if seen is not None:
+            if seen == Path("") or seen in rel.parents:
+                self.skip(entry.path, f"symlink loop: -> {seen.as_posix() or '.'}")
+            else:
+                self.skip(entry.path, f"already visited: {seen.as_posix()}")
+            return False
+        self.visited[key] = rel
+        return True
 
 
 def iter_paths(
@@ -112,69 +829,80 @@ def iter_paths(
     stats: Stats,
     progress_cb=None,
     negates: List[str] | None = None,
+    budget: Optional[ScanBudget] = None,
+    follow_outside: bool = False,
+    archives: bool = False,
+    archive_limit: Optional[int] = DEFAULT_ARCHIVE_LIMIT,
+    max_fanout: Optional[int] = None,
+    predicate: Optional[Predicate] = None,
+    visitors: Optional[List[Visitor]] = None,
+    order: str = DEFAULT_ORDER,
+    estimator: Optional[ProgressEstimator] = None,
 ) -> Iterable[Tuple[Path, bool, int]]:
     """
-    ディレクトリツリーを深さ優先で走査するジェネレータ
+    ディレクトリツリーを深さ優先（行きがけ順）で走査するジェネレータ
+    - 各エントリの直後にその子孫が続く（親は必ず子より先に出力される）
     - .gitignore 否定(!)対応：negates による保持優先
     - Windows 長パス (\\?\\) を相対化前に剥がして統一
     - シンボリックリンクは follow_symlinks で切替
+      （(st_dev, st_ino) で同じディレクトリを二度辿らない。ループは SkipLog に記録）
+    - リンクはリンク側のパスで出力。ルート外を指すリンクは follow_outside=True の時のみ辿る
+    - archives=True なら zip/tar をディレクトリとして扱い、展開せず目録だけを列挙
+      （深さ・フィルタはアーカイブ境界を越えて継続。archive_limit 件で打ち切り）
+    - キャンセル/一時停止はエントリごとに確認（列挙中も含む）
+    - budget 指定時は上限到達箇所に Marker を出力して打ち切る
+    - max_fanout 指定時は各ディレクトリの先頭 max_fanout 件だけを出力し、残りは
+      "… and N more (d dirs, f files)" マーカーに要約（残りの配下は走査しない）
+    - includes 指定時は配下に一致しうるディレクトリだけを列挙し、一致したエントリの
+      祖先ディレクトリは包含パターンに合わなくても出力する（配下に一致がなければ出さない）
+    - predicate（filters.Predicate）指定時は名前のフィルタを通ったエントリだけを評価し、
+      一致したものを出力する。一致しないディレクトリにも潜り、配下に一致があれば祖先として出力する
+    - visitors（Visitor のリスト）指定時は同じ走査の中で各フックを呼ぶ（集計を 1 回の走査で済ませる）
+    - order で直下の並び順を選ぶ（name / natural / size / fs。fs は並べ替えずに列挙しながら出力し、
+      開いているディレクトリの scandir は深さの数だけ同時に開いたままになる）
+    - estimator（ProgressEstimator）指定時は列挙しながら総件数を推定する（進捗率・残り時間）
     """
-    # root を通常形式の絶対パスに統一
-    root = Path(strip_long_prefix(str(root.resolve())))
-
-    stack: List[Tuple[Path, int]] = [(root, 0)]
-
-    while stack:
-        if flags.is_canceled():
+    walk = _Walk(
+        root, max_depth, follow_symlinks, includes, excludes, dirs_first, folders_only,
+        flags, skiplog, stats, progress_cb=progress_cb, negates=negates, budget=budget,
+        follow_outside=follow_outside, archives=archives, archive_limit=archive_limit,
+        max_fanout=max_fanout, predicate=predicate, visitors=visitors, order=order,
+        estimator=estimator,
+    )
+    on_entry = walk.on_entry
+    # 行きがけ順の深さ優先：ディレクトリごとの (visit イテレータ, rel, depth) を積む
+    frames: List[Tuple[Iterator, Path, int]] = []
+    current, rel_dir, depth = walk.start()
+    listed = walk.list_dir(current)
+    if listed is not None:
+        walk.entered(rel_dir, depth)
+        frames.append((walk.visit(current, listed, rel_dir, depth), rel_dir, depth))
+
+    while frames:
+        if not flags.checkpoint():
             break
-        while flags.is_paused():
-            QtCore.QThread.msleep(100)
-
-        current, depth = stack.pop()
-        if max_depth is not None and depth > max_depth:
-            continue
-
         try:
-            # current 直下を列挙（walk_sorted 内で win_long を使用）
-            for entry, is_dir in reversed(walk_sorted(current, dirs_first)):
-                # DirEntry.path (\\?\...) -> 通常形式にしてから絶対化
-                entry_abs = Path(strip_long_prefix(entry.path)).resolve()
-
-                # 相対化（形式が揃っていれば OK）
-                try:
-                    rel = entry_abs.relative_to(root)
-                except ValueError:
-                    # サブパスでない（ドライブ跨ぎ・リンクなど）→安全側でスキップ
-                    skiplog.add(entry.path, "ValueError: not a subpath")
-                    continue
-
-                # フィルタ判定（否定 > 除外 > 包含）
-                if not should_keep(rel, is_dir, includes, excludes, negates=negates):
-                    continue
-
-                # 出力（フォルダのみ or すべて）
-                if (not folders_only) or (folders_only and is_dir):
-                    yield (rel, is_dir, depth + 1)
-                    stats.tick(depth + 1)
-                    if progress_cb and stats.total % 50 == 0:
-                        progress_cb(stats.total)
-
-                # ディレクトリならスタックへ
-                if is_dir:
-                    try:
-                        # シンボリックリンク制御
-                        if entry.is_symlink() and not follow_symlinks:
-                            continue
-                        # 深さ制限チェック
-                        if max_depth is None or depth + 1 < max_depth:
-                            # push 時も通常形式に統一
-                            stack.append((Path(strip_long_prefix(entry.path)), depth + 1))
-                    except PermissionError:
-                        skiplog.add(entry.path, "PermissionError on child append")
-                        continue
-
-        except PermissionError:
-            skiplog.add(str(current), "PermissionError on scandir")
-        except OSError as e:
-            skiplog.add(str(current), f"OSError: {e}")
+            item, child, entry = next(frames[-1][0])
+        except StopIteration:
+            _, rel_dir, depth = frames.pop()
+            if walk.stopped():
+                break
+            walk.exited(rel_dir, depth)
+            continue
 
+        if entry is not None and on_entry:
+            for hook in on_entry:
+                hook(item[0], entry, item[1], item[2])
+        if item is not None:
+            if not walk.holds:
+                yield item
+            else:
+                yield from walk.settle(item)
+        if child is not None:
+            current, rel_dir, depth = child
+            if max_depth is not None and depth > max_depth:
+                continue
+            listed = walk.list_dir(current)
+            if listed is not None:
+                walk.entered(rel_dir, depth)
+                frames.append((walk.visit(current, listed, rel_dir, depth), rel_dir, depth))
@@ -0,0 +1,583 @@
+# -*- coding: utf-8 -*-
+"""
+走査デーモン（常駐して走査結果をメモリに保持し、Unix ドメインソケットで描画要求に答える）
+- 同じツリーを何度もダンプするビルドスクリプト向け。起動・import・冷えた走査のコストを 1 回にする
+- 走査結果は WatchedCache（LRU）に保持。inotify が使えればフォルダの変更で破棄し、
+  監視できない結果は ttl 秒で期限切れにする
+- 要求は CLI の引数そのもの（run）か、GUI のワーカーからの 1 ルート分の走査（scan）
+  run は標準出力・標準エラーをフレームで返し、scan はアイテム列を返す（通信は folderdump.client）
+- ルート・出力先の相対パスは要求元のカレントディレクトリで解決する
+  （そのため summary / html のルート名は絶対パスで表示される）
+
+例:
+    python -m folderdump.daemon &                # 起動（--no-watch で監視なし、--ttl で期限）
+    python -m folderdump src -o tree             # 動いていれば自動的にデーモンへ依頼
+    python -m folderdump.daemon --status         # キャッシュの状態
+    python -m folderdump.daemon --stop           # 停止
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import socketserver
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from folderdump.cli import build_parser, execute
+from folderdump.client import connect, read_frame, request, send_frame, socket_path
+from folderdump.core.gitindex import find_git_dir
+from folderdump.core.archives import is_archive
+from folderdump.core.job import DumpJob, ScanKey
+from folderdump.core.scan_cache import DEFAULT_MAX_ITEMS, DEFAULT_MAX_SCANS, CachedScan, ScanCache
+from folderdump.core.walker import CtlFlags, Marker, ScanBudget, SkipLog, Stats, is_marker
+
+# 監視できない走査結果の有効期限（秒）
+DEFAULT_TTL = 5.0
+
+# scan 応答の 1 フレームあたりのアイテム数
+_ITEMS_PER_FRAME = 2000
+
+# 標準出力・標準エラーを送る単位（文字数）
+_FLUSH_CHARS = 1 << 16
+
+# inotify（linux/inotify.h）
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_CLOEXEC = 0o2000000
+# 構成が変わる（走査結果を破棄する）イベント
+_IN_STRUCTURE = (
+    _IN_ATTRIB | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED
+)
+_IN_MASK = _IN_STRUCTURE & ~_IN_IGNORED | _IN_MODIFY | _IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """inotify の最小限のラッパー（ctypes。Linux 以外・使えない環境では open() が None）"""
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self.fd = fd
+
+    @classmethod
+    def open(cls) -> Optional["_Inotify"]:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            fd = libc.inotify_init1(_IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def add(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _IN_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def remove(self, wd: int):
+        # カーネル側で外れた監視（IN_IGNORED 後）は EINVAL になるだけ
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """
+        [(wd, mask, 名前), ...]（timeout 秒待ってもなければ空）
+        名前は監視フォルダ直下のエントリ名（フォルダ自体のイベントなら空）
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 1 << 16)
+        events = []
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, mask, _, n = _EVENT.unpack_from(data, pos)
+            start = pos + _EVENT.size
+            name = os.fsdecode(data[start:start + n].rstrip(b"\0"))
+            events.append((wd, mask, name))
+            pos = start + n
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class WatchedCache(ScanCache):
+    """
+    変更監視つきの走査結果キャッシュ
+    - ルートと出力に含まれるフォルダを inotify で監視し、作成・削除・名前変更・属性変更で破棄する
+      （ファイルの書き込みだけなら、サイズ順の結果は破棄し、それ以外は保持しているダイジェストだけ捨てる。
+        ただし .gitignore（use_gitignore 時）とアーカイブ（scan_archives 時）は中身が結果を変えるため破棄する）
+    - 監視できない結果（inotify がない、監視数の上限、包含パターン・メタデータ条件つき）は ttl 秒で期限切れ
+      （包含パターン・条件に一致しないフォルダは出力に現れず、その中の変更を監視できないため）
+    - リスティングはファイルのあるフォルダを監視する
+    """
+
+    def __init__(
+        self,
+        max_items: int = DEFAULT_MAX_ITEMS,
+        max_scans: int = DEFAULT_MAX_SCANS,
+        watch: bool = True,
+        ttl: float = DEFAULT_TTL,
+    ):
+        super().__init__(max_items=max_items, max_scans=max_scans)
+        self.ttl = ttl
+        self.inotify = _Inotify.open() if watch else None
+        self._wd_keys: Dict[int, Set[ScanKey]] = {}
+        self._key_wds: Dict[ScanKey, List[int]] = {}
+        self._expires: Dict[ScanKey, float] = {}
+        self._watch_lock = threading.Lock()
+        self._stop = threading.Event()
+        if self.inotify is not None:
+            threading.Thread(
+                target=self._read_events, name="folderdump-inotify", daemon=True,
+            ).start()
+
+    def get(self, key: Hashable) -> Optional[CachedScan]:
+        with self._watch_lock:
+            expires = self._expires.get(key)
+        if expires is not None and time.monotonic() >= expires:
+            self.discard(key)
+            return None
+        return super().get(key)
+
+    def put(self, key: Hashable, scan: CachedScan) -> bool:
+        if not super().put(key, scan):
+            return False
+        dirs = self._watch_dirs(key, scan)
+        with self._watch_lock:
+            if dirs is None or not self._watch(key, dirs):
+                self._expires[key] = time.monotonic() + self.ttl
+        if key not in self:
+            # 監視を始める前に追い出された
+            self._dropped(key)
+        return True
+
+    def _watch_dirs(self, key: ScanKey, scan: CachedScan) -> Optional[List[str]]:
+        """監視するフォルダ（監視では変更を捉えきれない条件なら None）"""
+        if self.inotify is None or key.includes or key.predicate is not None:
+            return None
+        root = key.root
+        if key.listing:
+            return [os.path.dirname(root)]
+        dirs = [root]
+        # マーカーは is_dir=False
+        dirs.extend(os.path.join(root, rel) for rel, is_dir, _ in scan.items if is_dir)
+        if key.git_index:
+            git_dir = find_git_dir(Path(root))
+            if git_dir is not None:
+                dirs.append(str(git_dir))
+        return dirs
+
+    def _watch(self, key: ScanKey, dirs: List[str]) -> bool:
+        """dirs を監視に加える（_watch_lock 内で呼ぶ。監視しきれなければ加えた分を戻して False）"""
+        wds: List[int] = []
+        ok = True
+        for d in dirs:
+            try:
+                wd = self.inotify.add(d)
+            except OSError as e:
+                # アーカイブの中身はフォルダではない（アーカイブ自体の変更は親フォルダで捉える）
+                if e.errno == errno.ENOTDIR:
+                    continue
+                ok = False
+                break
+            wds.append(wd)
+            self._wd_keys.setdefault(wd, set()).add(key)
+        self._key_wds[key] = wds
+        if not ok:
+            self._unwatch(key)
+        return ok
+
+    def _unwatch(self, key: ScanKey):
+        for wd in self._key_wds.pop(key, ()):
+            keys = self._wd_keys.get(wd)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._wd_keys[wd]
+                self.inotify.remove(wd)
+
+    def _dropped(self, key: ScanKey):
+        with self._watch_lock:
+            self._expires.pop(key, None)
+            if self.inotify is not None:
+                self._unwatch(key)
+
+    def _read_events(self):
+        while not self._stop.is_set():
+            try:
+                events = self.inotify.read(0.5)
+            except OSError:
+                return
+            for wd, mask, name in events:
+                self._on_event(wd, mask, name)
+
+    def _on_event(self, wd: int, mask: int, name: str = ""):
+        if mask & _IN_Q_OVERFLOW:
+            # 取りこぼしたイベントがあるため全部捨てる
+            self.clear()
+            return
+        with self._watch_lock:
+            keys = list(self._wd_keys.get(wd, ()))
+        for key in keys:
+            if (
+                mask & _IN_STRUCTURE or key.order == "size"
+                or (key.use_gitignore and name == ".gitignore")
+                or (key.archives and is_archive(name))
+            ):
+                self.discard(key)
+            else:
+                with self._lock:
+                    scan = self._scans.get(key)
+                if scan is not None:
+                    scan.reset_digests()
+
+    def status(self) -> dict:
+        with self._watch_lock:
+            watches = len(self._wd_keys)
+            expiring = len(self._expires)
+        return {
+            "scans": len(self), "items": self.items_total, "watches": watches, "expiring": expiring,
+            "inotify": self.inotify is not None, "ttl": self.ttl,
+        }
+
+    def close(self):
+        self._stop.set()
+        self.clear()
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+
+# ---- 通信 ----
+def encode_item(item) -> list:
+    """アイテムを JSON の配列に（マーカーは [親, False, 深さ, ラベル]）"""
+    if is_marker(item):
+        return [item[0].parent.as_posix(), False, item[2], item.label]
+    return [item[0].as_posix(), item[1], item[2]]
+
+
+def decode_item(row: list):
+    if len(row) == 4:
+        return Marker(Path(row[0]), row[2], row[3])
+    return (Path(row[0]), bool(row[1]), row[2])
+
+
+class _FrameWriter:
+    """標準出力・標準エラーの代わりに渡す書き込み先（ためてフレームで送る）"""
+
+    def __init__(self, out: BinaryIO, kind: bytes):
+        self._out = out
+        self._kind = kind
+        self._buf: List[str] = []
+        self._size = 0
+
+    def write(self, s: str) -> int:
+        self._buf.append(s)
+        self._size += len(s)
+        if self._size >= _FLUSH_CHARS:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if self._buf:
+            send_frame(self._out, self._kind, "".join(self._buf).encode("utf-8"))
+            self._buf = []
+            self._size = 0
+
+
+class _ParseError(Exception):
+    pass
+
+
+class _QuietParser(argparse.ArgumentParser):
+    """引数の誤りを表示・終了せず例外にする（クライアント側で実行し直して表示させる）"""
+
+    def _print_message(self, message, file=None):
+        pass
+
+    def exit(self, status=0, message=None):
+        raise _ParseError(message)
+
+    def error(self, message):
+        raise _ParseError(message)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    wbufsize = 1 << 16
+
+    def handle(self):
+        try:
+            req = json.loads(self.rfile.readline() or b"null")
+        except ValueError:
+            return
+        if not isinstance(req, dict):
+            return
+        op = req.get("op")
+        try:
+            if op == "run":
+                self._run(req)
+            elif op == "scan":
+                self._scan(req)
+            elif op == "status":
+                send_frame(self.wfile, b"s", json.dumps(self.server.cache.status()).encode("utf-8"))
+                self._exit(0)
+            elif op == "stop":
+                self._exit(0)
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                self._exit(None)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _exit(self, code: Optional[int]):
+        send_frame(self.wfile, b"x", json.dumps(code).encode("utf-8"))
+        self.wfile.flush()
+
+    def _run(self, req: dict):
+        """CLI の引数で実行し、出力をフレームで返す（引数の誤りは null を返してクライアントに任せる）"""
+        try:
+            args = build_parser(_QuietParser).parse_args(req.get("argv") or [])
+        except _ParseError:
+            self._exit(None)
+            return
+        cwd = Path(req.get("cwd") or os.getcwd())
+        args.roots = [str(cwd / r) for r in args.roots]
+        for out in args.output or []:
+            if out.dest is not None:
+                out.dest = cwd / out.dest
+        if args.skip_log:
+            args.skip_log = str(cwd / args.skip_log)
+        out = _FrameWriter(self.wfile, b"o")
+        err = _FrameWriter(self.wfile, b"e")
+        # スキップログの全件はキャッシュに残らないため、指定時は毎回走査する
+        cache = None if args.skip_log else self.server.cache
+        try:
+            code = execute(args, out, err, cache=cache)
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as e:
+            err.write(f"folderdump: {e}\n")
+            code = 1
+        out.flush()
+        err.flush()
+        self._exit(code)
+
+    def _scan(self, req: dict):
+        """1 ルート分の走査結果（アイテム列と統計）を返す"""
+        options = dict(req.get("options") or {})
+        budget = options.pop("budget", None)
+        flags = CtlFlags()
+        root = Path(req["root"])
+        try:
+            job = DumpJob(
+                [root], budget=ScanBudget(**budget) if budget else None, flags=flags, estimate=True,
+                **options,
+            )
+        except (TypeError, ValueError) as e:
+            send_frame(self.wfile, b"e", str(e).encode("utf-8"))
+            self._exit(1)
+            return
+        error = job.check_root(root)
+        if error:
+            send_frame(self.wfile, b"e", error.encode("utf-8"))
+            self._exit(1)
+            return
+
+        def progress(count: int):
+            fraction, eta = job.progress()
+            try:
+                send_frame(self.wfile, b"p", json.dumps([count, fraction, eta]).encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                # クライアントがキャンセルした
+                flags.cancel()
+
+        scan = job.cached_scan(root, self.server.cache, progress)
+        items = scan.items
+        for i in range(0, len(items), _ITEMS_PER_FRAME):
+            rows = [encode_item(it) for it in items[i:i + _ITEMS_PER_FRAME]]
+            send_frame(self.wfile, b"i", json.dumps(rows, ensure_ascii=False).encode("utf-8"))
+        skiplog = scan.skiplog
+        send_frame(self.wfile, b"s", json.dumps({
+            "total": scan.stats.total, "max_depth": scan.stats.max_depth_seen,
+            "complete": not job.stopped(),
+            "skip_counts": skiplog.counts, "skip_examples": skiplog.examples,
+        }, ensure_ascii=False).encode("utf-8"))
+        self._exit(0)
+
+
+class ScanDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """走査デーモン（serve_forever で待ち受け、shutdown で停止）"""
+
+    daemon_threads = True
+
+    def __init__(self, path: Optional[str] = None, cache: Optional[ScanCache] = None):
+        self.path = path or socket_path()
+        self.cache = cache if cache is not None else WatchedCache()
+        if os.path.exists(self.path):
+            sock = connect(self.path)
+            if sock is not None:
+                sock.close()
+                raise OSError(errno.EADDRINUSE, "走査デーモンは既に動いています", self.path)
+            # 前回の残り
+            os.unlink(self.path)
+        super().__init__(self.path, _Handler)
+
+    def server_bind(self):
+        # 本人以外は接続できないようにする
+        old = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old)
+
+    def server_close(self):
+        super().server_close()
+        if hasattr(self.cache, "close"):
+            self.cache.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+# ---- クライアント（GUI のワーカー用） ----
+def fetch_scan(
+    job: DumpJob,
+    root: Path,
+    flags: Optional[CtlFlags] = None,
+    progress: Optional[Callable[[int, float, float], None]] = None,
+    path: Optional[str] = None,
+) -> Optional[Tuple[CachedScan, bool]]:
+    """
+    job の走査条件で root の走査結果をデーモンから受け取り、(走査結果, 最後まで走査したか) を返す
+    デーモンが動いていない・途中で切れた・エラーを返したときは None（このプロセスで走査する）
+    progress には (件数, 進捗率, 残り秒)（推定できなければ -1）を渡す
+    """
+    sock = connect(path)
+    if sock is None:
+        return None
+    items: List = []
+    stats = Stats()
+    skiplog = SkipLog()
+    complete = False
+    try:
+        req = {"op": "scan", "root": os.path.abspath(root), "options": job.scan_options()}
+        inp = request(sock, req)
+        while True:
+            if flags is not None and flags.is_canceled():
+                return CachedScan(root, items, stats, skiplog), False
+            frame = read_frame(inp)
+            if frame is None:
+                return None
+            kind, data = frame
+            if kind == b"x":
+                break
+            if kind == b"i":
+                items.extend(decode_item(row) for row in json.loads(data))
+            elif kind == b"p" and progress is not None:
+                count, fraction, eta = json.loads(data)
+                progress(
+                    count, -1.0 if fraction is None else fraction, -1.0 if eta is None else eta,
+                )
+            elif kind == b"s":
+                info = json.loads(data)
+                stats.total = info["total"]
+                stats.max_depth_seen = info["max_depth"]
+                skiplog.counts = dict(info["skip_counts"])
+                skiplog.examples = {
+                    k: [tuple(r) for r in rows] for k, rows in info["skip_examples"].items()
+                }
+                complete = info["complete"]
+        if json.loads(data) != 0:
+            return None
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    stats.stop()
+    return CachedScan(root, items, stats, skiplog), complete
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="python -m folderdump.daemon", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    ap.add_argument("--socket", default=None, metavar="PATH", help=f"ソケットのパス（既定: {socket_path()}）")
+    ap.add_argument(
+        "--max-items", type=int, default=DEFAULT_MAX_ITEMS, metavar="N", help="保持するアイテム総数の上限",
+    )
+    ap.add_argument(
+        "--max-scans", type=int, default=DEFAULT_MAX_SCANS, metavar="N", help="保持する走査結果の数の上限",
+    )
+    ap.add_argument("--no-watch", action="store_true", help="inotify でフォルダの変更を監視しない")
+    ap.add_argument(
+        "--ttl", type=float, default=DEFAULT_TTL, metavar="SEC",
+        help="監視できない走査結果の有効期限（秒。--no-watch ならすべての結果）",
+    )
+    ap.add_argument("--status", action="store_true", help="動いているデーモンのキャッシュの状態を表示")
+    ap.add_argument("--stop", action="store_true", help="動いているデーモンを停止")
+    args = ap.parse_args(argv)
+
+    if args.status or args.stop:
+        sock = connect(args.socket)
+        if sock is None:
+            print("走査デーモンは動いていません", file=sys.stderr)
+            return 1
+        try:
+            inp = request(sock, {"op": "status" if args.status else "stop"})
+            while True:
+                frame = read_frame(inp)
+                if frame is None or frame[0] == b"x":
+                    break
+                if frame[0] == b"s":
+                    print(json.dumps(json.loads(frame[1]), ensure_ascii=False, indent=2))
+        finally:
+            sock.close()
+        return 0
+
+    cache = WatchedCache(args.max_items, args.max_scans, watch=not args.no_watch, ttl=args.ttl)
+    try:
+        server = ScanDaemon(args.socket, cache)
+    except OSError as e:
+        cache.close()
+        print(f"folderdump: {e}", file=sys.stderr)
+        return 1
+    watching = "inotify で監視" if cache.inotify is not None else f"{args.ttl:g} 秒で期限切れ"
+    print(f"folderdump daemon: {server.path}（{watching}）", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+保存済みダンプのビューア
+- DumpFile（mmap + 疎な行索引）を仮想リストとして表示する（見えている行だけ読む）
+- 行索引はバックグラウンドスレッドで構築し、索引済みの行から順に表示・検索できる
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Optional
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from folderdump.core.dumpfile import DumpFile
+
+
+class DumpIndexer(QtCore.QObject):
+    """DumpFile.build_index を QThread 上で実行する"""
+
+    # 進捗：索引済み行数、進捗率（0〜1）
+    progressed = QtCore.Signal(int, float)
+
+    # 完了：総行数
+    finished = QtCore.Signal(int)
+
+    def __init__(self, dump: DumpFile):
+        super().__init__()
+        self.dump = dump
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    @QtCore.Slot()
+    def run(self):
+        total = self.dump.build_index(
+            progress_cb=self.progressed.emit,
+            should_stop=self._stop.is_set,
+        )
+        self.finished.emit(total)
+
+
+class DumpLineModel(QtCore.QAbstractListModel):
+    """索引済みの行数ぶんだけ行を持つモデル（data は要求時に mmap から読む）"""
+
+    def __init__(self, parent: QtCore.QObject | None = None):
+        super().__init__(parent)
+        self.dump: Optional[DumpFile] = None
+        self._rows = 0
+
+    def set_dump(self, dump: Optional[DumpFile]):
+        self.beginResetModel()
+        self.dump = dump
+        self._rows = 0
+        self.endResetModel()
+
+    def grow(self, rows: int):
+        """索引の進捗に合わせて行を追加"""
+        if rows > self._rows:
+            self.beginInsertRows(QtCore.QModelIndex(), self._rows, rows - 1)
+            self._rows = rows
+            self.endInsertRows()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._rows
+
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and self.dump is not None and index.isValid():
+            return self.dump.line(index.row())
+        return None
+
+
+class DumpView(QtWidgets.QTableView):
+    """
+    保存済みダンプを表示するプレビュー
+    MainWindow からは open_dump / find / selected_text を使う。
+    QListView は行追加のたびに全行を再レイアウトするため、行高固定の 1 列テーブルで表示する。
+    """
+
+    # 索引の進捗：索引済み行数、進捗率
+    indexed = QtCore.Signal(int, float)
+
+    # 索引の完了：総行数
+    loaded = QtCore.Signal(int)
+
+    def __init__(self, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+        self.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        vh = self.verticalHeader()
+        vh.hide()
+        # 行の高さ計算を省く（大量行でもスクロールが軽い）
+        vh.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        vh.setDefaultSectionSize(self.fontMetrics().height() + 2)
+        self.line_model = DumpLineModel(self)
+        self.setModel(self.line_model)
+        self.dump: Optional[DumpFile] = None
+        self._thread: QtCore.QThread | None = None
+        self._indexer: DumpIndexer | None = None
+
+    def open_dump(self, path: str | Path):
+        """ファイルを mmap し、索引の構築を開始する（表示は索引済みの行から）"""
+        self.close_dump()
+        self.dump = DumpFile(path)
+        self.line_model.set_dump(self.dump)
+
+        self._thread = QtCore.QThread(self)
+        self._indexer = DumpIndexer(self.dump)
+        self._indexer.moveToThread(self._thread)
+        self._thread.started.connect(self._indexer.run)
+        self._indexer.progressed.connect(self._on_progress)
+        self._indexer.finished.connect(self._on_finished)
+        self._indexer.finished.connect(self._thread.quit)
+        self._thread.start()
+
+    def close_dump(self):
+        """索引の構築を止めてファイルを閉じる"""
+        if self._thread is not None:
+            self._indexer.stop()
+            self._thread.quit()
+            self._thread.wait()
+            self._thread.deleteLater()
+            self._thread = None
+            self._indexer = None
+        if self.dump is not None:
+            self.line_model.set_dump(None)
+            self.dump.close()
+            self.dump = None
+
+    def _on_progress(self, lines: int, fraction: float):
+        self.line_model.grow(lines)
+        self.indexed.emit(lines, fraction)
+
+    def _on_finished(self, total: int):
+        self.line_model.grow(total)
+        self.loaded.emit(total)
+
+    def find(self, query: str, forward: bool = True) -> bool:
+        """現在行の次（前）から検索し、見つかった行を選択する（折り返しあり）"""
+        if self.dump is None:
+            return False
+        current = self.currentIndex().row() if self.currentIndex().isValid() else -1
+        hit = self.dump.find(query, from_line=current, forward=forward)
+        if hit is None:
+            return False
+        index = self.line_model.index(hit)
+        self.setCurrentIndex(index)
+        self.scrollTo(index, QtWidgets.QAbstractItemView.PositionAtCenter)
+        return True
+
+    def selected_text(self) -> str:
+        """選択行を改行区切りで返す"""
+        if self.dump is None:
+            return ""
+        rows = sorted(i.row() for i in self.selectedIndexes())
+        return "\n".join(self.dump.line(r) for r in rows)
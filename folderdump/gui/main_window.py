@@ -7,17 +7,33 @@
 - DumpWorker に処理を依頼（進捗・キャンセル対応）
 - 結果プレビュー・保存・検索・コピー
 - 統計表示（件数・最大深さ・スキップ数・経過時間）
+- ワーカー・コア・テーマは起動を速くするため初回利用時に読み込む
 """
 
+from __future__ import annotations
+
 from pathlib import Path
-from typing import List
+from typing import List, TYPE_CHECKING
 
 from PySide6 import QtWidgets, QtCore, QtGui
 
-from folderdump.worker.dump_worker import DumpWorker
 from folderdump.gui.drop_frame import DropFrame
-from folderdump.gui.style import apply_theme
-from folderdump.core.walker import CtlFlags, Stats, SkipLog
+
+if TYPE_CHECKING:
+    from folderdump.worker.dump_worker import DumpWorker
+    from folderdump.core.walker import CtlFlags, Stats, SkipLog, ScanBudget
+    from folderdump.gui.dump_view import DumpView
+    from folderdump.core.scan_cache import ScanCache
+
+
+def _format_eta(seconds: float) -> str:
+    """残り時間の表示（時間・分・秒のうち大きい 2 単位）"""
+    sec = int(seconds + 0.5)
+    if sec >= 3600:
+        return f"{sec // 3600} 時間 {sec % 3600 // 60} 分"
+    if sec >= 60:
+        return f"{sec // 60} 分 {sec % 60} 秒"
+    return f"{sec} 秒"
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -74,7 +90,10 @@ class MainWindow(QtWidgets.QMainWindow):
         opts = QtWidgets.QGridLayout()
         row = 0
         self.fmt_combo = QtWidgets.QComboBox()
-        self.fmt_combo.addItems(["plain", "tree", "json", "csv", "dot"])
+        self.fmt_combo.addItems([
+            "plain", "tree", "markdown", "json", "csv", "dot", "ndjson", "json-stream",
+            "summary", "summary-json", "html",
+        ])
         self.depth_spin = QtWidgets.QSpinBox()
         self.depth_spin.setRange(0, 50)
         self.depth_spin.setValue(0)
@@ -91,7 +110,75 @@ class MainWindow(QtWidgets.QMainWindow):
         opts.addWidget(self.chk_gitignore, row, 3, 1, 1)
         row += 1
         self.chk_symlinks = QtWidgets.QCheckBox("シンボリックリンクを辿る")
+        self.chk_outside = QtWidgets.QCheckBox("ルート外を指すリンクも辿る")
+        self.chk_outside.setEnabled(False)
+        self.chk_symlinks.toggled.connect(self.chk_outside.setEnabled)
         opts.addWidget(self.chk_symlinks, row, 0, 1, 2)
+        opts.addWidget(self.chk_outside, row, 2, 1, 2)
+        row += 1
+        # 走査予算（0 = 無制限）
+        self.max_entries_spin = QtWidgets.QSpinBox()
+        self.max_entries_spin.setRange(0, 2_000_000_000)
+        self.max_entries_spin.setSingleStep(10_000)
+        self.max_seconds_spin = QtWidgets.QSpinBox()
+        self.max_seconds_spin.setRange(0, 86_400)
+        self.max_per_dir_spin = QtWidgets.QSpinBox()
+        self.max_per_dir_spin.setRange(0, 2_000_000_000)
+        self.max_per_dir_spin.setSingleStep(100)
+        opts.addWidget(QtWidgets.QLabel("最大件数（0=無制限）"), row, 0)
+        opts.addWidget(self.max_entries_spin, row, 1)
+        opts.addWidget(QtWidgets.QLabel("時間上限 秒（0=無制限）"), row, 2)
+        opts.addWidget(self.max_seconds_spin, row, 3)
+        row += 1
+        opts.addWidget(QtWidgets.QLabel("1フォルダの最大件数（0=無制限）"), row, 0)
+        opts.addWidget(self.max_per_dir_spin, row, 1)
+        self.chk_archives = QtWidgets.QCheckBox("zip/tar の中身も列挙")
+        opts.addWidget(self.chk_archives, row, 2, 1, 2)
+        row += 1
+        # 表示件数の要約（超過分は「… and N more」の 1 行にまとめる）
+        self.max_fanout_spin = QtWidgets.QSpinBox()
+        self.max_fanout_spin.setRange(0, 2_000_000_000)
+        self.max_fanout_spin.setSingleStep(100)
+        opts.addWidget(QtWidgets.QLabel("1フォルダの表示件数（0=すべて）"), row, 0)
+        opts.addWidget(self.max_fanout_spin, row, 1)
+        # 並び順（順序を問わない出力は「並べ替えない」が最速）
+        self.order_combo = QtWidgets.QComboBox()
+        for label, order in (
+            ("名前順", "name"), ("自然順（file2 < file10）", "natural"),
+            ("サイズの大きい順", "size"), ("並べ替えない（最速）", "fs"),
+        ):
+            self.order_combo.addItem(label, order)
+        opts.addWidget(QtWidgets.QLabel("並び順"), row, 2)
+        opts.addWidget(self.order_combo, row, 3)
+        row += 1
+        # git 作業ツリーは .git/index から列挙（ディスク上の未追跡ツリーを走査しない）
+        self.chk_git_index = QtWidgets.QCheckBox("Git インデックスから列挙（追跡ファイル）")
+        self.chk_git_untracked = QtWidgets.QCheckBox("未追跡（除外されていないもの）も含める")
+        self.chk_git_untracked.setEnabled(False)
+        self.chk_git_index.toggled.connect(self.chk_git_untracked.setEnabled)
+        opts.addWidget(self.chk_git_index, row, 0, 1, 2)
+        opts.addWidget(self.chk_git_untracked, row, 2, 1, 2)
+        row += 1
+        # フォルダのダイジェスト（描画条件なのでキャッシュから描画し直せる）
+        self.chk_digests = QtWidgets.QCheckBox("フォルダのダイジェスト（csv/json/ndjson）")
+        self.chk_digest_stat = QtWidgets.QCheckBox("サイズ・更新日時も含める")
+        self.chk_digest_stat.setEnabled(False)
+        self.chk_digests.toggled.connect(self.chk_digest_stat.setEnabled)
+        opts.addWidget(self.chk_digests, row, 0, 1, 2)
+        opts.addWidget(self.chk_digest_stat, row, 2, 1, 2)
+        row += 1
+        # メタデータ条件（空欄なら絞り込まない）
+        self.predicate_edit = QtWidgets.QLineEdit()
+        self.predicate_edit.setPlaceholderText(
+            "例: size>100MB age<7d type=f / empty type=d / type=l"
+        )
+        self.predicate_edit.setToolTip(
+            "空白区切りの条件をすべて満たすものだけを出力（先頭 ! で否定）\n"
+            "size>100MB size<=4k（ファイルのみ）/ age<7d age>1y（更新からの経過時間）\n"
+            "type=f|d|l（ファイル/フォルダ/リンク）/ empty（空のフォルダ・0 バイトのファイル）"
+        )
+        opts.addWidget(QtWidgets.QLabel("条件"), row, 0)
+        opts.addWidget(self.predicate_edit, row, 1, 1, 3)
         row += 1
         root.addLayout(opts)
 
@@ -106,19 +193,27 @@ class MainWindow(QtWidgets.QMainWindow):
         # ---- 進捗バー + キャンセル ----
         bar_row = QtWidgets.QHBoxLayout()
         self.progress = QtWidgets.QProgressBar()
-        self.progress.setRange(0, 0)  # 不確定長
+        self.progress.setRange(0, 0)  # 推定値が出るまでは不確定長
         self.progress.setVisible(False)
+        self.btn_pause = QtWidgets.QPushButton("⏸ 一時停止")
+        self.btn_pause.setEnabled(False)
+        self.btn_pause.clicked.connect(self.toggle_pause)
         self.btn_cancel = QtWidgets.QPushButton("⏹ キャンセル")
         self.btn_cancel.setEnabled(False)
         self.btn_cancel.clicked.connect(self.cancel_run)
         bar_row.addWidget(self.progress, 1)
+        bar_row.addWidget(self.btn_pause)
         bar_row.addWidget(self.btn_cancel)
         root.addLayout(bar_row)
 
         # ---- プレビュー ----
+        # 走査結果は text_edit、保存済みダンプは dump_view（初回に作成）に表示する
+        self.preview_stack = QtWidgets.QStackedWidget()
         self.text_edit = QtWidgets.QPlainTextEdit()
         self.text_edit.setReadOnly(True)
-        root.addWidget(self.text_edit, 1)
+        self.preview_stack.addWidget(self.text_edit)
+        self.dump_view: DumpView | None = None
+        root.addWidget(self.preview_stack, 1)
 
         # ---- 統計表示 ----
         self.stats_label = QtWidgets.QLabel("件数: 0 | 最大深さ: 0 | スキップ: 0 | 時間: 0.00s")
@@ -134,18 +229,45 @@ class MainWindow(QtWidgets.QMainWindow):
         self.thread: QtCore.QThread | None = None
         self.worker: DumpWorker | None = None
         self.output_text: str = ""
-        self.flags = CtlFlags()  # 参照用に初期化（実行時に作り直し）
+        self.flags: CtlFlags | None = None  # 実行時に毎回作成
         self._last_stats: Stats | None = None
         self._last_skiplog: SkipLog | None = None
+        # 走査結果のキャッシュ（初回実行時に作成）と、直近に走査したルート・リスティング形式
+        self.scan_cache: ScanCache | None = None
+        self._last_run: tuple[List[str], str | None] | None = None
 
         # ---- テーマ & ステータスバー ----
-        apply_theme(QtWidgets.QApplication.instance())
+        # テーマ（qdarktheme）は初回描画後に遅延適用する
+        self._theme_applied = False
         self.statusBar().showMessage("準備完了")
 
         # ---- メニュー/ツールバー & 検索状態 ----
         self._build_menu_and_toolbar()
         self._last_query = ""
 
+        # 描画だけに関わる条件はキャッシュから描画し直す
+        self.fmt_combo.currentTextChanged.connect(self._rerender_from_cache)
+        self.chk_absolute.toggled.connect(self._rerender_from_cache)
+        self.chk_digests.toggled.connect(self._rerender_from_cache)
+        self.chk_digest_stat.toggled.connect(self._rerender_from_cache)
+
+    def showEvent(self, e: QtGui.QShowEvent):
+        super().showEvent(e)
+        if not self._theme_applied:
+            self._theme_applied = True
+            # 初回描画を先に済ませてからテーマを読み込む
+            QtCore.QTimer.singleShot(0, self._apply_theme_later)
+
+    def closeEvent(self, e: QtGui.QCloseEvent):
+        # 索引作成スレッドを止めて mmap を閉じる
+        if self.dump_view is not None:
+            self.dump_view.close_dump()
+        super().closeEvent(e)
+
+    def _apply_theme_later(self):
+        from folderdump.gui.style import apply_theme
+        apply_theme(QtWidgets.QApplication.instance())
+
     # ========================
     # フォルダ一覧の操作
     # ========================
@@ -205,14 +327,231 @@ class MainWindow(QtWidgets.QMainWindow):
         if not roots:
             QtWidgets.QMessageBox.warning(self, "入力不足", "フォルダを1つ以上追加してください。")
             return
+        self._start_worker(roots)
+
+    def import_listing(self):
+        """記録済みリスティング（find / ls -lR / rsync）を読み込んで出力する"""
+        fn, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "リスティングを取り込む", "", "Listing (*.txt *.lst *.log);;All Files (*)"
+        )
+        if fn:
+            self._start_worker([fn], listing_format="auto")
+
+    def export_shards(self):
+        """出力をシャード（分割ファイル）として書き出す"""
+        roots = self.current_roots()
+        if not roots:
+            QtWidgets.QMessageBox.warning(self, "入力不足", "フォルダを1つ以上追加してください。")
+            return
+        ext = self._save_filter(self.fmt_combo.currentText())[1]
+        fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "分割エクスポート（基準ファイル名）", f"structure.{ext}")
+        if not fn:
+            return
+        modes = ["最大件数ごと", "最大サイズ（MB）ごと", "最上位フォルダごと"]
+        mode, ok = QtWidgets.QInputDialog.getItem(self, "分割方法", "分割方法：", modes, 0, False)
+        if not ok:
+            return
+        from folderdump.core.shard import ShardSpec
+        if mode == modes[2]:
+            spec = ShardSpec(by_top=True)
+        else:
+            is_mb = mode == modes[1]
+            value, ok = QtWidgets.QInputDialog.getInt(
+                self, "分割サイズ", "MB：" if is_mb else "件数：",
+                100 if is_mb else 1_000_000, 1, 2_000_000_000,
+            )
+            if not ok:
+                return
+            if is_mb:
+                spec = ShardSpec(max_bytes=value * 1024 * 1024)
+            else:
+                spec = ShardSpec(max_entries=value)
+        self._start_worker(roots, shard=spec, shard_dest=fn)
+
+    def open_dump(self):
+        """保存済みダンプを mmap で開いてプレビューに表示する（全文は読み込まない）"""
+        fn, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "ダンプを開く", "",
+            "Dumps (*.txt *.csv *.md *.ndjson *.jsonl *.json);;All Files (*)",
+        )
+        if fn:
+            self.load_dump(fn)
+
+    def load_dump(self, path: str):
+        if self.dump_view is None:
+            from folderdump.gui.dump_view import DumpView
+            self.dump_view = DumpView()
+            self.dump_view.indexed.connect(self.on_dump_indexed)
+            self.dump_view.loaded.connect(self.on_dump_loaded)
+            self.preview_stack.addWidget(self.dump_view)
+        try:
+            self.dump_view.open_dump(path)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self, "エラー", f"ダンプを開けません: {e}")
+            return
+        self.preview_stack.setCurrentWidget(self.dump_view)
+        # 保存対象は走査結果のみ
+        self.output_text = ""
+        self.save_btn.setEnabled(False)
+        self.setWindowTitle(f"Folder Dump Tool - {Path(path).name}")
+        self.statusBar().showMessage(f"索引を作成中…：{path}")
+
+    def on_dump_indexed(self, lines: int, fraction: float):
+        self.statusBar().showMessage(f"索引を作成中… {lines:,} 行（{fraction:.0%}）")
+
+    def on_dump_loaded(self, lines: int):
+        self.statusBar().showMessage(f"読み込み完了：{lines:,} 行")
+
+    def _show_text_preview(self):
+        """プレビューを走査結果表示に戻す（開いていたダンプは閉じる）"""
+        if self.dump_view is not None:
+            self.dump_view.close_dump()
+        self.preview_stack.setCurrentWidget(self.text_edit)
+        self.setWindowTitle("Folder Dump Tool")
+
+    def _dump_active(self) -> bool:
+        return self.dump_view is not None and self.preview_stack.currentWidget() is self.dump_view
+
+    def _daemon_available(self) -> bool:
+        """走査デーモンのソケットがあるか（接続できるかはワーカーが確かめる）"""
+        import os
+        from folderdump.client import socket_path
+        return os.path.exists(socket_path())
+
+    def export_formats(self):
+        """1 回の走査で複数フォーマットをまとめて書き出す"""
+        roots = self.current_roots()
+        if not roots:
+            QtWidgets.QMessageBox.warning(self, "入力不足", "フォルダを1つ以上追加してください。")
+            return
+        dlg = QtWidgets.QDialog(self)
+        dlg.setWindowTitle("複数フォーマットで出力")
+        lay = QtWidgets.QVBoxLayout(dlg)
+        lay.addWidget(QtWidgets.QLabel("出力するフォーマット："))
+        fmt_list = QtWidgets.QListWidget()
+        current = self.fmt_combo.currentText()
+        for i in range(self.fmt_combo.count()):
+            item = QtWidgets.QListWidgetItem(self.fmt_combo.itemText(i))
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked if item.text() == current else QtCore.Qt.Unchecked)
+            fmt_list.addItem(item)
+        lay.addWidget(fmt_list)
+        buttons = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+        )
+        buttons.accepted.connect(dlg.accept)
+        buttons.rejected.connect(dlg.reject)
+        lay.addWidget(buttons)
+        if dlg.exec() != QtWidgets.QDialog.Accepted:
+            return
+        fmts = [
+            fmt_list.item(i).text() for i in range(fmt_list.count())
+            if fmt_list.item(i).checkState() == QtCore.Qt.Checked
+        ]
+        if not fmts:
+            return
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, "出力先フォルダを選択")
+        if not folder:
+            return
+        # 拡張子が重なるフォーマット（plain / tree 等）はファイル名にフォーマット名を入れる
+        exts = [self._save_filter(fmt)[1] for fmt in fmts]
+        outputs = []
+        for fmt, ext in zip(fmts, exts):
+            name = f"structure.{ext}" if exts.count(ext) == 1 else f"structure.{fmt}.{ext}"
+            outputs.append((fmt, str(Path(folder) / name)))
+        self._start_worker(roots, outputs=outputs)
+
+    def _scan_options(self, listing_format: str | None = None) -> dict:
+        """走査結果を左右する条件（DumpJob / DumpWorker の引数）"""
+        return dict(
+            depth=(self.depth_spin.value() or None),
+            follow_symlinks=self.chk_symlinks.isChecked(),   # ← チェックボックスの値を反映
+            follow_outside=self.chk_symlinks.isChecked() and self.chk_outside.isChecked(),
+            scan_archives=self.chk_archives.isChecked(),
+            listing_format=listing_format,
+            dirs_first=True,
+            order=self.order_combo.currentData(),
+            include_patterns=[],
+            exclude_patterns=[],
+            folders_only=self.chk_folders.isChecked(),
+            use_gitignore=self.chk_gitignore.isChecked(),
+            budget=self._current_budget(),
+            max_fanout=self.max_fanout_spin.value() or None,
+            git_index=self.chk_git_index.isChecked(),
+            git_untracked=self.chk_git_index.isChecked() and self.chk_git_untracked.isChecked(),
+            predicate=self.predicate_edit.text().strip() or None,
+        )
+
+    def _rerender_from_cache(self, *_):
+        """
+        フォーマット・絶対パス・ダイジェストが変わったら、直近の走査結果から描画し直す（再走査しない）
+        走査条件も変わっていてキャッシュにない場合は再実行を促すだけ
+        （走査デーモンがあれば、変更監視で最新に保たれたデーモン側のキャッシュから受け取る）
+        """
+        if self._last_run is None or self.scan_cache is None or not self.run_btn.isEnabled():
+            return
+        if self._dump_active():
+            return
+        roots, listing_format = self._last_run
+        from folderdump.core.job import DumpJob
+        try:
+            job = DumpJob(roots, **self._scan_options(listing_format))
+        except ValueError:
+            # 条件の書式エラーは実行時に知らせる
+            return
+        # デーモンから受け取った結果は手元に残さず、描画し直すときもデーモンに問い合わせる
+        if self._daemon_available() or all(job.scan_key(Path(r)) in self.scan_cache for r in roots):
+            self._start_worker(roots, listing_format=listing_format, from_cache=True)
+        else:
+            self.statusBar().showMessage("走査条件が変わりました。▶ 実行で再走査してください")
+
+    def _start_worker(self, roots: List[str], listing_format: str | None = None, **options):
+        # 条件の書式は走査前に確かめる
+        text = self.predicate_edit.text().strip()
+        if text:
+            from folderdump.core.filters import Predicate
+            try:
+                Predicate(text)
+            except ValueError as e:
+                QtWidgets.QMessageBox.warning(self, "条件の書式", str(e))
+                return
 
         # UI ロック
         self.run_btn.setEnabled(False)
         self.save_btn.setEnabled(False)
         self.btn_cancel.setEnabled(True)
+        self.btn_pause.setEnabled(True)
+        self.btn_pause.setText("⏸ 一時停止")
+        self.progress.setRange(0, 0)
         self.progress.setVisible(True)
+        self._show_text_preview()
         self.text_edit.setPlainText("処理中…")
-        self.statusBar().showMessage("走査を開始しました")
+        from_cache = options.get("from_cache", False)
+        self.statusBar().showMessage("キャッシュから描画しています" if from_cache else "走査を開始しました")
+
+        # 重いモジュールは初回実行時に読み込む
+        from folderdump.worker.dump_worker import DumpWorker
+        from folderdump.core.walker import CtlFlags
+        from folderdump.core.scan_cache import ScanCache
+        from folderdump.core.job import DIGEST_FORMATS, JobOutput
+
+        # 複数フォーマット出力以外は走査結果をキャッシュし、描画条件の変更に備える
+        # （リスト化せずに書き出せるフォーマットは、キャッシュから描画し直す場合を除いてキャッシュせず流す）
+        fmt = self.fmt_combo.currentText().lower()
+        streaming = (
+            "shard" not in options and not from_cache and JobOutput(fmt).streams(not listing_format)
+            and not (self.chk_digests.isChecked() and fmt in DIGEST_FORMATS)
+        )
+        if "outputs" not in options and streaming:
+            self._last_run = None
+        elif "outputs" not in options:
+            if self.scan_cache is None:
+                self.scan_cache = ScanCache()
+            options["cache"] = self.scan_cache
+            # 走査デーモンが起動していればキャッシュにないルートの走査を任せる
+            options["use_daemon"] = self._daemon_available()
+            if "shard" not in options:
+                self._last_run = (list(roots), listing_format)
 
         # フラグは毎回新規作成（前回のキャンセル状態を引きずらない）
         self.flags = CtlFlags()
@@ -221,14 +560,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.worker = DumpWorker(
             roots=roots,
             fmt=self.fmt_combo.currentText(),
-            depth=(self.depth_spin.value() or None),
             absolute=self.chk_absolute.isChecked(),
-            follow_symlinks=self.chk_symlinks.isChecked(),   # ← チェックボックスの値を反映
-            dirs_first=True,
-            include_patterns=[],
-            exclude_patterns=[],
-            folders_only=self.chk_folders.isChecked(),
-            use_gitignore=self.chk_gitignore.isChecked(),
+            digests=self.chk_digests.isChecked(),
+            digest_stat=self.chk_digests.isChecked() and self.chk_digest_stat.isChecked(),
+            **self._scan_options(listing_format),
+            **options,
             flags=self.flags,
         )
         self.worker.moveToThread(self.thread)
@@ -242,14 +578,48 @@ class MainWindow(QtWidgets.QMainWindow):
         self.thread.finished.connect(self.thread.deleteLater)
         self.thread.start()
 
+    def _current_budget(self) -> ScanBudget | None:
+        """予算入力から ScanBudget を作る（すべて 0 なら None）"""
+        max_entries = self.max_entries_spin.value() or None
+        max_seconds = self.max_seconds_spin.value() or None
+        max_per_dir = self.max_per_dir_spin.value() or None
+        if max_entries is None and max_seconds is None and max_per_dir is None:
+            return None
+        from folderdump.core.walker import ScanBudget
+        return ScanBudget(max_entries=max_entries, max_seconds=max_seconds, max_per_dir=max_per_dir)
+
     def cancel_run(self):
+        if self.flags is None:
+            return
         self.flags.cancel()
         self.btn_cancel.setEnabled(False)
+        self.btn_pause.setEnabled(False)
         self.statusBar().showMessage("キャンセル要求を送信しました…")
 
-    def on_progress(self, count: int):
-        # 不確定長プログレスなのでテキストのみ更新
-        self.statusBar().showMessage(f"{count:,} 件処理中…")
+    def toggle_pause(self):
+        if self.flags is None:
+            return
+        if self.flags.is_paused():
+            self.flags.resume()
+            self.btn_pause.setText("⏸ 一時停止")
+            self.statusBar().showMessage("再開しました")
+        else:
+            self.flags.pause()
+            self.btn_pause.setText("▶ 再開")
+            self.statusBar().showMessage("一時停止中…")
+
+    def on_progress(self, count: int, fraction: float = -1.0, eta: float = -1.0):
+        # 推定できない間（リスティング・並べ替えない列挙など）は不確定長のまま件数だけ表示
+        if fraction < 0:
+            self.progress.setRange(0, 0)
+            self.statusBar().showMessage(f"{count:,} 件処理中…")
+            return
+        self.progress.setRange(0, 1000)
+        self.progress.setValue(int(fraction * 1000))
+        msg = f"{count:,} 件処理中… 約 {fraction:.0%}"
+        if eta >= 0:
+            msg += f"（残り 約 {_format_eta(eta)}）"
+        self.statusBar().showMessage(msg)
 
     def on_finished(self, text: str, count: int, stats: Stats, skiplog: SkipLog):
         # 出力
@@ -264,6 +634,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # UI 開放
         self.progress.setVisible(False)
         self.btn_cancel.setEnabled(False)
+        self.btn_pause.setEnabled(False)
         self.run_btn.setEnabled(True)
         self.save_btn.setEnabled(True)
 
@@ -278,9 +649,18 @@ class MainWindow(QtWidgets.QMainWindow):
             f"件数: {s.total:,} | 最大深さ: {s.max_depth_seen} | スキップ: {skipped:,} | 時間: {s.elapsed:.2f}s"
         )
 
+    def show_skips(self):
+        """スキップの内訳（理由ごとの件数と例）を表示"""
+        if not self._last_skiplog or not self._last_skiplog.count():
+            self.statusBar().showMessage("スキップはありません")
+            return
+        from folderdump.gui.skip_dialog import SkipDialog
+        SkipDialog(self._last_skiplog, self).exec()
+
     def on_failed(self, msg: str):
         self.progress.setVisible(False)
         self.btn_cancel.setEnabled(False)
+        self.btn_pause.setEnabled(False)
         self.run_btn.setEnabled(True)
         self.save_btn.setEnabled(False)
         QtWidgets.QMessageBox.critical(self, "エラー", msg)
@@ -289,20 +669,29 @@ class MainWindow(QtWidgets.QMainWindow):
     def save_output(self):
         if not self.output_text:
             return
-        fmt = self.fmt_combo.currentText()
-        # 拡張子を自動提案
+        flt, ext = self._save_filter(self.fmt_combo.currentText())
+        fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "保存", f"structure.{ext}", flt)
+        if fn:
+            Path(fn).write_text(self.output_text, encoding="utf-8")
+            self.statusBar().showMessage(f"保存しました：{fn}")
+
+    @staticmethod
+    def _save_filter(fmt: str):
+        """フォーマットに応じた (ダイアログのフィルタ, 拡張子)"""
         filters = {
             "plain": ("Text (*.txt)", "txt"),
             "tree": ("Text (*.txt);;Markdown (*.md)", "txt"),
+            "markdown": ("Markdown (*.md)", "md"),
             "json": ("JSON (*.json)", "json"),
             "csv": ("CSV (*.csv)", "csv"),
             "dot": ("Graphviz DOT (*.dot)", "dot"),
+            "ndjson": ("NDJSON (*.ndjson *.jsonl)", "ndjson"),
+            "json-stream": ("JSON (*.json)", "json"),
+            "summary": ("Text (*.txt)", "txt"),
+            "summary-json": ("JSON (*.json)", "json"),
+            "html": ("HTML (*.html)", "html"),
         }
-        flt, ext = filters.get(fmt, ("Text (*.txt)", "txt"))
-        fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "保存", f"structure.{ext}", flt)
-        if fn:
-            Path(fn).write_text(self.output_text, encoding="utf-8")
-            self.statusBar().showMessage(f"保存しました：{fn}")
+        return filters.get(fmt, ("Text (*.txt)", "txt"))
 
     # ========================
     # メニュー/ツールバー・検索/コピー
@@ -316,11 +705,31 @@ class MainWindow(QtWidgets.QMainWindow):
         act_open.setShortcut(QtGui.QKeySequence("Ctrl+O"))
         act_open.triggered.connect(self.browse_folder)
 
+        # Import Listing（リスティング取り込み）
+        act_import = QtGui.QAction(
+            style.standardIcon(QtWidgets.QStyle.SP_FileIcon), "Import Listing…", self,
+        )
+        act_import.setShortcut(QtGui.QKeySequence("Ctrl+I"))
+        act_import.triggered.connect(self.import_listing)
+
+        # Open Dump（保存済みダンプを開く）
+        act_open_dump = QtGui.QAction("Open Dump…", self)
+        act_open_dump.setShortcut(QtGui.QKeySequence("Ctrl+Shift+O"))
+        act_open_dump.triggered.connect(self.open_dump)
+
         # Save（保存）
         act_save = QtGui.QAction(style.standardIcon(QtWidgets.QStyle.SP_DialogSaveButton), "Save As…", self)
         act_save.setShortcut(QtGui.QKeySequence("Ctrl+S"))
         act_save.triggered.connect(self.save_output)
 
+        # Export Shards（分割エクスポート）
+        act_shards = QtGui.QAction("Export Shards…", self)
+        act_shards.triggered.connect(self.export_shards)
+
+        # Export Formats（複数フォーマット同時出力）
+        act_formats = QtGui.QAction("Export Formats…", self)
+        act_formats.triggered.connect(self.export_formats)
+
         # Copy All（全文コピー）
         act_copy_all = QtGui.QAction(style.standardIcon(QtWidgets.QStyle.SP_FileDialogDetailedView), "Copy All", self)
         act_copy_all.setShortcut(QtGui.QKeySequence("Ctrl+Shift+C"))
@@ -344,6 +753,10 @@ class MainWindow(QtWidgets.QMainWindow):
         act_find_prev.setShortcut(QtGui.QKeySequence("Shift+F3"))
         act_find_prev.triggered.connect(lambda: self._find_in_preview(self._last_query or "", forward=False))
 
+        # Skipped（スキップの内訳）
+        act_skips = QtGui.QAction("Skipped Items…", self)
+        act_skips.triggered.connect(self.show_skips)
+
         # Exit（終了）
         act_exit = QtGui.QAction("Exit", self)
         act_exit.setShortcut(QtGui.QKeySequence("Alt+F4"))
@@ -353,7 +766,11 @@ class MainWindow(QtWidgets.QMainWindow):
         menubar = self.menuBar()
         menu_file = menubar.addMenu("&File")
         menu_file.addAction(act_open)
+        menu_file.addAction(act_import)
+        menu_file.addAction(act_open_dump)
         menu_file.addAction(act_save)
+        menu_file.addAction(act_shards)
+        menu_file.addAction(act_formats)
         menu_file.addSeparator()
         menu_file.addAction(act_exit)
 
@@ -364,6 +781,8 @@ class MainWindow(QtWidgets.QMainWindow):
         menu_edit.addAction(act_find)
         menu_edit.addAction(act_find_next)
         menu_edit.addAction(act_find_prev)
+        menu_edit.addSeparator()
+        menu_edit.addAction(act_skips)
 
         # ---- Tool Bar ----
         toolbar = self.addToolBar("Main")
@@ -378,6 +797,10 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def copy_all(self):
         """プレビュー全文をクリップボードへ"""
+        if self._dump_active():
+            # 巨大なダンプを丸ごと文字列化しない
+            self.statusBar().showMessage("ダンプ表示中は全文コピーできません（行を選択してコピーしてください）")
+            return
         text = self.text_edit.toPlainText()
         if text:
             QtWidgets.QApplication.clipboard().setText(text)
@@ -385,8 +808,10 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def copy_selection(self):
         """選択範囲をクリップボードへ"""
-        cursor = self.text_edit.textCursor()
-        sel = cursor.selectedText()
+        if self._dump_active():
+            sel = self.dump_view.selected_text()
+        else:
+            sel = self.text_edit.textCursor().selectedText()
         if sel:
             QtWidgets.QApplication.clipboard().setText(sel)
             self.statusBar().showMessage("選択範囲をコピーしました")
@@ -404,6 +829,11 @@ class MainWindow(QtWidgets.QMainWindow):
         """プレビュー内を検索（F3/Shift+F3 対応、折り返し検索）"""
         if not query:
             return
+        if self._dump_active():
+            # ダンプは mmap 上を直接検索（折り返しは DumpFile.find 側で行う）
+            if not self.dump_view.find(query, forward=forward):
+                self.statusBar().showMessage(f"見つかりません：{query}")
+            return
         flags = QtGui.QTextDocument.FindFlag(0)
         if not forward:
             flags |= QtGui.QTextDocument.FindBackward
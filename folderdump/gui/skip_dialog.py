@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+スキップの内訳ダイアログ
+- 理由の分類ごとの件数を一覧表示し、展開したときに初めて例の行を作る
+- 例は SkipLog が保持している先頭の数件だけ（全件はファイル出力側）
+"""
+
+from __future__ import annotations
+
+from PySide6 import QtCore, QtWidgets
+
+from folderdump.core.walker import SkipLog
+
+# 未展開の分類に付けるダミー子（展開インジケータを出すため）
+_PLACEHOLDER = "…"
+
+
+class SkipDialog(QtWidgets.QDialog):
+    def __init__(self, skiplog: SkipLog, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+        self.skiplog = skiplog
+        self.setWindowTitle("スキップの内訳")
+        self.resize(720, 420)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(QtWidgets.QLabel(
+            f"スキップ: {skiplog.count():,} 件（分類ごとに先頭 {skiplog.max_examples:,} 件まで表示）"
+        ))
+
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderLabels(["理由 / パス", "件数"])
+        self.tree.setUniformRowHeights(True)
+        self.tree.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.tree.header().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeToContents)
+        for kind, n in skiplog.summary():
+            item = QtWidgets.QTreeWidgetItem([kind, f"{n:,}"])
+            item.setData(0, QtCore.Qt.UserRole, kind)
+            item.setTextAlignment(1, QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+            item.addChild(QtWidgets.QTreeWidgetItem([_PLACEHOLDER]))
+            self.tree.addTopLevelItem(item)
+        self.tree.itemExpanded.connect(self._fill)
+        layout.addWidget(self.tree)
+
+        if skiplog.log_path is not None:
+            layout.addWidget(QtWidgets.QLabel(f"全件: {skiplog.log_path}"))
+
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def _fill(self, item: QtWidgets.QTreeWidgetItem):
+        """初回展開時に例の行を作る"""
+        kind = item.data(0, QtCore.Qt.UserRole)
+        if kind is None or item.childCount() != 1 or item.child(0).text(0) != _PLACEHOLDER:
+            return
+        item.takeChild(0)
+        shown = self.skiplog.examples.get(kind, [])
+        for path, reason in shown:
+            child = QtWidgets.QTreeWidgetItem([path])
+            child.setToolTip(0, reason)
+            item.addChild(child)
+        rest = self.skiplog.counts.get(kind, 0) - len(shown)
+        if rest > 0:
+            item.addChild(QtWidgets.QTreeWidgetItem([f"… ほか {rest:,} 件"]))
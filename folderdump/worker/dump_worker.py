@@ -1,23 +1,23 @@
 # -*- coding: utf-8 -*-
 """
 バックグラウンドワーカー
-- QThread 上でフォルダ走査を実行
+- QThread 上で走査を実行（実処理は core.job.DumpJob に任せる）
 - 進捗通知（progressed）
-- キャンセル対応（CtlFlags）
+- キャンセル/一時停止対応（CtlFlags）
 - 統計・スキップログの返却（Stats / SkipLog）
+- 走査結果のキャッシュ（描画条件だけの変更は再走査しない）
 """
 
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from PySide6 import QtCore
 
-from folderdump.core.walker import iter_paths, Stats, SkipLog, CtlFlags
-from folderdump.core.filters import read_gitignore
-from folderdump.core.renderer import (
-    render_plain, render_tree, render_markdown,
-    render_json, render_csv, render_dot,
-)
+from folderdump.core.walker import Stats, SkipLog, CtlFlags, ScanBudget
+from folderdump.core.job import DumpJob, JobOutput, ShardOutput
+from folderdump.core.ordering import DEFAULT_ORDER
+from folderdump.core.shard import ShardSpec
+from folderdump.core.scan_cache import CachedScan, ScanCache
 
 
 class DumpWorker(QtCore.QObject):
@@ -26,8 +26,8 @@ class DumpWorker(QtCore.QObject):
     メインスレッド側（MainWindow）とは Signal/Slot でやり取りします。
     """
 
-    # 進捗：処理件数（iter_paths 内で一定件数ごとに emit）
-    progressed = QtCore.Signal(int)
+    # 進捗：処理件数、進捗率（0〜1）、残り秒（iter_paths 内で一定件数ごとに emit。推定できなければ -1）
+    progressed = QtCore.Signal(int, float, float)
 
     # 完了：生成テキスト、要素数、統計、スキップログ
     finished = QtCore.Signal(str, int, Stats, SkipLog)
@@ -48,20 +48,69 @@ class DumpWorker(QtCore.QObject):
         folders_only: bool,
         use_gitignore: bool,
         flags: CtlFlags,
+        budget: Optional[ScanBudget] = None,
+        follow_outside: bool = False,
+        scan_archives: bool = False,
+        listing_format: Optional[str] = None,
+        shard: Optional[ShardSpec] = None,
+        shard_dest: Optional[str] = None,
+        max_fanout: Optional[int] = None,
+        outputs: Optional[List[Tuple[str, str]]] = None,
+        cache: Optional[ScanCache] = None,
+        from_cache: bool = False,
+        git_index: bool = False,
+        git_untracked: bool = False,
+        digests: bool = False,
+        digest_stat: bool = False,
+        predicate: Optional[str] = None,
+        order: str = DEFAULT_ORDER,
+        use_daemon: bool = False,
     ) -> None:
         super().__init__()
         self.roots = [Path(r) for r in roots]
         self.fmt = (fmt or "plain").lower()
-        self.depth = depth
         self.absolute = absolute
-        self.follow_symlinks = follow_symlinks
-        self.dirs_first = dirs_first
-        self.includes = include_patterns or []
-        self.excludes = exclude_patterns or []
-        self.folders_only = folders_only
-        self.use_gitignore = use_gitignore
+        # 指定時は roots をリスティングファイルとして読む（"auto" / "find" / "ls-lR" / "rsync"）
+        self.listing_format = listing_format
+        # 指定時は shard_dest を基準名としてシャードを書き出す（プレビューにはマニフェストを表示）
+        self.shard = shard
+        self.shard_dest = Path(shard_dest) if shard_dest else None
+        # 指定時は [(フォーマット, 出力先), ...] へ同時に書き出す（プレビューには出力一覧を表示）
+        self.outputs = outputs
+        # 指定時は走査結果をキャッシュに保存し、from_cache=True ならキャッシュ済みのルートは再走査しない
+        self.cache = cache
+        self.from_cache = from_cache
+        # True かつキャッシュ利用時、走査デーモンが動いていれば走査をデーモンに任せる（呼び出し側が明示する）
+        self.use_daemon = use_daemon
         # 呼び出し側で必ずインスタンスを渡してください（None 禁止）
         self.flags = flags
+        # 予算は全ルートで共有（None なら無制限）
+        self.budget = budget
+        # 走査条件（エントリ列の生成は DumpJob に任せる）
+        self.job = DumpJob(
+            self.roots,
+            depth=depth,
+            absolute=absolute,
+            follow_symlinks=follow_symlinks,
+            dirs_first=dirs_first,
+            include_patterns=include_patterns,
+            exclude_patterns=exclude_patterns,
+            folders_only=folders_only,
+            use_gitignore=use_gitignore,
+            flags=flags,
+            budget=budget,
+            follow_outside=follow_outside,
+            scan_archives=scan_archives,
+            listing_format=listing_format,
+            max_fanout=max_fanout,
+            git_index=git_index,
+            git_untracked=git_untracked,
+            digests=digests,
+            digest_stat=digest_stat,
+            predicate=predicate,
+            order=order,
+            estimate=True,
+        )
 
     @QtCore.Slot()
     def run(self):
@@ -70,77 +119,63 @@ class DumpWorker(QtCore.QObject):
         キャンセルされた場合も、収集済みの結果ぶんは返します。
         """
         try:
-            all_texts: List[str] = []
-            total_count = 0
-            stats = Stats()
-            skiplog = SkipLog()
-
-            for root in self.roots:
-                # キャンセルチェック（ルートごと）
-                if self.flags.is_canceled():
-                    break
-
-                if (not root.exists()) or (not root.is_dir()):
-                    self.failed.emit(f"フォルダが見つかりません: {root}")
-                    return
-
-                # 除外パターンの合成（.gitignore 簡易対応）
-                excludes = list(self.excludes)
-                if self.use_gitignore:
-                    ex2, neg = read_gitignore(root)   # ★ 変更：タプルで受け取る
-                    excludes.extend(ex2)
-                else:
-                    neg = []
-
-                items = list(
-                    iter_paths(
-                        root=root,
-                        max_depth=self.depth,
-                        follow_symlinks=self.follow_symlinks,
-                        includes=self.includes,
-                        excludes=excludes,
-                        dirs_first=self.dirs_first,
-                        folders_only=self.folders_only,
-                        flags=self.flags,
-                        skiplog=skiplog,
-                        stats=stats,
-                        progress_cb=self.progressed.emit,
-                        negates=neg,                  # ★ 追加：否定パターンを渡す
-                    )
+            if self.outputs:
+                outputs = [JobOutput(fmt, dest) for fmt, dest in self.outputs]
+            elif self.shard is not None and self.shard_dest is not None:
+                tagged = len(self.roots) > 1
+                outputs = [ShardOutput(self.fmt, self.shard_dest, self.shard, tagged=tagged)]
+            else:
+                # プレビュー用にメモリ上へ書く（html は全ルートを 1 ページにまとめる）
+                outputs = [JobOutput(self.fmt)]
+            try:
+                result = self.job.run(
+                    outputs, progress_cb=self._progress, cache=self.cache,
+                    scan_fn=self._cached_scan if self.cache is not None else None,
                 )
+            except ValueError as e:
+                self.failed.emit(str(e))
+                return
 
-                # 出力フォーマットに変換
-                fmt = self.fmt
-                if fmt == "tree":
-                    text = render_tree(items)
-                elif fmt == "plain":
-                    text = render_plain(root, items, absolute=self.absolute)
-                elif fmt == "markdown":
-                    # tree をコードブロック化
-                    text = render_markdown(render_tree(items))
-                elif fmt == "json":
-                    text = render_json(items)
-                elif fmt == "csv":
-                    text = render_csv(root, items)
-                elif fmt == "dot":
-                    text = render_dot(items)
-                else:
-                    # 未知指定は plain 扱い
-                    text = render_plain(root, items, absolute=self.absolute)
-
-                all_texts.append(text)
-                total_count += len(items)
-
-                # ルート間でもキャンセルを尊重
-                if self.flags.is_canceled():
-                    break
-
-            # 統計停止（経過時間確定）
-            stats.stop()
+            if self.outputs:
+                # 複数フォーマット出力はプレビューに出力一覧を表示
+                text = "\n".join(f"{out.fmt}\t{out.dest}" for out in outputs)
+            else:
+                text = outputs[0].text or ""
 
             # 結果通知（キャンセル時もここに到達する）
-            self.finished.emit("\n\n".join(all_texts), total_count, stats, skiplog)
+            self.finished.emit(text, result["count"], result["stats"], result["skiplog"])
 
         except Exception as e:
             # 例外は failed でメイン側へ
             self.failed.emit(str(e))
+
+    def _cached_scan(self, root: Path) -> CachedScan:
+        """
+        キャッシュ済みならその走査結果を、なければ走査してキャッシュに保存した結果を返す
+        （キャンセル/予算切れで途中までの結果は保存しない）
+        use_daemon なら先にデーモンへ問い合わせる。デーモンの結果はこのキャッシュに入れない
+        （こちらには変更監視がなく古い結果が残るため。描画し直すときもデーモンから受け取り直す）
+        """
+        if self.use_daemon:
+            # デーモン側のキャッシュは変更監視（または期限）で無効化されるため、再描画でも使う
+            # （通信部は使うときだけ読み込む）
+            from folderdump.daemon import fetch_scan
+
+            pos, n = self.roots.index(root), len(self.roots)
+
+            def progress(count: int, fraction: float, eta: float):
+                if fraction >= 0:
+                    fraction = (pos + fraction) / n
+                self.progressed.emit(count, fraction, eta)
+
+            fetched = fetch_scan(self.job, root, self.flags, progress)
+            if fetched is not None:
+                return fetched[0]
+        return self.job.cached_scan(root, self.cache, self._progress, from_cache=self.from_cache)
+
+    def _progress(self, count: int):
+        """走査側の件数通知に推定値を添えて emit"""
+        fraction, eta = self.job.progress()
+        self.progressed.emit(
+            count, -1.0 if fraction is None else fraction, -1.0 if eta is None else eta,
+        )
@@ -5,8 +5,13 @@
 main.py - FolderDumpApp エントリポイント
 - アイコンを開発時/配布時（PyInstaller）どちらでも確実に適用
 - Windows タスクバー用 AppUserModelID を設定
+- 環境変数 FOLDERDUMP_STARTUP_PROBE=1 で初回描画までの時間を出力して終了（起動ベンチマーク用）
 """
 
+import time
+
+_T0 = time.perf_counter()
+
 import os
 import sys
 
@@ -39,6 +44,18 @@ def set_windows_app_id(app_id: str = "FolderDumpApp.FolderDump.1") -> None:
             pass
 
 
+class _FirstPaintProbe(QtCore.QObject):
+    """最初の Paint イベントで経過時間を出力し、アプリを終了する"""
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint:
+            elapsed_ms = (time.perf_counter() - _T0) * 1000
+            print(f"first_paint_ms={elapsed_ms:.1f}", flush=True)
+            obj.removeEventFilter(self)
+            QtCore.QTimer.singleShot(0, QtWidgets.QApplication.quit)
+        return False
+
+
 def main():
     # --- Windows タスクバー用 AppID（QApplication 生成前に設定） ---
     set_windows_app_id()
@@ -65,6 +82,10 @@ def main():
     if not icon.isNull():
         win.setWindowIcon(icon)
 
+    if os.environ.get("FOLDERDUMP_STARTUP_PROBE"):
+        probe = _FirstPaintProbe(win)
+        win.installEventFilter(probe)
+
     win.show()
     sys.exit(app.exec())
 
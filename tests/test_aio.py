@@ -0,0 +1,137 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from folderdump.core import AsyncScanner, render_tree
+from folderdump.core.aio import VISIT_CHUNK
+from folderdump.core.walker import iter_paths, Stats, SkipLog, CtlFlags
+
+
+def make_temp_tree(base: Path):
+    (base / "dirA" / "subA").mkdir(parents=True)
+    (base / "dirB").mkdir()
+    (base / "dirA" / "file1.txt").write_text("hello")
+    (base / "dirB" / "file2.txt").write_text("world")
+
+
+def test_async_scan_matches_sync(tmp_path: Path):
+    make_temp_tree(tmp_path)
+    sync_items = list(iter_paths(
+        root=tmp_path, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+        dirs_first=True, folders_only=False, flags=CtlFlags(), skiplog=SkipLog(), stats=Stats(),
+    ))
+
+    async def main():
+        scanner = AsyncScanner(concurrency=2)
+        # 同じスキャナで複数ルートを並行走査
+        return await asyncio.gather(scanner.collect(tmp_path), scanner.collect(tmp_path / "dirA"))
+
+    items, sub_items = asyncio.run(main())
+    assert items == sync_items
+    assert {str(p) for p, _, _ in sub_items} == {"subA", "file1.txt"}
+    assert render_tree(items) == render_tree(sync_items)
+
+
+def test_async_scan_cancellation(tmp_path: Path):
+    make_temp_tree(tmp_path)
+
+    async def main():
+        scanner = AsyncScanner()
+        started = asyncio.Event()
+
+        async def consume():
+            async for _ in scanner.iter_paths(tmp_path):
+                started.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(consume())
+        await started.wait()
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(main())
+
+
+def test_async_visitors_run_in_walk_order(tmp_path: Path):
+    from folderdump.core.walker import Visitor
+
+    make_temp_tree(tmp_path)
+
+    class Events(Visitor):
+        def __init__(self):
+            self.log = []
+
+        def on_enter_dir(self, rel, depth):
+            self.log.append(("enter", rel.as_posix()))
+
+        def on_entry(self, rel, entry, is_dir, depth):
+            self.log.append(("entry", rel.as_posix()))
+
+        def on_exit_dir(self, rel, depth):
+            self.log.append(("exit", rel.as_posix()))
+
+    sync_events, async_events = Events(), Events()
+    list(iter_paths(
+        root=tmp_path, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+        dirs_first=True, folders_only=False, flags=CtlFlags(), skiplog=SkipLog(), stats=Stats(),
+        visitors=[sync_events],
+    ))
+    asyncio.run(AsyncScanner().collect(tmp_path, visitors=[async_events]))
+    assert async_events.log == sync_events.log
+    assert async_events.log[:3] == [("enter", "."), ("entry", "dirA"), ("enter", "dirA")]
+
+
+def test_async_lists_siblings_concurrently(tmp_path: Path, monkeypatch):
+    import threading
+    import time
+    from folderdump.core.walker import _Walk
+
+    for d in range(6):
+        (tmp_path / f"d{d}" / "sub").mkdir(parents=True)
+        (tmp_path / f"d{d}" / "f.txt").write_text("x")
+    sync_items = list(iter_paths(
+        root=tmp_path, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+        dirs_first=True, folders_only=False, flags=CtlFlags(), skiplog=SkipLog(), stats=Stats(),
+    ))
+    lock = threading.Lock()
+    active = peak = 0
+    orig = _Walk.list_dir
+
+    def slow_list(self, current):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        try:
+            return orig(self, current)
+        finally:
+            with lock:
+                active -= 1
+
+    monkeypatch.setattr(_Walk, "list_dir", slow_list)
+    scanner = AsyncScanner(concurrency=4)
+    # ループをまたいで同じスキャナを使える（Semaphore はループごと）
+    assert asyncio.run(scanner.collect(tmp_path)) == sync_items
+    assert asyncio.run(scanner.collect(tmp_path)) == sync_items
+    # 1 ルートでも兄弟ディレクトリを並行に列挙する（上限は concurrency）
+    assert 1 < peak <= 4
+
+
+def test_async_scan_judges_large_dir_in_chunks(tmp_path: Path):
+    for i in range(VISIT_CHUNK * 2 + 10):
+        (tmp_path / f"f{i:04d}.txt").write_text("")
+
+    async def main():
+        stats = Stats()
+        gen = AsyncScanner().iter_paths(tmp_path, stats=stats)
+        await gen.__anext__()
+        # 1 件目を受け取った時点では最初のチャンク分しか判定していない
+        first = stats.total
+        rest = [item async for item in gen]
+        return first, len(rest) + 1
+
+    first, total = asyncio.run(main())
+    assert first == VISIT_CHUNK
+    assert total == VISIT_CHUNK * 2 + 10
@@ -0,0 +1,56 @@
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+
+from folderdump.core.walker import iter_paths, Stats, SkipLog, CtlFlags, is_marker
+
+
+def _scan(root: Path, **kw):
+    args = dict(
+        root=root, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+        dirs_first=True, folders_only=False, flags=CtlFlags(), skiplog=SkipLog(), stats=Stats(),
+    )
+    args.update(kw)
+    return list(iter_paths(**args))
+
+
+def test_archives_listed_as_directories(tmp_path: Path):
+    with zipfile.ZipFile(tmp_path / "rel.zip", "w") as zf:
+        zf.writestr("pkg/a.py", "x")
+        zf.writestr("pkg/b.txt", "x")
+        zf.writestr("README", "x")
+    with tarfile.open(tmp_path / "src.tar.gz", "w:gz") as tf:
+        data = b"hello"
+        ti = tarfile.TarInfo("src/main.c")
+        ti.size = len(data)
+        tf.addfile(ti, io.BytesIO(data))
+
+    # 既定では通常ファイル
+    names = {p.as_posix(): d for p, d, _ in _scan(tmp_path)}
+    assert names == {"rel.zip": False, "src.tar.gz": False}
+
+    items = _scan(tmp_path, archives=True, excludes=["*.txt"])
+    names = {p.as_posix(): (d, depth) for p, d, depth in items}
+    assert names["rel.zip"] == (True, 1)
+    assert names["rel.zip/pkg/a.py"] == (False, 3)
+    assert names["src.tar.gz/src/main.c"] == (False, 3)
+    assert "rel.zip/pkg/b.txt" not in names
+
+    # 深さはアーカイブ境界を越えて継続
+    names = {p.as_posix() for p, _, _ in _scan(tmp_path, archives=True, max_depth=2)}
+    assert "rel.zip/pkg" in names and "rel.zip/pkg/a.py" not in names
+
+
+def test_archive_entry_cap_and_broken_archive(tmp_path: Path):
+    with zipfile.ZipFile(tmp_path / "bomb.zip", "w") as zf:
+        for i in range(50):
+            zf.writestr(f"f{i}", "")
+    (tmp_path / "broken.zip").write_bytes(b"not a zip")
+
+    skiplog = SkipLog()
+    items = _scan(tmp_path, archives=True, archive_limit=10, skiplog=skiplog)
+    members = [p for p, _, _ in items if p.parts[0] == "bomb.zip" and len(p.parts) == 2]
+    assert len(members) == 11  # 10 件 + 打ち切りマーカー
+    assert any(is_marker(it) for it in items)
+    assert "broken.zip" in skiplog.to_text()
@@ -0,0 +1,168 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from folderdump import cli, client, daemon
+from folderdump.core import job as job_mod
+from folderdump.core.job import DumpJob
+
+pytestmark = pytest.mark.skipif(not hasattr(client.socket, "AF_UNIX"), reason="Unix ドメインソケットなし")
+
+
+def make_tree(base: Path):
+    (base / "a" / "b").mkdir(parents=True)
+    (base / "a" / "b" / "x.py").write_text("x")
+    (base / "a" / "y.txt").write_text("y")
+    (base / "z.md").write_text("z")
+
+
+@pytest.fixture
+def server(tmp_path: Path):
+    srv = daemon.ScanDaemon(str(tmp_path / "fd.sock"), daemon.WatchedCache())
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_forward_renders_from_warm_cache(tmp_path: Path, server, monkeypatch, capsys):
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    walks = []
+    orig = job_mod.iter_paths
+
+    def spy(**kw):
+        walks.append(kw["root"])
+        return orig(**kw)
+
+    monkeypatch.setattr(job_mod, "iter_paths", spy)
+    monkeypatch.chdir(tmp_path)
+    assert cli.main(["root", "-o", "tree", "--no-daemon"]) == 0
+    local = capsys.readouterr().out
+
+    argv = ["root", "-o", "tree", "-o", "csv=out/l.csv"]
+    assert client.forward(argv, server.path) == 0
+    assert capsys.readouterr().out == local
+    assert (tmp_path / "out" / "l.csv").read_text(encoding="utf-8").startswith("path,is_dir,depth")
+    assert client.forward(argv, server.path) == 0
+    assert capsys.readouterr().out == local
+    assert len(walks) == 2  # ローカル 1 回 + デーモン 1 回（2 回目はキャッシュ）
+
+    # 引数の誤り・--help・デーモンなしはこのプロセスに任せる
+    assert client.forward(["root", "-o", "nope"], server.path) is None
+    assert client.forward(["root", "--no-daemon"], server.path) is None
+    assert client.forward(["root"], str(tmp_path / "none.sock")) is None
+
+    if server.cache.inotify is not None:
+        (root / "a" / "new.txt").write_text("n")
+        deadline = time.monotonic() + 2
+        while len(server.cache) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert client.forward(argv, server.path) == 0
+        assert "new.txt" in capsys.readouterr().out
+        assert len(walks) == 3
+
+
+def test_fetch_scan_and_ttl(tmp_path: Path, server):
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    job = DumpJob([root], max_fanout=1, predicate="!type=l")
+    fetched = daemon.fetch_scan(job, root, path=server.path)
+    assert fetched is not None
+    scan, complete = fetched
+    local = job.cached_scan(root, job_mod.ScanCache())
+    assert complete and scan.items == local.items
+    markers = [daemon.is_marker(it) for it in local.items]
+    assert [daemon.is_marker(it) for it in scan.items] == markers
+    assert scan.stats.total == local.stats.total
+
+    # メタデータ条件つきは監視せず期限切れにする
+    key = job.scan_key(root)
+    assert server.cache.status()["expiring"] == 1
+    server.cache._expires[key] = 0
+    assert server.cache.get(key) is None and len(server.cache) == 0
+    missing = tmp_path / "missing"
+    assert daemon.fetch_scan(DumpJob([missing]), missing, path=server.path) is None
+
+
+def test_content_changes_that_alter_results_discard(tmp_path: Path):
+    cache = daemon.WatchedCache()
+    if cache.inotify is None:
+        cache.close()
+        pytest.skip("inotify なし")
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    (root / ".gitignore").write_text("*.tmp\n")
+    (root / "a" / "p.zip").write_bytes(b"")
+    plain = DumpJob([root])
+    gitignore = DumpJob([root], use_gitignore=True)
+    archives = DumpJob([root], scan_archives=True)
+    try:
+        for job in (plain, gitignore, archives):
+            job.cached_scan(root, cache)
+
+        def wait_gone(key):
+            deadline = time.monotonic() + 2
+            while key in cache and time.monotonic() < deadline:
+                time.sleep(0.02)
+            return key not in cache
+
+        # 既存ファイルへの書き込み（IN_MODIFY のみ）
+        with open(root / ".gitignore", "a") as f:
+            f.write("*.md\n")
+        assert wait_gone(gitignore.scan_key(root))
+        with open(root / "a" / "p.zip", "ab") as f:
+            f.write(b"PK")
+        assert wait_gone(archives.scan_key(root))
+        with open(root / "z.md", "a") as f:
+            f.write("z")
+        time.sleep(0.2)
+        assert plain.scan_key(root) in cache
+    finally:
+        cache.close()
+
+
+
+def test_worker_refetches_instead_of_keeping_daemon_results(tmp_path: Path, server, monkeypatch):
+    pytest.importorskip("PySide6")
+    from folderdump.worker.dump_worker import DumpWorker
+
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    monkeypatch.setenv(client.SOCKET_ENV, server.path)
+    cache = job_mod.ScanCache()
+    fetches = []
+    orig = daemon.fetch_scan
+
+    def spy(job, r, *args, **kw):
+        fetches.append(r)
+        return orig(job, r, *args, **kw)
+
+    monkeypatch.setattr(daemon, "fetch_scan", spy)
+
+    def run(from_cache: bool) -> str:
+        texts = []
+        worker = DumpWorker(
+            roots=[str(root)], fmt="tree", depth=None, absolute=False, follow_symlinks=False,
+            dirs_first=True, include_patterns=[], exclude_patterns=[], folders_only=False,
+            use_gitignore=False, flags=job_mod.CtlFlags(), cache=cache, from_cache=from_cache,
+            use_daemon=True,
+        )
+        worker.finished.connect(lambda text, *_: texts.append(text))
+        worker.run()
+        return texts[0]
+
+    assert "x.py" in run(False)
+    # デーモンの結果は手元のキャッシュ（変更監視なし）に残さない
+    assert len(fetches) == 1 and len(cache) == 0
+    (root / "new.txt").write_text("n")
+    server.cache.clear()  # 変更監視の代わり
+    # 描画し直すときもデーモンに問い合わせ、最新の結果を受け取る
+    assert "new.txt" in run(True)
+    assert len(fetches) == 2 and len(cache) == 0
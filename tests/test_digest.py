@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+import os
+from pathlib import Path
+
+from folderdump.core.digest import DigestTree, diff_trees
+from folderdump.core.job import DumpJob, JobOutput, render_format
+
+
+def items(*paths):
+    return [
+        (Path(p.rstrip("/")), p.endswith("/"), p.count("/", 0, len(p.rstrip("/"))) + 1)
+        for p in paths
+    ]
+
+
+BASE = ("a/", "a/x.py", "a/y.py", "b/", "b/c/", "b/c/z.txt", "r.md")
+
+
+def test_digest_is_order_independent_and_local():
+    t1 = DigestTree(items(*BASE))
+    t2 = DigestTree(list(reversed(items(*BASE))))
+    assert t1.digests == t2.digests
+    t3 = DigestTree(items(*BASE[:-2], "b/c/w.txt", "r.md"))
+    assert t3.digest(Path("a")) == t1.digest(Path("a"))
+    assert t3.digest(Path("b/c")) != t1.digest(Path("b/c"))
+    assert t3.digest() != t1.digest()
+
+
+def test_diff_descends_only_into_changed_dirs():
+    old = DigestTree(items(*BASE))
+    new = DigestTree(items("a/", "a/x.py", "a/y.py", "b/", "b/c/", "b/c/w.txt", "d/", "d/e.txt"))
+    assert list(diff_trees(old, new)) == [
+        ("added", Path("d")), ("removed", Path("r.md")),
+        ("added", Path("b/c/w.txt")), ("removed", Path("b/c/z.txt")),
+    ]
+    assert list(diff_trees(old, DigestTree(items(*BASE)))) == []
+
+
+def test_digest_stat_and_outputs(tmp_path: Path):
+    (tmp_path / "d").mkdir()
+    f = tmp_path / "d" / "f.txt"
+    f.write_text("1")
+    scan = items("d/", "d/f.txt")
+    before = DigestTree(scan, root=tmp_path, with_stat=True)
+    f.write_text("12")
+    os.utime(f, ns=(1, 1))
+    after = DigestTree(scan, root=tmp_path, with_stat=True)
+    assert before.digest(Path("d")) != after.digest(Path("d"))
+    assert list(diff_trees(before, after)) == [("changed", Path("d/f.txt"))]
+
+    text = render_format("csv", tmp_path, scan, digests=after.digests)
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == ["path", "is_dir", "depth", "digest"]
+    assert rows[1][3] == after.digest(Path("d")) and rows[2][3] == ""
+    data = json.loads(render_format("json", tmp_path, scan, digests=after.digests))
+    assert data["digest"] == after.digest()
+    assert data["children"][0]["digest"] == after.digest(Path("d"))
+
+    out = JobOutput("ndjson")
+    DumpJob([tmp_path], digests=True).run([out])
+    recs = [json.loads(line) for line in out.text.splitlines()]
+    assert recs[0]["type"] == "dir" and len(recs[0]["digest"]) == 32 and "digest" not in recs[1]
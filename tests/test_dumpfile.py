@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from folderdump.core import dumpfile
+from folderdump.core.dumpfile import DumpFile
+
+
+def write_lines(path: Path, lines, trailing=True):
+    text = "\n".join(lines) + ("\n" if trailing else "")
+    path.write_text(text, encoding="utf-8")
+
+
+def test_index_and_random_access(tmp_path: Path, monkeypatch):
+    # 小さいチャンクで行がチャンク境界をまたぐ場合も確認
+    monkeypatch.setattr(dumpfile, "CHUNK_SIZE", 64)
+    lines = [f"dir/sub{i % 7}/ファイル{i}.txt" for i in range(1000)]
+    p = tmp_path / "structure.txt"
+    write_lines(p, lines)
+    with DumpFile(p) as d:
+        progress = []
+        assert d.build_index(progress_cb=lambda n, f: progress.append(n)) == 1000
+        assert d.complete and progress[-1] == 1000
+        assert len(d._sparse) == (1000 + dumpfile.STRIDE - 1) // dumpfile.STRIDE
+        for i in (0, 1, 255, 256, 257, 511, 999, 500, 3):
+            assert d.line(i) == lines[i]
+        assert [d.line(i) for i in range(300, 310)] == lines[300:310]
+        assert d.line(1000) == ""
+
+
+def test_no_trailing_newline_and_empty(tmp_path: Path):
+    p = tmp_path / "a.csv"
+    write_lines(p, ["root,path", "x,a", "x,b"], trailing=False)
+    with DumpFile(p) as d:
+        assert d.build_index() == 3
+        assert d.line(2) == "x,b"
+
+    e = tmp_path / "empty.txt"
+    e.write_bytes(b"")
+    with DumpFile(e) as d:
+        assert d.build_index() == 0 and d.complete
+        assert d.find("x") is None
+
+
+def test_find_wraps_and_ignores_case(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(dumpfile, "CHUNK_SIZE", 32)
+    lines = [f"line{i}" for i in range(600)]
+    lines[10] = "├── Target.py"
+    lines[400] = "└── target.py"
+    p = tmp_path / "tree.txt"
+    write_lines(p, lines)
+    with DumpFile(p) as d:
+        d.build_index()
+        assert d.find("target") == 10
+        assert d.find("target", from_line=10) == 400
+        assert d.find("target", from_line=400) == 10  # 折り返し
+        assert d.find("Target", from_line=10, case_sensitive=True) == 10
+        assert d.find("target", from_line=400, forward=False) == 10
+        assert d.find("target", from_line=10, forward=False) == 400
+        assert d.find("line599") == 599
+        assert d.find("nothing") is None
@@ -15,3 +15,31 @@ def test_read_gitignore(tmp_path: Path):
     patterns = read_gitignore(tmp_path)
     assert "*.log" in patterns
     assert "build" in "".join(patterns)
+
+
+def test_include_scope_may_contain():
+    from folderdump.core.filters import IncludeScope
+
+    assert IncludeScope(["*.py"]).may_contain(Path("any/where"))
+    scope = IncludeScope(["src/pkg/*.py", "docs/index.md"])
+    assert scope.may_contain(Path("src"))
+    assert scope.may_contain(Path("src/pkg"))
+    assert scope.may_contain(Path("src/pkg/sub"))  # * は '/' にも一致
+    assert scope.may_contain(Path("docs"))
+    assert not scope.may_contain(Path("docs/api"))
+    assert not scope.may_contain(Path("build"))
+    assert not scope.may_contain(Path("src/other"))
+
+
+def test_predicate_parse_and_order():
+    import pytest
+    from folderdump.core.filters import Predicate
+
+    pred = Predicate("empty size>1.5k !type=l age<7d")
+    # 安い順：種別 → stat → 列挙
+    assert [t[1] for t in pred.terms] == ["type", "size", "age", "empty"]
+    assert pred.terms[1][3] == 1536
+    assert not Predicate("  ")
+    for bad in ("size>10XB", "age<7", "mtime<1d", "size~1"):
+        with pytest.raises(ValueError):
+            Predicate(bad)
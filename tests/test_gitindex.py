@@ -0,0 +1,63 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+from folderdump.core.gitindex import GitIndexSource, read_index
+from folderdump.core.job import DumpJob, JobOutput
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git が必要")
+
+
+def git(root: Path, *args):
+    subprocess.run(["git", "-C", str(root), *args], check=True, capture_output=True)
+
+
+def make_repo(root: Path):
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "pkg" / "m.py").write_text("m")
+    (root / "src" / "B.py").write_text("b")
+    (root / "README.md").write_text("r")
+    (root / ".gitignore").write_text("build\n*.log\n")
+    git(root, "init", "-q")
+    git(root, "add", ".")
+    # 追跡後に作る：未追跡・除外対象
+    (root / "src" / "new.py").write_text("n")
+    (root / "notes").mkdir()
+    (root / "notes" / "a.txt").write_text("a")
+    (root / "build" / "deep").mkdir(parents=True)
+    (root / "build" / "deep" / "x.o").write_text("x")
+    (root / "run.log").write_text("l")
+
+
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_read_index_versions(tmp_path: Path, version):
+    make_repo(tmp_path)
+    git(tmp_path, "update-index", "--index-version", version)
+    paths = [p for p, _ in read_index(tmp_path / ".git" / "index")]
+    assert paths == [".gitignore", "README.md", "src/B.py", "src/pkg/m.py"]
+
+
+def test_records_synthesize_dirs_and_merge_untracked(tmp_path: Path):
+    make_repo(tmp_path)
+    tracked = [(p.as_posix(), d) for p, d in GitIndexSource(tmp_path).records()]
+    assert tracked == [
+        ("src", True), ("src/pkg", True), ("src/pkg/m.py", False), ("src/B.py", False),
+        (".gitignore", False), ("README.md", False),
+    ]
+    src = GitIndexSource(tmp_path, untracked=True)
+    names = {p.as_posix() for p, _ in src.records(["build", "*.log"], [])}
+    assert {"src/new.py", "notes", "notes/a.txt"} <= names
+    assert not any(n.startswith(("build", ".git/")) or n.endswith(".log") for n in names)
+
+
+def test_job_uses_git_index(tmp_path: Path):
+    make_repo(tmp_path)
+    out = JobOutput("plain")
+    DumpJob([tmp_path], use_gitignore=True, git_index=True, git_untracked=True).run([out])
+    lines = out.text.splitlines()
+    assert "src/new.py" in lines and "notes/a.txt" in lines
+    assert not any(line.startswith("build") for line in lines)
+    out = JobOutput("plain")
+    DumpJob([tmp_path], git_index=True, depth=1).run([out])
+    assert out.text.splitlines() == [".", "src/", ".gitignore", "README.md"]
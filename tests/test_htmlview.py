@@ -0,0 +1,63 @@
+import base64
+import json
+import re
+import zlib
+from io import StringIO
+from pathlib import Path
+
+from folderdump.core.htmlview import write_html
+from folderdump.core.job import DumpJob, JobOutput
+from folderdump.core.walker import Marker
+
+
+def load(page: str):
+    """ページからチャンクと索引を取り出す（ブラウザ側の展開と同じ手順）"""
+    chunks = {
+        int(cid): json.loads(zlib.decompress(base64.b64decode(data)))
+        for cid, data in re.findall(
+            r'<script type="application/x-folderdump-chunk" id="c(\d+)">([^<]*)</script>', page,
+        )
+    }
+    dirs = json.loads(re.search(r"const DIRS = (.*);", page).group(1))
+    roots = json.loads(re.search(r"const ROOTS = (.*);", page).group(1))
+
+    def children(dir_id):
+        out = []
+        for cid in dirs[dir_id]:
+            out += chunks[cid].get(str(dir_id), [])
+        return out
+
+    return roots, children, len(chunks)
+
+
+def test_chunks_hold_each_directory_lazily():
+    items = [(Path("a"), True, 1)]
+    items += [(Path("a") / f"f{i}.txt", False, 2) for i in range(5)]
+    items += [(Path("b"), True, 1), (Path("b/c"), True, 2), (Path("b/c/x.txt"), False, 3)]
+    items += [Marker(Path("b"), 2, "… and 9 more"), (Path("z.md"), False, 1)]
+    buf = StringIO()
+    assert write_html(buf, Path("r</script>"), items, chunk_size=3) == 10
+    page = buf.getvalue()
+    assert page.startswith("<!DOCTYPE html>") and page.rstrip().endswith("</html>")
+    assert page.count("</script>") == page.count("<script")
+    roots, children, n_chunks = load(page)
+    assert n_chunks == 4 and roots == [["r</script>", 0]]
+    top = children(0)
+    assert [(name, kind) for name, kind, _ in top] == [("a", 1), ("b", 1), ("z.md", 0)]
+    assert [name for name, _, _ in children(top[0][2])] == [f"f{i}.txt" for i in range(5)]
+    b = children(top[1][2])
+    assert [(name, kind) for name, kind, _ in b] == [("c", 1), ("… and 9 more", 2)]
+    assert children(b[0][2])[0][0] == "x.txt"
+
+
+def test_job_writes_all_roots_into_one_page(tmp_path: Path):
+    for name in ("r1", "r2"):
+        (tmp_path / name / "d").mkdir(parents=True)
+        (tmp_path / name / "d" / "x").write_text("x")
+    out = JobOutput("html", tmp_path / "out.html")
+    DumpJob([tmp_path / "r1", tmp_path / "r2"]).run([out])
+    page = (tmp_path / "out.html").read_text(encoding="utf-8")
+    assert page.count("<!DOCTYPE html>") == 1 and out.count == 4
+    roots, children, _ = load(page)
+    assert [r[0] for r in roots] == [str(tmp_path / "r1"), str(tmp_path / "r2")]
+    assert [c[0] for c in children(roots[1][1])] == ["d"]
@@ -0,0 +1,147 @@
+import json
+from pathlib import Path
+
+import pytest
+from folderdump import cli
+from folderdump.core import job as job_mod
+from folderdump.core.job import DumpJob, JobOutput, render_format
+
+
+def make_tree(base: Path):
+    (base / "a" / "b").mkdir(parents=True)
+    (base / "a" / "b" / "x.py").write_text("x")
+    (base / "a" / "y.txt").write_text("y")
+    (base / "z.md").write_text("z")
+
+
+def test_run_walks_each_root_once(tmp_path: Path, monkeypatch):
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    walks = []
+    orig = job_mod.iter_paths
+
+    def spy(**kw):
+        walks.append(kw["root"])
+        return orig(**kw)
+
+    monkeypatch.setattr(job_mod, "iter_paths", spy)
+    outputs = [
+        JobOutput("tree", tmp_path / "out" / "t.txt"),
+        JobOutput("csv", tmp_path / "out" / "l.csv"),
+        JobOutput("ndjson", tmp_path / "out" / "x.ndjson"),
+        JobOutput("json"),
+    ]
+    result = DumpJob([root, root]).run(outputs)
+    assert walks == [root]  # 同じディレクトリは 1 回だけ走査
+    assert result["count"] == 10
+
+    items = list(orig(
+        root=root, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+        dirs_first=True, folders_only=False, flags=job_mod.CtlFlags(),
+        skiplog=job_mod.SkipLog(), stats=job_mod.Stats(),
+    ))
+    tree = render_format("tree", root, items)
+    assert (tmp_path / "out" / "t.txt").read_text(encoding="utf-8") == tree + "\n\n" + tree
+    lines = (tmp_path / "out" / "x.ndjson").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 10 and json.loads(lines[0])["path"] == "a"
+    json_text = render_format("json", root, items)
+    assert outputs[3].text == json_text + "\n\n" + json_text
+    assert all(out.count == 10 for out in outputs)
+
+
+def test_overlapping_roots_walk_once(tmp_path: Path, monkeypatch):
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    link = tmp_path / "link"
+    link.symlink_to(root / "a", target_is_directory=True)
+    walks = []
+    orig = job_mod.iter_paths
+
+    def spy(**kw):
+        walks.append(kw["root"])
+        return orig(**kw)
+
+    def walk(r):
+        return list(orig(
+            root=r, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+            dirs_first=True, folders_only=False, flags=job_mod.CtlFlags(),
+            skiplog=job_mod.SkipLog(), stats=job_mod.Stats(),
+        ))
+
+    # 入れ子（子が先）・リンク経由の同じディレクトリ
+    job = DumpJob([root / "a" / "b", root, link])
+    assert job.root_plan() == [(1, ("a", "b")), (1, ()), (1, ("a",))]
+    monkeypatch.setattr(job_mod, "iter_paths", spy)
+    out = JobOutput("tree")
+    result = job.run([out])
+    assert walks == [root]
+    expected = [render_format("tree", r, walk(r)) for r in (root / "a" / "b", root, link)]
+    assert out.text == "\n\n".join(expected)
+    assert result["count"] == 1 + 5 + 3
+    assert job_mod.subtree(walk(root), ("a",)) == walk(root / "a")
+
+    # 相対パス・深さで結果が変わる条件では入れ子を切り出さない
+    assert DumpJob([root, root / "a"], depth=1).root_plan() == [(0, ()), (1, ())]
+    assert DumpJob([root, link], depth=1).root_plan() == [(0, ()), (1, ())]
+    assert DumpJob([root / "a", link], depth=1).root_plan() == [(0, ()), (0, ())]
+
+
+class _Tracked(tuple):
+    """生存数を数えるアイテム（タプルは弱参照を持てないため __del__ で数える）"""
+
+    alive = 0
+
+    def __new__(cls, item):
+        cls.alive += 1
+        return super().__new__(cls, item)
+
+    def __del__(self):
+        type(self).alive -= 1
+
+
+@pytest.mark.parametrize("fmt", ["summary", "summary-json", "ndjson", "json-stream", "html"])
+def test_run_streams_without_retaining_items(tmp_path: Path, monkeypatch, fmt):
+    root = tmp_path / "root"
+    for i in range(20):
+        (root / f"d{i}").mkdir(parents=True)
+        (root / f"d{i}" / "f.txt").write_text("f")
+    peak = [0]
+    orig = job_mod.iter_paths
+
+    def spy(**kw):
+        for item in orig(**kw):
+            yield _Tracked(item)
+            peak[0] = max(peak[0], _Tracked.alive)
+
+    monkeypatch.setattr(job_mod, "iter_paths", spy)
+    out = JobOutput(fmt)
+    result = DumpJob([root]).run([out])
+    assert result["count"] == 40
+    assert peak[0] <= 1  # 書き出し側でもアイテムを保持しない
+    # キャッシュ指定時はリスト化して保持する
+    DumpJob([root]).run([JobOutput(fmt)], cache=job_mod.ScanCache())
+    assert peak[0] == 40
+
+
+def test_missing_root_raises(tmp_path: Path):
+    out = JobOutput("plain", tmp_path / "o.txt")
+    with pytest.raises(ValueError):
+        DumpJob([tmp_path / "missing"]).run([out])
+
+
+def test_cli_writes_several_formats(tmp_path: Path, capsys):
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    rc = cli.main([
+        str(root), "-o", f"csv={tmp_path / 'l.csv'}", "-o", "tree", "--exclude", "*.md",
+    ])
+    assert rc == 0
+    out = capsys.readouterr().out
+    assert out.startswith(".\n└── a/") and "z.md" not in out
+    assert (tmp_path / "l.csv").read_text(encoding="utf-8").startswith("path,is_dir,depth")
+
+    with pytest.raises(SystemExit):
+        cli.main([str(root), "-o", "nope"])
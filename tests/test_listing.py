@@ -0,0 +1,121 @@
+from pathlib import Path
+
+from folderdump.core.listing import ListingReader
+from folderdump.core.walker import CtlFlags, Stats, SkipLog
+
+
+def _read(lines, **kw):
+    reader = ListingReader(lines)
+    args = dict(
+        max_depth=None, includes=[], excludes=[], folders_only=False,
+        flags=CtlFlags(), skiplog=SkipLog(), stats=Stats(),
+    )
+    args.update(kw)
+    items = list(reader.iter_paths(**args))
+    return reader, [(p.as_posix(), d, depth) for p, d, depth in items]
+
+
+def test_find_listing_applies_filters_and_depth():
+    lines = ["d .", "d ./a", "f ./a/x.py", "d ./build", "f ./build/out.o", "f ./top.txt"]
+    reader, items = _read(lines, excludes=["build"])
+    assert reader.fmt == "find"
+    assert items == [("a", True, 1), ("a/x.py", False, 2), ("top.txt", False, 1)]
+
+    _, items = _read(lines, max_depth=1, folders_only=True)
+    assert items == [("a", True, 1), ("build", True, 1)]
+
+
+def test_ls_lr_and_rsync_listings(tmp_path: Path):
+    ls = tmp_path / "ls.txt"
+    ls.write_text(
+        "/data:\ntotal 4\n"
+        "drwxr-xr-x 2 u g 4096 Jan  1 12:00 src\n"
+        "lrwxrwxrwx 1 u g    3 2024-01-02 10:11 latest -> src\n"
+        "\n/data/src:\ntotal 0\n"
+        "-rw-r--r-- 1 u g 0 Jan  1  2023 main file.c\n"
+    )
+    reader, items = _read(ls)
+    assert reader.fmt == "ls-lR"
+    assert reader.root == Path("/data")
+    assert items == [("src", True, 1), ("latest", False, 1), ("src/main file.c", False, 2)]
+
+    rsync = [
+        "drwxr-xr-x          4,096 2024/01/02 03:04:05 .",
+        "-rw-r--r--             12 2024/01/02 03:04:05 a.txt",
+    ]
+    reader, items = _read(rsync)
+    assert reader.fmt == "rsync"
+    assert items == [("a.txt", False, 1)]
+
+
+def test_listing_max_fanout_emits_summary_when_leaving_dir():
+    lines = ["d .", "d ./c", "f ./c/1", "d ./c/s", "f ./c/s/in", "f ./c/2", "f ./c/3", "f ./top"]
+    _, items = _read(lines, max_fanout=1)
+    assert items == [
+        ("c", True, 1), ("c/1", False, 2),
+        ("c/… and 3 more (1 dirs, 2 files)", False, 2),
+        ("… and 1 more (0 dirs, 1 files)", False, 1),
+    ]
+
+
+def test_listing_includes_emit_ancestors():
+    lines = ["d .", "d ./a", "d ./a/b", "f ./a/b/x.py", "f ./a/y.txt", "d ./c", "f ./c/z.txt"]
+    _, items = _read(lines, includes=["*.py"])
+    assert items == [("a", True, 1), ("a/b", True, 2), ("a/b/x.py", False, 3)]
+
+
+def test_ls_lr_prunes_dirs_whose_block_comes_after_siblings():
+    # ls -lR では build の中身の見出しが兄弟（src, z.txt）の後に来る
+    lines = [
+        "/data:",
+        "drwxr-xr-x 2 u g 4096 Jan  1 12:00 build",
+        "drwxr-xr-x 2 u g 4096 Jan  1 12:00 src",
+        "-rw-r--r-- 1 u g    0 Jan  1 12:00 z.txt",
+        "",
+        "/data/build:",
+        "drwxr-xr-x 2 u g 4096 Jan  1 12:00 obj",
+        "-rw-r--r-- 1 u g    0 Jan  1 12:00 out.o",
+        "",
+        "/data/build/obj:",
+        "-rw-r--r-- 1 u g    0 Jan  1 12:00 a.o",
+        "",
+        "/data/src:",
+        "-rw-r--r-- 1 u g    0 Jan  1 12:00 main.c",
+        "-rw-r--r-- 1 u g    0 Jan  1 12:00 util.c",
+    ]
+    _, items = _read(lines, excludes=["build"])
+    assert items == [
+        ("src", True, 1), ("z.txt", False, 1), ("src/main.c", False, 2), ("src/util.c", False, 2),
+    ]
+
+    _, items = _read(lines, max_fanout=1)
+    assert items == [
+        ("build", True, 1),
+        ("build/obj", True, 2),
+        ("build/obj/a.o", False, 3),
+        ("build/… and 1 more (0 dirs, 1 files)", False, 2),
+        ("… and 2 more (1 dirs, 1 files)", False, 1),
+    ]
+
+
+def test_ls_lr_includes_emit_ancestor_whose_block_comes_after_siblings():
+    lines = [
+        "/data:",
+        "drwxr-xr-x 2 u g 4096 Jan  1 12:00 a",
+        "drwxr-xr-x 2 u g 4096 Jan  1 12:00 b",
+        "-rw-r--r-- 1 u g    0 Jan  1 12:00 z.txt",
+        "",
+        "/data/a:",
+        "-rw-r--r-- 1 u g    0 Jan  1 12:00 x.py",
+        "",
+        "/data/b:",
+        "drwxr-xr-x 2 u g 4096 Jan  1 12:00 c",
+        "",
+        "/data/b/c:",
+        "-rw-r--r-- 1 u g    0 Jan  1 12:00 y.py",
+    ]
+    _, items = _read(lines, includes=["*.py"])
+    assert items == [
+        ("a", True, 1), ("a/x.py", False, 2),
+        ("b", True, 1), ("b/c", True, 2), ("b/c/y.py", False, 3),
+    ]
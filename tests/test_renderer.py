@@ -1,7 +1,8 @@
 from pathlib import Path
 from folderdump.core import (
     render_plain, render_tree, render_markdown,
-    render_json, render_csv, render_dot
+    render_json, render_csv, render_dot,
+    write_ndjson, write_json_stream,
 )
 
 
@@ -45,3 +46,32 @@ def test_render_csv(tmp_path):
 def test_render_dot():
     text = render_dot(sample_items())
     assert "digraph G" in text
+
+
+def test_write_ndjson(tmp_path):
+    import io
+    import json
+    buf = io.StringIO()
+    count = write_ndjson(buf, tmp_path, sample_items())
+    records = [json.loads(line) for line in buf.getvalue().splitlines()]
+    assert count == 3
+    assert records[1] == {"path": "dirA/file1.txt", "type": "file", "depth": 2}
+
+
+def test_write_json_stream_matches_render_json():
+    import io
+    buf = io.StringIO()
+    write_json_stream(buf, sample_items())
+    assert buf.getvalue() == render_json(sample_items())
+
+
+def test_render_dot_collapses_and_escapes():
+    items = [(Path('we"ird'), False, 1), (Path("node_modules"), True, 1)]
+    items += [(Path("node_modules") / f"m{i}", False, 2) for i in range(10)]
+    text = render_dot(items, collapse_over=5)
+    assert '"we\\"ird"' in text
+    assert "node_modules/ (10 entries)" in text
+    assert "m0" not in text
+
+    text = render_dot(items, max_fanout=1)
+    assert "… and 1 more (1 dirs, 0 files)" in text
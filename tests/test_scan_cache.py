@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from folderdump.core.job import DumpJob
+from folderdump.core.scan_cache import CachedScan, ScanCache
+from folderdump.core.walker import SkipLog, Stats
+
+
+def scan(n: int) -> CachedScan:
+    items = [(Path(f"f{i}"), False, 0) for i in range(n)]
+    return CachedScan(Path("."), items, Stats(), SkipLog())
+
+
+def test_lru_eviction_by_count_and_items():
+    cache = ScanCache(max_items=10, max_scans=2)
+    assert cache.put("a", scan(3))
+    assert cache.put("b", scan(3))
+    cache.get("a")                      # a を最近使ったものにする
+    assert cache.put("c", scan(3))      # 件数上限で最も古い b を追い出す
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.items_total == 6
+
+    assert cache.put("d", scan(8))      # アイテム総数の上限で a, c を追い出す
+    assert len(cache) == 1 and cache.items_total == 8
+    assert not cache.put("e", scan(11))  # 単独で上限を超えるものは保存しない
+    assert "e" not in cache and "d" in cache
+
+
+def test_scan_key_ignores_render_options(tmp_path: Path):
+    key = DumpJob([tmp_path], absolute=False).scan_key(tmp_path)
+    assert DumpJob([tmp_path], absolute=True).scan_key(tmp_path) == key
+    assert DumpJob([tmp_path], depth=2).scan_key(tmp_path) != key
+    assert DumpJob([tmp_path], exclude_patterns=["*.md"]).scan_key(tmp_path) != key
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from pathlib import Path
+
+import pytest
+from folderdump.core.renderer import render_csv, render_json
+from folderdump.core.shard import ShardSpec, plan_shards, write_shards, write_manifest
+
+
+def sample_items():
+    items = [(Path("a"), True, 1)]
+    items += [(Path("a") / f"f{i}.txt", False, 2) for i in range(5)]
+    items += [(Path("b"), True, 1), (Path("b/g.txt"), False, 2), (Path("top.txt"), False, 1)]
+    return items
+
+
+def test_plan_shards_by_entries_and_top():
+    items = sample_items()
+    assert plan_shards(items, ShardSpec(max_entries=4), "plain") == [
+        (0, 4, None), (4, 8, None), (8, 9, None),
+    ]
+    assert [(s, e, t) for s, e, t in plan_shards(items, ShardSpec(by_top=True), "plain")] == [
+        (0, 6, "a"), (6, 8, "b"), (8, 9, ""),
+    ]
+    with pytest.raises(ValueError):
+        ShardSpec()
+
+
+def test_write_shards_frames_each_shard(tmp_path: Path):
+    items = sample_items()
+    dest = tmp_path / "out" / "structure.csv"
+    spec = ShardSpec(max_entries=4)
+    shards = write_shards(items, tmp_path, dest, "csv", lambda r, it: render_csv(r, it), spec)
+    assert [s["file"] for s in shards] == [
+        "structure.00000.csv", "structure.00001.csv", "structure.00002.csv",
+    ]
+    for s in shards:
+        rows = list(csv.reader(io.StringIO((dest.parent / s["file"]).read_text(encoding="utf-8"))))
+        assert rows[0] == ["path", "is_dir", "depth"]
+        assert len(rows) - 1 == s["entries"]
+
+    path = write_manifest(dest, "csv", spec, [{"root": str(tmp_path), "shards": shards}])
+    manifest = json.loads(path.read_text())
+    assert manifest["roots"][0]["shards"][1]["first"] == 4
+
+    # 階層形式では先頭エントリの祖先を補う
+    dest = tmp_path / "out" / "structure.json"
+    shards = write_shards(items, tmp_path, dest, "json", lambda r, it: render_json(it), spec)
+    second = json.loads((dest.parent / shards[1]["file"]).read_text(encoding="utf-8"))
+    assert second["children"][0]["name"] == "a/"
+
+
+def test_write_shards_keeps_rendered_bytes_under_max(tmp_path: Path):
+    # JSON は見積もりより描画結果が大きい（ルートの枠と祖先の補完）ので、実測で切り詰め直す
+    items = sample_items()
+    dest = tmp_path / "out" / "structure.json"
+    spec = ShardSpec(max_bytes=300)
+    start, end, _ = plan_shards(items, spec, "json")[0]
+    assert len(render_json(items[start:end]).encode("utf-8")) > 300
+    shards = write_shards(items, tmp_path, dest, "json", lambda r, it: render_json(it), spec)
+    assert len(shards) > 1
+    assert all(s["bytes"] <= 300 for s in shards)
+    assert [s["first"] for s in shards[1:]] == [s["last"] + 1 for s in shards[:-1]]
+    assert sum(s["entries"] for s in shards) == len(items)
+
+
+def test_shard_output_through_job_run(tmp_path: Path):
+    from folderdump.core.job import DumpJob, ShardOutput
+
+    for name in ("r1", "r2"):
+        (tmp_path / name / "a").mkdir(parents=True)
+        for i in range(3):
+            (tmp_path / name / "a" / f"f{i}.txt").write_text("f")
+    dest = tmp_path / "out" / "structure.csv"
+    out = ShardOutput("csv", dest, ShardSpec(max_entries=2), tagged=True)
+    result = DumpJob([tmp_path / "r1", tmp_path / "r2"]).run([out])
+    assert result["count"] == 8 and out.count == 8
+    manifest = json.loads(out.text)
+    assert [r["root"] for r in manifest["roots"]] == [str(tmp_path / "r1"), str(tmp_path / "r2")]
+    files = [s["file"] for s in manifest["roots"][1]["shards"]]
+    assert files == ["structure.r1.00000.csv", "structure.r1.00001.csv"]
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _loaded_after(stmt: str) -> set:
+    code = f"import sys; {stmt}; print('\\n'.join(sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True,
+    ).stdout
+    return set(out.split())
+
+
+def test_core_package_is_lazy():
+    mods = _loaded_after("import folderdump.core")
+    assert "folderdump.core.aio" not in mods
+    assert "folderdump.core.renderer" not in mods
+
+    mods = _loaded_after("from folderdump.core import should_keep")
+    assert "folderdump.core.filters" in mods
+    assert "asyncio" not in mods
+
+
+def test_main_window_import_defers_worker_and_theme():
+    pytest.importorskip("PySide6")
+    mods = _loaded_after("import folderdump.gui.main_window")
+    for name in ("folderdump.worker.dump_worker", "folderdump.core.renderer", "qdarktheme"):
+        assert name not in mods
+
+
+def test_worker_import_defers_daemon():
+    pytest.importorskip("PySide6")
+    mods = _loaded_after("import folderdump.worker.dump_worker")
+    for name in ("folderdump.daemon", "socketserver", "ctypes"):
+        assert name not in mods
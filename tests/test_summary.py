@@ -0,0 +1,41 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+from folderdump.core.job import render_format
+from folderdump.core.summary import TreeSummary, write_summary
+from folderdump.core.walker import CtlFlags, SkipLog, Stats, is_marker, iter_paths
+
+
+def walk(base: Path):
+    """実際の走査結果（最上位は深さ 1。a は表示件数の上限で要約マーカーつき）"""
+    (base / "a" / "b").mkdir(parents=True)
+    for name in (
+        "a/b/x.py", "a/b/y.PY", "a/b/z", "a/c.txt", "a/e1.txt", "a/e2.txt", "a/e3.txt", "d.txt",
+    ):
+        (base / name).write_text("x")
+    return iter_paths(
+        root=base, max_depth=None, follow_symlinks=False, includes=[], excludes=[], dirs_first=True,
+        folders_only=False, flags=CtlFlags(), skiplog=SkipLog(), stats=Stats(), max_fanout=3,
+    )
+
+
+def test_summary_aggregates_stream(tmp_path: Path):
+    items = list(walk(tmp_path))
+    assert sum(1 for it in items if is_marker(it)) == 1
+    s = TreeSummary(top=2).feed(iter(items)).finish()
+    assert (s.total, s.dirs, s.files) == (8, 2, 6)
+    assert s.by_depth == {1: 2, 2: 3, 3: 3}
+    assert s.extensions() == [(".txt", 3), (".py", 2), ("(none)", 1)]
+    assert s.deepest == [(3, "a/b/x.py"), (3, "a/b/y.PY")]
+    assert s.widest == [(3, "a"), (3, "a/b")]
+
+
+def test_summary_json_and_text(tmp_path: Path):
+    buf = StringIO()
+    # 走査のジェネレータをそのまま渡す
+    assert write_summary(buf, tmp_path, walk(tmp_path), as_json=True) == 8
+    data = json.loads(buf.getvalue())
+    assert data["entries"] == 8 and data["widest"][0] == {"path": "a", "children": 3}
+    text = render_format("summary", tmp_path, list(walk(tmp_path / "again")))
+    assert "entries: 8 (dirs 2, files 6)" in text and "a/b/x.py" in text
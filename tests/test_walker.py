@@ -44,3 +44,351 @@ def test_iter_paths_lists_directories_and_files(tmp_path: Path):
     assert "dirA/file1.txt" in names or "dirA\\file1.txt" in names
     assert stats.total > 0
     assert skiplog.count() == 0
+
+
+def _scan(root: Path, **kw):
+    args = dict(
+        root=root, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+        dirs_first=True, folders_only=False, flags=CtlFlags(), skiplog=SkipLog(), stats=Stats(),
+    )
+    args.update(kw)
+    return list(iter_paths(**args))
+
+
+def test_budget_truncates_with_markers(tmp_path: Path):
+    from folderdump.core.walker import ScanBudget, is_marker
+
+    for i in range(10):
+        (tmp_path / f"f{i}.txt").write_text("x")
+
+    items = _scan(tmp_path, budget=ScanBudget(max_per_dir=3))
+    assert len([it for it in items if not is_marker(it)]) == 3
+    assert any(is_marker(it) for it in items)
+
+    budget = ScanBudget(max_entries=5)
+    items = _scan(tmp_path, budget=budget)
+    assert len([it for it in items if not is_marker(it)]) == 5
+    assert budget.reason is not None
+
+
+def test_canceled_flags_stop_scan(tmp_path: Path):
+    make_temp_tree(tmp_path)
+    flags = CtlFlags()
+    flags.pause()
+    flags.cancel()  # 一時停止中でもキャンセルで即座に抜ける
+    assert flags.is_paused() is False
+    assert _scan(tmp_path, flags=flags) == []
+
+
+def test_pause_blocks_and_resume_continues(tmp_path: Path):
+    import threading
+    import time
+
+    for d in range(5):
+        (tmp_path / f"d{d}").mkdir()
+        for f in range(40):
+            (tmp_path / f"d{d}" / f"f{f}.txt").write_text("x")
+    expected = _scan(tmp_path)
+
+    flags = CtlFlags()
+    got = []
+    paused = threading.Event()
+
+    def consume():
+        for item in iter_paths(
+            root=tmp_path, max_depth=None, follow_symlinks=False, includes=[], excludes=[],
+            dirs_first=True, folders_only=False, flags=flags, skiplog=SkipLog(), stats=Stats(),
+        ):
+            got.append(item)
+            if len(got) == 50:
+                flags.pause()
+                paused.set()
+
+    t = threading.Thread(target=consume, daemon=True)
+    t.start()
+    assert paused.wait(5)
+    time.sleep(0.05)
+    n = len(got)
+    time.sleep(0.2)
+    # 一時停止中は走査が進まない
+    assert t.is_alive() and len(got) == n and n < len(expected)
+    flags.resume()
+    t.join(5)
+    assert not t.is_alive()
+    # 取りこぼしも重複もない
+    assert got == expected
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlink 非対応")
+def test_follow_symlinks_detects_loops_and_outside(tmp_path: Path):
+    root = tmp_path / "root"
+    outside = tmp_path / "outside"
+    (root / "a").mkdir(parents=True)
+    outside.mkdir()
+    (outside / "ext.txt").write_text("x")
+    try:
+        os.symlink("..", root / "a" / "loop")
+        os.symlink(outside, root / "ext")
+    except OSError:
+        pytest.skip("symlink を作成できない環境")
+
+    skiplog = SkipLog()
+    items = _scan(root, follow_symlinks=True, skiplog=skiplog)
+    names = {p.as_posix() for p, _, _ in items}
+    # リンク自体はリンク側のパスで出力され、ループ先/ルート外は辿らない
+    assert {"a", "a/loop", "ext"} <= names
+    assert "ext/ext.txt" not in names
+    reasons = skiplog.to_text()
+    assert "symlink loop" in reasons
+    assert "symlink outside root" in reasons
+
+    items = _scan(root, follow_symlinks=True, follow_outside=True)
+    assert "ext/ext.txt" in {p.as_posix() for p, _, _ in items}
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlink 非対応")
+def test_follow_symlinks_link_sorted_before_target(tmp_path: Path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b" / "sub").mkdir(parents=True)
+    (tmp_path / "b" / "sub" / "x.txt").write_text("x")
+    try:
+        # a/link は b/ より先に並ぶ
+        os.symlink(os.path.join("..", "b"), tmp_path / "a" / "link")
+    except OSError:
+        pytest.skip("symlink を作成できない環境")
+
+    skiplog = SkipLog()
+    names = [p.as_posix() for p, _, _ in _scan(tmp_path, follow_symlinks=True, skiplog=skiplog)]
+    # 実体側が走査され、リンクは辿らない
+    assert names == ["a", "a/link", "b", "b/sub", "b/sub/x.txt"]
+    assert "symlink inside root: -> b" in skiplog.to_text()
+    assert "already visited" not in skiplog.to_text()
+
+    # 存在しないルートは例外にせず空の走査
+    missing = SkipLog()
+    assert _scan(tmp_path / "missing", follow_symlinks=True, skiplog=missing) == []
+    assert missing.count() == 1
+
+
+def test_max_fanout_summarizes_hidden_children(tmp_path: Path):
+    from folderdump.core.walker import is_marker
+    from folderdump.core.renderer import render_tree
+
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    for i in range(3):
+        (cache / f"d{i}").mkdir()
+        (cache / f"d{i}" / "deep.txt").write_text("x")
+    for i in range(7):
+        (cache / f"f{i}.bin").write_text("x")
+    (tmp_path / "z.txt").write_text("x")
+
+    stats = Stats()
+    items = _scan(tmp_path, max_fanout=2, stats=stats)
+    markers = [it for it in items if is_marker(it)]
+    assert [m.label for m in markers] == ["… and 8 more (1 dirs, 7 files)"]
+    assert markers[0][0].parent == Path("cache") and markers[0][2] == 2
+    # 非表示の子は出力も走査もしない
+    names = {it[0].as_posix() for it in items if not is_marker(it)}
+    assert names == {
+        "cache", "z.txt", "cache/d0", "cache/d1", "cache/d0/deep.txt", "cache/d1/deep.txt",
+    }
+    assert stats.total == len(names)
+    assert "└── … and 8 more (1 dirs, 7 files)" in render_tree(items)
+
+    # フォルダのみではファイルを数えない
+    items = _scan(tmp_path, max_fanout=2, folders_only=True)
+    assert [it.label for it in items if is_marker(it)] == ["… and 1 more (1 dirs, 0 files)"]
+
+
+def test_includes_descend_and_keep_ancestors(tmp_path: Path, monkeypatch):
+    from folderdump.core import walker
+
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("x")
+    (tmp_path / "src" / "pkg" / "data.json").write_text("x")
+    (tmp_path / "src" / "empty").mkdir()
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "gen.py").write_text("x")
+    (tmp_path / "top.py").write_text("x")
+
+    # 名前パターン：全ディレクトリに潜り、一致の祖先だけ出す
+    items = _scan(tmp_path, includes=["*.py"])
+    assert [(p.as_posix(), d, depth) for p, d, depth in items] == [
+        ("build", True, 1), ("build/gen.py", False, 2),
+        ("src", True, 1), ("src/pkg", True, 2), ("src/pkg/mod.py", False, 3),
+        ("top.py", False, 1),
+    ]
+
+    # パスパターン：一致しえないディレクトリは列挙しない
+    listed = []
+    orig = walker.walk_sorted
+
+    def spy(dirpath, *a, **kw):
+        listed.append(Path(dirpath).relative_to(tmp_path.resolve()).as_posix())
+        return orig(dirpath, *a, **kw)
+
+    monkeypatch.setattr(walker, "walk_sorted", spy)
+    stats = Stats()
+    items = _scan(tmp_path, includes=["src/pkg/*.py"], stats=stats)
+    assert [p.as_posix() for p, _, _ in items] == ["src", "src/pkg", "src/pkg/mod.py"]
+    assert sorted(listed) == [".", "src", "src/pkg"]
+    assert stats.total == 3
+
+
+def test_skiplog_keeps_counts_and_first_examples(tmp_path: Path):
+    log = tmp_path / "skips.tsv"
+    skiplog = SkipLog(max_examples=2, log_path=log)
+    for i in range(5):
+        skiplog.add(f"/d{i}", f"OSError: [Errno 13] Permission denied: '/d{i}'")
+    skiplog.add("/x", "symlink loop: -> .")
+    skiplog.close()
+
+    assert skiplog.count() == 6
+    assert skiplog.summary() == [("OSError [13] Permission denied", 5), ("symlink loop", 1)]
+    assert [p for p, _ in skiplog.examples["OSError [13] Permission denied"]] == ["/d0", "/d1"]
+    assert "… and 3 more" in skiplog.to_text()
+    assert len(log.read_text(encoding="utf-8").splitlines()) == 6
+
+    total = SkipLog(max_examples=3)
+    total.merge(skiplog)
+    total.merge(skiplog)
+    assert total.count() == 12 and len(total.examples["OSError [13] Permission denied"]) == 3
+
+
+def test_predicate_filters_by_metadata(tmp_path: Path):
+    from folderdump.core.filters import Predicate
+
+    (tmp_path / "old").mkdir()
+    (tmp_path / "old" / "big.bin").write_bytes(b"x" * 4096)
+    (tmp_path / "old" / "small.txt").write_text("x")
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "zero.txt").write_text("")
+    old = 1_000_000_000
+    for p in (tmp_path / "old" / "big.bin", tmp_path / "old" / "small.txt"):
+        os.utime(p, (old, old))
+
+    def names(expr, **kw):
+        pred = Predicate(expr, now=old + 30 * 86400)
+        return [(p.as_posix(), d) for p, d, _ in _scan(tmp_path, predicate=pred, **kw)]
+
+    # 一致しないフォルダは配下に一致があるときだけ祖先として出る
+    assert names("size>=4k") == [("old", True), ("old/big.bin", False)]
+    assert names("type=f age>7d") == [
+        ("old", True), ("old/big.bin", False), ("old/small.txt", False),
+    ]
+    assert names("empty") == [("empty", True), ("zero.txt", False)]
+    assert names("empty type=d") == [("empty", True)]
+    # 名前で落ちたものは評価しない
+    assert names("type=f", excludes=["*.bin"]) == [
+        ("old", True), ("old/small.txt", False), ("zero.txt", False),
+    ]
+
+
+def test_visitors_share_one_walk(tmp_path: Path):
+    from collections import Counter
+    from folderdump.core.walker import Visitor
+
+    make_temp_tree(tmp_path)
+    (tmp_path / "dirA" / "subA" / "c.txt").write_text("abc")
+
+    class Events(Visitor):
+        def __init__(self):
+            self.log = []
+
+        def on_enter_dir(self, rel, depth):
+            self.log.append(("enter", rel.as_posix(), depth))
+
+        def on_entry(self, rel, entry, is_dir, depth):
+            self.log.append(("entry", rel.as_posix(), depth))
+
+        def on_exit_dir(self, rel, depth):
+            self.log.append(("exit", rel.as_posix(), depth))
+
+    class ExtBytes(Visitor):
+        def __init__(self):
+            self.bytes = Counter()
+
+        def on_entry(self, rel, entry, is_dir, depth):
+            if not is_dir:
+                self.bytes[rel.suffix] += entry.stat().st_size
+
+    events, sizes = Events(), ExtBytes()
+    items = _scan(tmp_path, visitors=[events, sizes, Visitor()])
+    assert items == _scan(tmp_path)
+    assert events.log == [
+        ("enter", ".", 0),
+        ("entry", "dirA", 1), ("enter", "dirA", 1),
+        ("entry", "dirA/subA", 2), ("enter", "dirA/subA", 2),
+        ("entry", "dirA/subA/c.txt", 3), ("exit", "dirA/subA", 2),
+        ("entry", "dirA/file1.txt", 2), ("exit", "dirA", 1),
+        ("entry", "dirB", 1), ("enter", "dirB", 1),
+        ("entry", "dirB/file2.txt", 2), ("exit", "dirB", 1),
+        ("exit", ".", 0),
+    ]
+    assert sizes.bytes == {".txt": 13}
+
+
+def test_order_modes(tmp_path: Path):
+    from folderdump.core.walker import ScanBudget, is_marker
+
+    (tmp_path / "d10").mkdir()
+    (tmp_path / "d2").mkdir()
+    (tmp_path / "d2" / "x.txt").write_text("x")
+    for name, size in (("file10.txt", 1), ("File2.txt", 30), ("file1.txt", 5)):
+        (tmp_path / name).write_bytes(b"x" * size)
+
+    def names(order, **kw):
+        return [p.as_posix() for p, _, _ in _scan(tmp_path, max_depth=1, order=order, **kw)]
+
+    assert names("name") == ["d10", "d2", "file1.txt", "file10.txt", "File2.txt"]
+    assert names("natural") == ["d2", "d10", "file1.txt", "File2.txt", "file10.txt"]
+    assert names("size") == ["d10", "d2", "File2.txt", "file1.txt", "file10.txt"]
+    assert names("natural", dirs_first=False)[:2] == ["d2", "d10"]
+
+    # 並べ替えない：同じ集合を列挙順のまま（配下は各ディレクトリの直後）
+    items = _scan(tmp_path, order="fs")
+    expected = sorted(p.as_posix() for p, _, _ in _scan(tmp_path))
+    assert sorted(p.as_posix() for p, _, _ in items) == expected
+    rels = [p.as_posix() for p, _, _ in items]
+    assert rels.index("d2/x.txt") == rels.index("d2") + 1
+
+    items = _scan(tmp_path, max_depth=1, order="fs", budget=ScanBudget(max_per_dir=2))
+    assert [is_marker(it) for it in items] == [False, False, True]
+
+    with pytest.raises(ValueError):
+        _scan(tmp_path, order="random")
+
+
+def test_natural_key():
+    from folderdump.core.ordering import natural_key
+
+    names = ["v1.10", "v1.2", "V1.9", "a", "a01b", "a1a"]
+    assert sorted(names, key=natural_key) == ["a", "a1a", "a01b", "v1.2", "V1.9", "v1.10"]
+
+
+def test_progress_estimator_extrapolates_total(tmp_path: Path):
+    from folderdump.core.walker import ProgressEstimator
+
+    for a in range(4):
+        for b in range(4):
+            d = tmp_path / f"a{a}" / f"b{b}"
+            d.mkdir(parents=True)
+            for f in range(10):
+                (d / f"f{f}.txt").touch()
+    true_total = 4 + 16 + 160
+
+    est = ProgressEstimator()
+    seen = []
+    for rel, is_dir, depth in _scan(tmp_path, estimator=est):
+        if rel.as_posix() == "a1":
+            # 最初のトップレベルフォルダを出し終えた時点で、同じ形の残りから外挿できる
+            seen.append(est.total())
+    assert abs(seen[0] - true_total) <= true_total * 0.1
+    assert est.done == true_total and est.total() == true_total
+    assert est.fraction() == 0.99
+
+    # 並べ替えない列挙は先読みできないため推定しない
+    est = ProgressEstimator()
+    _scan(tmp_path, estimator=est, order="fs")
+    assert est.fraction() is None and est.eta() is None